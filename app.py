@@ -45,7 +45,7 @@ def create_app(test_config=None):
         flash('请先登录以访问此页面', 'warning')
         return redirect(url_for('auth.login'))
 
-    # 注册蓝图
+    # 注册蓝图；蓝图模块在视图函数中才导入依赖pandas等较重的库的工具模块，启动时不载入这些库
     from routes.auth_routes import auth_bp
     from routes.main_routes import main_bp
     from routes.data_routes import data_bp
@@ -68,9 +68,20 @@ def create_app(test_config=None):
         db.session.rollback()
         return render_template('errors/500.html'), 500
 
-    # 创建数据库表
-    with app.app_context():
+    # 创建数据库表；DATABASE_CREATE_ALL 为False时跳过（数据库结构已存在，或由 flask init-db 创建），加快启动
+    if app.config.get('DATABASE_CREATE_ALL', True):
+        with app.app_context():
+            db.create_all()
+
+    @app.cli.command('init-db')
+    def init_db():
+        """创建数据库表"""
         db.create_all()
+        print('数据库表已创建')
+
+    # 初始化后台评估任务队列
+    from utils.job_queue import init_job_queue
+    init_job_queue(app)
 
     return app
 
@@ -0,0 +1,292 @@
+"""
+确定性的合成数据集生成器
+
+按行数、列数、列类型比例、缺失值比例、基数和日期列数量生成CSV、XLSX或JSON数据集。
+数据按固定大小的块生成，每块使用由 (种子, 块序号) 确定的随机数，
+相同参数生成的文件内容完全相同，生成1亿行的文件时内存占用也只与块大小有关。
+
+用法:
+    python benchmarks/dataset_generator.py --rows 1000000 --columns 50 --output data.csv
+    python benchmarks/dataset_generator.py --rows 10000 --columns 20 --dtypes float=2,category=1 --output data.xlsx
+"""
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+
+# 支持的列类型；另有固定的 id 列和单独指定数量的日期列
+COLUMN_KINDS = ('float', 'int', 'category', 'text', 'bool')
+
+# 默认的列类型比例
+DEFAULT_DTYPES = {'float': 3, 'int': 2, 'category': 2, 'text': 1, 'bool': 1}
+
+# 每次生成的行数；改变此值会改变生成的数据
+GENERATOR_BLOCK_ROWS = 100000
+
+# XLSX 工作表的最大数据行数（不含表头）
+EXCEL_MAX_ROWS = 1048575
+
+# 支持的输出格式
+OUTPUT_FORMATS = ('csv', 'xlsx', 'json')
+
+# 日期列的取值范围
+DATE_START = np.datetime64('2020-01-01')
+DATE_SPAN_DAYS = 5 * 365
+
+_TEXT_WORDS = np.array(['订单', '退款', 'delayed', 'ok', '需要复核', 'partial, split', 'note', '客户反馈'], dtype=object)
+
+def make_spec(rows, columns, dtypes=None, null_ratio=0.05, cardinality=100, date_columns=1, seed=0):
+    """
+    构建数据集参数
+
+    Args:
+        rows: 行数
+        columns: 列数（包含 id 列和日期列）
+        dtypes: {列类型: 权重}（可选，默认 DEFAULT_DTYPES）
+        null_ratio: 除 id 列外每列的缺失值比例
+        cardinality: 分类列和整数列的不同值数量
+        date_columns: 日期列数量
+        seed: 随机种子
+
+    Returns:
+        dict: 数据集参数
+
+    Raises:
+        ValueError: 参数无效
+    """
+    dtypes = dict(dtypes or DEFAULT_DTYPES)
+    unknown = set(dtypes) - set(COLUMN_KINDS)
+    if unknown:
+        raise ValueError(f"未知的列类型: {', '.join(sorted(unknown))}")
+    if rows < 1:
+        raise ValueError("行数至少为1")
+    if columns < 1 + date_columns:
+        raise ValueError("列数至少为日期列数量加1（id 列）")
+    if not 0 <= null_ratio < 1:
+        raise ValueError("缺失值比例应在 [0, 1) 内")
+    if cardinality < 1:
+        raise ValueError("基数至少为1")
+    if columns > 1 + date_columns and not any(weight > 0 for weight in dtypes.values()):
+        raise ValueError("列类型权重至少有一个大于0")
+    return {
+        'rows': int(rows),
+        'columns': int(columns),
+        'dtypes': {kind: dtypes[kind] for kind in COLUMN_KINDS if dtypes.get(kind, 0) > 0},
+        'null_ratio': float(null_ratio),
+        'cardinality': int(cardinality),
+        'date_columns': int(date_columns),
+        'seed': int(seed)
+    }
+
+def parse_dtypes(text):
+    """
+    解析 "float=3,category=1" 形式的列类型比例
+
+    Args:
+        text: 逗号分隔的 类型=权重
+
+    Returns:
+        dict: {列类型: 权重}
+    """
+    dtypes = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition('=')
+        dtypes[kind.strip()] = float(weight) if weight.strip() else 1.0
+    return dtypes
+
+def build_columns(spec):
+    """
+    按参数确定每列的名称和类型
+
+    各类型的列数按权重分配（最大余数法），列按类型轮流排列。
+
+    Args:
+        spec: make_spec 返回的参数
+
+    Returns:
+        list: [(列名, 类型), ...]，第一列为 id
+    """
+    remaining = spec['columns'] - 1 - spec['date_columns']
+    counts = {}
+    if remaining > 0:
+        total = sum(spec['dtypes'].values())
+        quotas = {kind: remaining * weight / total for kind, weight in spec['dtypes'].items()}
+        counts = {kind: int(quota) for kind, quota in quotas.items()}
+        by_remainder = sorted(quotas, key=lambda kind: (counts[kind] - quotas[kind], COLUMN_KINDS.index(kind)))
+        for kind in by_remainder[:remaining - sum(counts.values())]:
+            counts[kind] += 1
+    counts['date'] = spec['date_columns']
+
+    columns = [('id', 'id')]
+    numbers = {kind: 0 for kind in counts}
+    while len(columns) < spec['columns']:
+        for kind in list(COLUMN_KINDS) + ['date']:
+            if numbers.get(kind, 0) < counts.get(kind, 0):
+                columns.append((f'{kind}_{numbers[kind]}', kind))
+                numbers[kind] += 1
+    return columns
+
+def generate_block(spec, columns, block_index):
+    """
+    生成一个数据块
+
+    Args:
+        spec: make_spec 返回的参数
+        columns: build_columns 返回的列
+        block_index: 块序号
+
+    Returns:
+        pandas.DataFrame: 该块的数据
+    """
+    start = block_index * GENERATOR_BLOCK_ROWS
+    rows = min(GENERATOR_BLOCK_ROWS, spec['rows'] - start)
+    rng = np.random.default_rng([spec['seed'], block_index])
+    cardinality = spec['cardinality']
+    data = {}
+    for name, kind in columns:
+        if kind == 'id':
+            data[name] = np.arange(start, start + rows)
+            continue
+        if kind == 'float':
+            values = rng.normal(100, 20, rows).round(4)
+        elif kind == 'int':
+            values = rng.integers(0, cardinality, rows)
+        elif kind == 'category':
+            values = np.char.add('c', rng.integers(0, cardinality, rows).astype(str)).astype(object)
+        elif kind == 'text':
+            words = _TEXT_WORDS[rng.integers(0, len(_TEXT_WORDS), rows)]
+            values = words + ' #' + rng.integers(0, 1000000, rows).astype(str).astype(object)
+        elif kind == 'bool':
+            values = rng.random(rows) < 0.5
+        else:
+            values = (DATE_START + rng.integers(0, DATE_SPAN_DAYS, rows)).astype(str).astype(object)
+
+        if spec['null_ratio'] > 0:
+            missing = rng.random(rows) < spec['null_ratio']
+            if missing.any():
+                values = values.astype(float if kind in ('float', 'int') else object)
+                values[missing] = np.nan if kind in ('float', 'int') else None
+        data[name] = values
+    return pd.DataFrame(data)
+
+def iter_blocks(spec):
+    """
+    依次生成全部数据块
+
+    Args:
+        spec: make_spec 返回的参数
+
+    Yields:
+        pandas.DataFrame: 数据块
+    """
+    columns = build_columns(spec)
+    for block_index in range((spec['rows'] + GENERATOR_BLOCK_ROWS - 1) // GENERATOR_BLOCK_ROWS):
+        yield generate_block(spec, columns, block_index)
+
+def spec_digest(spec):
+    """
+    数据集参数的摘要，用于命名生成的文件
+
+    Args:
+        spec: make_spec 返回的参数
+
+    Returns:
+        str: 12位十六进制摘要
+    """
+    payload = dict(spec, block_rows=GENERATOR_BLOCK_ROWS)
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def write_dataset(spec, path):
+    """
+    生成数据集并写入文件，格式由扩展名决定
+
+    Args:
+        spec: make_spec 返回的参数
+        path: 输出文件路径（.csv、.xlsx 或 .json）
+
+    Raises:
+        ValueError: 格式不支持或行数超过XLSX的限制
+    """
+    file_format = os.path.splitext(path)[1][1:].lower()
+    if file_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {file_format}")
+    if file_format == 'xlsx' and spec['rows'] > EXCEL_MAX_ROWS:
+        raise ValueError(f"XLSX 最多支持 {EXCEL_MAX_ROWS} 行")
+
+    # 先写入临时文件，中断时不会留下不完整的数据集
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{os.getpid()}.{name}")
+    try:
+        if file_format == 'csv':
+            for index, block in enumerate(iter_blocks(spec)):
+                block.to_csv(tmp_path, index=False, header=index == 0, mode='w' if index == 0 else 'a')
+        elif file_format == 'json':
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write('[')
+                for index, block in enumerate(iter_blocks(spec)):
+                    text = block.to_json(orient='records', force_ascii=False)[1:-1]
+                    f.write(text if index == 0 else ',\n' + text)
+                f.write(']')
+        else:
+            with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+                pd.concat(iter_blocks(spec), ignore_index=True).to_excel(writer, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def ensure_dataset(spec, file_format, data_dir):
+    """
+    获取参数对应的数据集文件，不存在时生成
+
+    Args:
+        spec: make_spec 返回的参数
+        file_format: csv、xlsx 或 json
+        data_dir: 存放生成文件的目录
+
+    Returns:
+        str: 数据集文件路径
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(
+        data_dir, f"synthetic_{spec['rows']}x{spec['columns']}_{spec_digest(spec)}.{file_format}"
+    )
+    if not os.path.exists(path):
+        write_dataset(spec, path)
+    return path
+
+def add_spec_arguments(parser):
+    """为命令行添加数据集参数"""
+    parser.add_argument('--rows', type=int, default=100000, help='行数')
+    parser.add_argument('--columns', type=int, default=20, help='列数（包含 id 列和日期列）')
+    parser.add_argument('--dtypes', type=parse_dtypes, default=None,
+                        help='列类型比例，例如 float=3,int=2,category=2,text=1,bool=1')
+    parser.add_argument('--null-ratio', type=float, default=0.05, help='每列的缺失值比例')
+    parser.add_argument('--cardinality', type=int, default=100, help='分类列和整数列的不同值数量')
+    parser.add_argument('--date-columns', type=int, default=1, help='日期列数量')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+
+def spec_from_args(args):
+    """由命令行参数构建数据集参数"""
+    return make_spec(
+        args.rows, args.columns, dtypes=args.dtypes, null_ratio=args.null_ratio,
+        cardinality=args.cardinality, date_columns=args.date_columns, seed=args.seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_spec_arguments(parser)
+    parser.add_argument('--output', required=True, help='输出文件路径（.csv、.xlsx 或 .json）')
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    write_dataset(spec, args.output)
+    print(f"{args.output}: {spec['rows']} rows x {spec['columns']} columns "
+          f"({os.path.getsize(args.output) / 1024 / 1024:.1f} MB)")
+
+if __name__ == '__main__':
+    main()
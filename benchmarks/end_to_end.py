@@ -0,0 +1,359 @@
+"""
+端到端性能基准
+
+用 dataset_generator 生成确定性的数据集，依次对CSV、XLSX和JSON文件计时：
+get_file_info（上传时的解析，冷缓存）、process_dataset_file（预览）、
+run_assessment（不带规则和带规则，不使用结果缓存）和 generate_dataset_summary。
+每次运行的结果追加到JSON历史文件中，compare 命令把某次运行与基线比较并标出变慢的操作。
+
+用法:
+    python benchmarks/end_to_end.py run --preset small,medium --formats csv,xlsx,json --repeat 3
+    python benchmarks/end_to_end.py run --rows 1000000 --columns 50 --formats csv --label "chunked reader"
+    python benchmarks/end_to_end.py list
+    python benchmarks/end_to_end.py compare --baseline 20261001-120000 --threshold 0.1
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dataset_generator import EXCEL_MAX_ROWS, add_spec_arguments, build_columns, ensure_dataset, make_spec, spec_from_args
+
+# 预设的数据集规模：名称 -> (行数, 列数)
+PRESETS = {
+    'small': (1000, 5),
+    'medium': (100000, 20),
+    'wide': (10000, 1000),
+    'xwide': (1000, 5000),
+    'large': (1000000, 20),
+    'tall': (10000000, 10),
+    'huge': (100000000, 10)
+}
+
+# 历史文件的默认位置
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'history.json')
+
+# 默认把耗时增加超过10%且超过0.05秒的操作标记为变慢
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_MIN_SECONDS = 0.05
+
+def create_benchmark_app(work_dir):
+    """创建使用内存数据库和临时目录、不启动后台工作进程的应用"""
+    from app import create_app
+    from config import Config
+
+    settings = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    settings.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'UPLOAD_FOLDER': os.path.join(work_dir, 'uploads'),
+        'CACHE_FOLDER': os.path.join(work_dir, 'cache'),
+        'ASSESSMENT_WORKERS': 0
+    })
+    return create_app(settings)
+
+def build_rules(spec, user_id):
+    """按生成的列构建一组覆盖各类条件的规则"""
+    from models.assessment import DataQualityRule
+
+    columns = build_columns(spec)
+    first = {}
+    for name, kind in columns:
+        first.setdefault(kind, name)
+
+    definitions = [('id 唯一', 'uniqueness', {'column': 'id', 'condition': 'unique', 'value': ''})]
+    if 'float' in first:
+        definitions.append(('数值范围', 'accuracy', {'column': first['float'], 'condition': 'range', 'value': '0,200'}))
+        definitions.append(('数值非空', 'completeness', {'column': first['float'], 'condition': 'not_null', 'value': ''}))
+    if 'int' in first:
+        definitions.append(('整数上限', 'accuracy', {'column': first['int'], 'condition': 'less_than', 'value': '90'}))
+    if 'category' in first:
+        definitions.append(('分类取值', 'consistency', {
+            'column': first['category'], 'condition': 'in_list', 'value': ','.join(f'c{k}' for k in range(10))
+        }))
+    if 'text' in first:
+        definitions.append(('文本格式', 'consistency', {'column': first['text'], 'condition': 'pattern', 'value': r'.+ #\d+'}))
+    if 'date' in first:
+        definitions.append(('日期格式', 'consistency', {
+            'column': first['date'], 'condition': 'pattern', 'value': r'\d{4}-\d{2}-\d{2}'
+        }))
+    return [DataQualityRule(name, None, rule_type, definition, user_id) for name, rule_type, definition in definitions]
+
+def time_operation(operation, repeat, before=None):
+    """
+    重复执行一个操作并汇总耗时
+
+    Args:
+        operation: 无参数的函数，返回值为字典时检查其中的 error
+        repeat: 重复次数
+        before: 每次执行前调用的函数（可选，不计时）
+
+    Returns:
+        tuple: (计时结果字典, 最后一次的返回值)
+    """
+    from utils.stage_profiler import StageProfiler
+
+    profiler = StageProfiler()
+    value = error = None
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        with profiler.stage('operation'):
+            try:
+                value = operation()
+            except Exception as e:
+                value, error = None, str(e)
+        if isinstance(value, dict) and value.get('error'):
+            error = value['error']
+
+    stages = profiler.stages
+    memory = [stage['memory_peak_bytes'] for stage in stages if stage['memory_peak_bytes'] is not None]
+    return {
+        'wall_time': round(statistics.median(stage['wall_time'] for stage in stages), 6),
+        'wall_time_min': round(min(stage['wall_time'] for stage in stages), 6),
+        'cpu_time': round(statistics.median(stage['cpu_time'] for stage in stages), 6),
+        'memory_peak_bytes': max(memory) if memory else None,
+        'error': error
+    }, value
+
+def run_scenario(scenario, spec, file_format, data_dir, repeat, mode='auto'):
+    """
+    对一个数据集文件依次执行并计时各操作
+
+    mode 为 auto 时评估与上传后的实际情况相同（使用上传时保存的数据集档案），
+    指定其他执行模式时不使用档案，评估读取完整数据。
+
+    Returns:
+        list: 每个操作一条计时结果
+    """
+    from extensions import db
+    from models.user import User
+    from models.dataset import Dataset
+    from utils.data_processor import get_file_info, process_dataset_file
+    from utils.assessment_engine import run_assessment
+    from utils.visualization_helper import generate_dataset_summary
+
+    file_path = ensure_dataset(spec, file_format, data_dir)
+    work_dir = tempfile.mkdtemp(prefix='benchmark-')
+    app = create_benchmark_app(work_dir)
+    records = []
+
+    def record(operation, timing, **extra):
+        records.append(dict(
+            timing, scenario=scenario, format=file_format, operation=operation,
+            rows=spec['rows'], columns=spec['columns'], size_bytes=os.path.getsize(file_path), **extra
+        ))
+        status = f"error: {timing['error']}" if timing['error'] else f"{timing['wall_time']:9.3f}s"
+        print(f"  {scenario:<8} {file_format:<5} {operation:<26} {status}")
+
+    def clear_cache():
+        # 上传时各缓存都不存在，每次都从空缓存开始
+        shutil.rmtree(app.config['CACHE_FOLDER'], ignore_errors=True)
+
+    try:
+        with app.app_context():
+            db.create_all()
+            user = User('benchmark', 'benchmark@example.com', 'benchmark')
+            db.session.add(user)
+            db.session.commit()
+
+            timing, file_info = time_operation(lambda: get_file_info(file_path), repeat, before=clear_cache)
+            record('get_file_info', timing)
+            if not file_info or timing['error']:
+                return records
+
+            dataset = Dataset(
+                name=scenario, description=None, file_path=file_path, file_type=file_info['file_type'],
+                size_bytes=file_info['size_bytes'], user_id=user.id, row_count=file_info.get('row_count'),
+                column_count=file_info.get('column_count'), schema=file_info.get('schema'), status='processed'
+            )
+            rules = build_rules(spec, user.id)
+            db.session.add(dataset)
+            db.session.add_all(rules)
+            db.session.commit()
+
+            timing, _ = time_operation(lambda: process_dataset_file(file_path, preview=True), repeat)
+            record('process_dataset_file', timing)
+
+            use_profile = mode == 'auto'
+            timing, result = time_operation(
+                lambda: run_assessment(dataset, mode=mode, use_profile=use_profile, use_cache=False), repeat
+            )
+            record('run_assessment', timing, mode=(result or {}).get('execution', {}).get('mode'))
+
+            timing, result = time_operation(
+                lambda: run_assessment(dataset, rules, mode=mode, use_profile=use_profile, use_cache=False), repeat
+            )
+            record('run_assessment_rules', timing, mode=(result or {}).get('execution', {}).get('mode'))
+
+            timing, _ = time_operation(lambda: generate_dataset_summary(dataset), repeat)
+            record('generate_dataset_summary', timing)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return records
+
+def get_git_commit():
+    """当前代码的git提交，无法获取时返回None"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    """读取历史文件，不存在时返回空历史"""
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_history(path, history):
+    """写入历史文件"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def find_run(history, run_id):
+    """按编号查找运行；编号为空时返回最后一次运行"""
+    runs = history['runs']
+    if not runs:
+        raise SystemExit("历史文件中没有运行记录")
+    if run_id is None:
+        return runs[-1]
+    for run in runs:
+        if run['id'] == run_id:
+            return run
+    raise SystemExit(f"找不到运行记录: {run_id}")
+
+def command_run(args):
+    scenarios = []
+    if args.preset:
+        for name in args.preset.split(','):
+            if name not in PRESETS:
+                raise SystemExit(f"未知的预设: {name}（可选: {', '.join(PRESETS)}）")
+            rows, columns = PRESETS[name]
+            scenarios.append((name, make_spec(
+                rows, columns, dtypes=args.dtypes, null_ratio=args.null_ratio,
+                cardinality=args.cardinality, date_columns=args.date_columns, seed=args.seed
+            )))
+    else:
+        spec = spec_from_args(args)
+        scenarios.append((f"{spec['rows']}x{spec['columns']}", spec))
+
+    data_dir = args.data_dir or os.path.join(tempfile.gettempdir(), 'dataset-benchmarks')
+    results = []
+    for scenario, spec in scenarios:
+        for file_format in args.formats.split(','):
+            if file_format == 'xlsx' and spec['rows'] > EXCEL_MAX_ROWS:
+                print(f"  {scenario:<8} {file_format:<5} 跳过：超过XLSX的行数限制")
+                continue
+            results.extend(run_scenario(scenario, spec, file_format, data_dir, args.repeat, args.mode))
+
+    run = {
+        'id': datetime.utcnow().strftime('%Y%m%d-%H%M%S'),
+        'label': args.label,
+        'created_at': datetime.utcnow().isoformat(),
+        'git_commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'mode': args.mode,
+        'specs': {scenario: spec for scenario, spec in scenarios},
+        'results': results
+    }
+    history = load_history(args.history)
+    history['runs'].append(run)
+    save_history(args.history, history)
+    print(f"saved run {run['id']} to {args.history}")
+
+def command_list(args):
+    history = load_history(args.history)
+    for run in history['runs']:
+        marker = '*' if run['id'] == history.get('baseline') else ' '
+        print(f"{marker} {run['id']}  {run.get('git_commit') or '-':<9} {len(run['results']):4d} results  {run.get('label') or ''}")
+
+def command_baseline(args):
+    history = load_history(args.history)
+    history['baseline'] = find_run(history, args.run_id)['id']
+    save_history(args.history, history)
+    print(f"baseline: {history['baseline']}")
+
+def command_compare(args):
+    history = load_history(args.history)
+    baseline = find_run(history, args.baseline or history.get('baseline') or history['runs'][0]['id'])
+    candidate = find_run(history, args.candidate)
+    if baseline is candidate:
+        raise SystemExit("基线与比较的运行相同")
+
+    def key(result):
+        return (result['scenario'], result['format'], result['operation'])
+
+    expected = {key(result): result for result in baseline['results']}
+    regressions = 0
+    print(f"baseline {baseline['id']} ({baseline.get('git_commit') or '-'}) -> "
+          f"candidate {candidate['id']} ({candidate.get('git_commit') or '-'})")
+    for result in candidate['results']:
+        before = expected.get(key(result))
+        if before is None or before['error'] or result['error']:
+            continue
+        change = result['wall_time'] / before['wall_time'] - 1 if before['wall_time'] > 0 else 0.0
+        flag = ''
+        if change > args.threshold and result['wall_time'] - before['wall_time'] > args.min_seconds:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif change < -args.threshold and before['wall_time'] - result['wall_time'] > args.min_seconds:
+            flag = 'faster'
+        print(f"  {result['scenario']:<8} {result['format']:<5} {result['operation']:<26} "
+              f"{before['wall_time']:9.3f}s -> {result['wall_time']:9.3f}s {change:+7.1%} {flag}")
+    print(f"{regressions} regression(s)")
+    if regressions:
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='历史文件路径')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='运行基准并追加到历史文件')
+    add_spec_arguments(run_parser)
+    run_parser.add_argument('--preset', help=f"逗号分隔的预设规模（{', '.join(PRESETS)}），指定时忽略 --rows 和 --columns")
+    run_parser.add_argument('--formats', default='csv,xlsx,json', help='逗号分隔的文件格式')
+    run_parser.add_argument('--repeat', type=int, default=3, help='每个操作的重复次数，取中位数')
+    run_parser.add_argument('--mode', default='auto',
+                            help='run_assessment 的执行模式（memory、streaming、columns、rows 等），默认 auto 使用数据集档案')
+    run_parser.add_argument('--data-dir', help='存放生成数据集的目录，相同参数的文件会被复用')
+    run_parser.add_argument('--label', help='本次运行的说明')
+    run_parser.set_defaults(handler=command_run)
+
+    list_parser = commands.add_parser('list', help='列出历史运行')
+    list_parser.set_defaults(handler=command_list)
+
+    baseline_parser = commands.add_parser('baseline', help='把一次运行设为基线')
+    baseline_parser.add_argument('run_id', nargs='?', help='运行编号（默认最后一次）')
+    baseline_parser.set_defaults(handler=command_baseline)
+
+    compare_parser = commands.add_parser('compare', help='与基线比较，有变慢的操作时退出码为1')
+    compare_parser.add_argument('--baseline', help='基线运行编号（默认使用设定的基线，否则为第一次运行）')
+    compare_parser.add_argument('--candidate', help='比较的运行编号（默认最后一次）')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='耗时增加超过此比例时标记为变慢')
+    compare_parser.add_argument('--min-seconds', type=float, default=DEFAULT_MIN_SECONDS, help='忽略绝对差值小于此秒数的变化')
+    compare_parser.set_defaults(handler=command_compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
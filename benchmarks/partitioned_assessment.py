@@ -0,0 +1,81 @@
+"""
+按行分区多进程评估的加速比基准
+
+生成一个确定性的CSV文件，分别以流式评估和 1..N 个工作进程的按行分区评估运行，
+输出各自的耗时、相对1个工作进程的加速比，并检查各项结果与流式评估一致。
+
+用法:
+    python benchmarks/partitioned_assessment.py --rows 2000000 --max-workers 8
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.streaming_assessment import run_streaming_stages
+from utils.partitioned_assessment import run_row_parallel_stages
+
+def generate_csv(path, rows, seed=0):
+    """生成包含数值、分类、日期和缺失值的CSV文件"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(rows),
+        'amount': rng.normal(100, 20, rows),
+        'quantity': rng.integers(0, 50, rows).astype(float),
+        'city': rng.choice(['北京', '上海', '广州', '深圳', None], rows),
+        'order_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24, rows), unit='h'),
+        'note': rng.choice(['ok', 'late', 'refund, partial', ''], rows)
+    })
+    df.loc[rng.random(rows) < 0.05, 'quantity'] = np.nan
+    df.to_csv(path, index=False)
+
+def summarize(stages):
+    """用于比较结果是否一致的各阶段得分"""
+    quality = stages['quality']
+    return (
+        quality['completeness']['column_scores'],
+        quality['uniqueness']['column_scores'],
+        quality['consistency']['column_scores'],
+        stages['accuracy'],
+        stages['timeliness'],
+        stages['value_dimensions']
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--file', help='使用已有的CSV文件，不生成数据')
+    args = parser.parse_args()
+
+    path = args.file
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'benchmark.csv')
+        generate_csv(path, args.rows)
+    print(f"file: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+    started = time.perf_counter()
+    expected = summarize(run_streaming_stages(path, 'csv', chunk_size=args.chunk_size))
+    print(f"streaming        {time.perf_counter() - started:8.2f}s")
+
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        # 先运行一次，排除进程启动和模块导入的时间
+        run_row_parallel_stages(path, 'csv', workers=workers, chunk_size=args.chunk_size)
+        started = time.perf_counter()
+        stages = run_row_parallel_stages(path, 'csv', workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"rows workers={workers:<3d} {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x  "
+              f"partitions {stages['partition_count']:<3d} same result: {summarize(stages) == expected}")
+        workers *= 2
+
+if __name__ == '__main__':
+    main()
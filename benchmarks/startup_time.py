@@ -0,0 +1,141 @@
+"""
+应用启动时间报告
+
+在新的Python进程中（python -X importtime）导入 app 并调用 create_app，输出：
+导入和 create_app 的耗时、按顶层包汇总的导入耗时，以及启动时是否载入了不应载入的重型库。
+启动时载入了 --forbid 中的库时退出码为1，可用于防止重型库的导入重新回到启动路径上。
+
+用法:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --repeat 5 --top 20 --skip-create-all
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 默认不允许在启动时载入的库
+DEFAULT_FORBIDDEN = ('pandas', 'numpy', 'matplotlib', 'seaborn', 'pyarrow', 'openpyxl')
+
+# 在子进程中执行的启动代码，结果以JSON输出到标准输出
+_STARTUP_SCRIPT = '''
+import sys, json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(json.loads(sys.argv[1]))
+created = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - started,
+    'create_app_seconds': created - imported,
+    'modules': sorted(sys.modules)
+}))
+'''
+
+def measure_startup(create_all=True):
+    """
+    在新进程中测量一次启动
+
+    Args:
+        create_all: 是否在启动时创建数据库表
+
+    Returns:
+        dict: 包含 import_seconds、create_app_seconds、modules 和 import_times 的字典；
+              import_times 为 [(模块名, 自身耗时微秒, 累计耗时微秒, 嵌套深度), ...]
+    """
+    work_dir = tempfile.mkdtemp(prefix='startup_')
+    config = {
+        'SECRET_KEY': 'startup-benchmark',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(work_dir, 'app.db'),
+        'UPLOAD_FOLDER': os.path.join(work_dir, 'uploads'),
+        'CACHE_FOLDER': os.path.join(work_dir, 'cache'),
+        'ASSESSMENT_QUEUE_DATABASE': os.path.join(work_dir, 'jobs.sqlite'),
+        'DATABASE_CREATE_ALL': create_all
+    }
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _STARTUP_SCRIPT, json.dumps(config)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['import_times'] = parse_import_times(completed.stderr)
+    return result
+
+def parse_import_times(text):
+    """
+    解析 -X importtime 的输出
+
+    Args:
+        text: 标准错误输出
+
+    Returns:
+        list: [(模块名, 自身耗时微秒, 累计耗时微秒, 嵌套深度), ...]
+    """
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return entries
+
+def summarize_packages(import_times):
+    """
+    按顶层包汇总导入耗时（各模块自身耗时之和）
+
+    Returns:
+        list: [(包名, 秒数), ...]，按耗时降序
+    """
+    totals = {}
+    for name, self_us, _, _ in import_times:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(((package, us / 1e6) for package, us in totals.items()), key=lambda item: item[1], reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='测量次数，耗时取中位数')
+    parser.add_argument('--top', type=int, default=15, help='列出耗时最多的顶层包数量')
+    parser.add_argument('--skip-create-all', action='store_true', help='启动时不创建数据库表（DATABASE_CREATE_ALL=False）')
+    parser.add_argument('--forbid', default=','.join(DEFAULT_FORBIDDEN), help='启动时不允许载入的库，逗号分隔')
+    parser.add_argument('--json', action='store_true', help='以JSON输出')
+    args = parser.parse_args()
+
+    runs = [measure_startup(create_all=not args.skip_create_all) for _ in range(max(args.repeat, 1))]
+    last = runs[-1]
+    forbidden = [name for name in args.forbid.split(',') if name and name in last['modules']]
+    report = {
+        'python': sys.version.split()[0],
+        'import_seconds': statistics.median(run['import_seconds'] for run in runs),
+        'create_app_seconds': statistics.median(run['create_app_seconds'] for run in runs),
+        'module_count': len(last['modules']),
+        'packages': summarize_packages(last['import_times'])[:args.top],
+        'forbidden_loaded': forbidden
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        total = report['import_seconds'] + report['create_app_seconds']
+        print(f"import app   {report['import_seconds']:8.3f}s")
+        print(f"create_app   {report['create_app_seconds']:8.3f}s")
+        print(f"total        {total:8.3f}s  ({report['module_count']} modules, median of {len(runs)})")
+        print()
+        print('import time by top-level package (self time):')
+        for package, seconds in report['packages']:
+            print(f"  {package:<24s} {seconds:8.3f}s")
+        if forbidden:
+            print()
+            print(f"heavy modules loaded at startup: {', '.join(forbidden)}")
+    sys.exit(1 if forbidden else 0)
+
+if __name__ == '__main__':
+    main()
@@ -8,9 +8,47 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-please-change-in-production')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///data_value_assessment.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DATABASE_CREATE_ALL = os.environ.get('DATABASE_CREATE_ALL', 'true').lower() == 'true'  # 启动时创建缺少的数据库表；结构已存在时可关闭以加快启动
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB 最大上传限制
 
+    # 数据集缓存配置
+    CACHE_FOLDER = os.environ.get('CACHE_FOLDER', os.path.join(os.getcwd(), 'cache'))
+    DATASET_CACHE_ENABLED = os.environ.get('DATASET_CACHE_ENABLED', 'true').lower() == 'true'
+
+    # 评估引擎配置
+    ASSESSMENT_CHUNK_SIZE = int(os.environ.get('ASSESSMENT_CHUNK_SIZE', 100000))  # 流式评估每块行数
+    ASSESSMENT_STREAMING_THRESHOLD = int(os.environ.get('ASSESSMENT_STREAMING_THRESHOLD', 256 * 1024 * 1024))  # 超过此大小的文件使用流式评估
+    ASSESSMENT_PARALLEL_WORKERS = int(os.environ.get('ASSESSMENT_PARALLEL_WORKERS', 0))  # 按列或按行并行评估的进程数，0表示使用CPU核数
+    ASSESSMENT_PARALLEL_MIN_COLUMNS = int(os.environ.get('ASSESSMENT_PARALLEL_MIN_COLUMNS', 200))  # 列数达到此值的数据集按列并行评估
+    ASSESSMENT_SAMPLE_SIZE = int(os.environ.get('ASSESSMENT_SAMPLE_SIZE', 100000))  # 抽样评估的默认样本行数
+    ASSESSMENT_SAMPLE_SEED = int(os.environ['ASSESSMENT_SAMPLE_SEED']) if os.environ.get('ASSESSMENT_SAMPLE_SEED') else None  # 抽样的随机种子，未设置时每次随机
+    ASSESSMENT_OUTLIER_DETECTOR = os.environ.get('ASSESSMENT_OUTLIER_DETECTOR', 'zscore')  # 异常值检测器：zscore、mad 或 iqr（流式评估固定使用zscore）
+    ASSESSMENT_APPROXIMATE_STATS = os.environ.get('ASSESSMENT_APPROXIMATE_STATS', 'false').lower() == 'true'  # 唯一值数量、中位数和高频值使用草图估计，内存占用不随基数增长
+    ASSESSMENT_MEMORY_BUDGET = int(os.environ.get('ASSESSMENT_MEMORY_BUDGET', 2 * 1024 * 1024 * 1024))  # 单个任务整体载入数据的内存预算（字节），0表示不限制
+    ASSESSMENT_MEMORY_FALLBACK = os.environ.get('ASSESSMENT_MEMORY_FALLBACK', 'streaming')  # 估计超出预算时的执行方式：streaming 或 sample
+    ASSESSMENT_PROFILE_ENABLED = os.environ.get('ASSESSMENT_PROFILE_ENABLED', 'true').lower() == 'true'  # 记录评估各阶段的耗时和内存，结果保存在详细结果的profile中
+    ASSESSMENT_PROFILE_MEMORY = os.environ.get('ASSESSMENT_PROFILE_MEMORY', 'rss')  # 内存统计来源：rss（开销可忽略）或 tracemalloc（更准确但较慢）
+
+    # 评估结果缓存配置
+    RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 超过此大小时淘汰最久未使用的结果
+
+    # 数据集摘要图表数据缓存配置
+    SUMMARY_CACHE_ENABLED = os.environ.get('SUMMARY_CACHE_ENABLED', 'true').lower() == 'true'
+    SUMMARY_CACHE_MAX_BYTES = int(os.environ.get('SUMMARY_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 超过此大小时淘汰最久未使用的图表数据
+    SUMMARY_PRECOMPUTE = os.environ.get('SUMMARY_PRECOMPUTE', 'true').lower() == 'true'  # 上传和追加数据后在后台预先生成图表数据
+    CHART_POINT_BUDGET = int(os.environ.get('CHART_POINT_BUDGET', 2000))  # 单个图表最多输出的数据点数，超出时降采样
+    CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 服务端渲染的PNG图表缓存上限，超过时淘汰最久未使用的图片
+    CHART_IMAGE_MAX_AGE = int(os.environ.get('CHART_IMAGE_MAX_AGE', 31536000))  # 带数据版本标识的PNG图表在客户端缓存的有效期（秒）
+
+    # 后台评估任务队列配置
+    ASSESSMENT_WORKERS = int(os.environ.get('ASSESSMENT_WORKERS', 2))  # 工作进程数量，0表示在请求中同步执行
+    ASSESSMENT_QUEUE_DATABASE = os.environ.get('ASSESSMENT_QUEUE_DATABASE')  # 任务队列SQLite文件，默认位于实例文件夹
+    ASSESSMENT_TIMEOUT = int(os.environ.get('ASSESSMENT_TIMEOUT', 3600))  # 单个评估的墙钟时间上限（秒），超时后终止工作进程，0表示不限制
+    ASSESSMENT_CPU_LIMIT = int(os.environ.get('ASSESSMENT_CPU_LIMIT', 3600))  # 单个评估工作进程的CPU时间上限（秒），0表示不限制
+    ASSESSMENT_ADDRESS_SPACE_LIMIT = int(os.environ.get('ASSESSMENT_ADDRESS_SPACE_LIMIT', 8 * 1024 * 1024 * 1024))  # 单个评估工作进程的地址空间上限（字节），0表示不限制
+
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
@@ -24,4 +62,5 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    ASSESSMENT_WORKERS = 0  # 内存数据库无法被工作进程访问
\ No newline at end of file
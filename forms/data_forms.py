@@ -27,4 +27,13 @@ class DatasetEditForm(FlaskForm):
     description = TextAreaField('数据集描述', validators=[
         Length(max=500, message='描述长度不能超过500个字符')
     ])
-    submit = SubmitField('保存修改')
\ No newline at end of file
+    submit = SubmitField('保存修改')
+
+
+class DatasetAppendForm(FlaskForm):
+    """数据集追加数据表单"""
+    file = FileField('追加的数据文件', validators=[
+        FileRequired(message='请选择要追加的文件'),
+        FileAllowed(['csv', 'json'], '只支持CSV和JSON格式')
+    ])
+    submit = SubmitField('追加数据')
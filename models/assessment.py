@@ -11,7 +11,7 @@ class Assessment(db.Model):
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
-    status = db.Column(db.String(20), default='pending')  # pending, processing, completed, failed
+    status = db.Column(db.String(20), default='pending')  # pending, processing, completed, failed, cancelled
     
     # 评估结果
     quality_score = db.Column(db.Float, nullable=True)  # 数据质量得分
@@ -53,6 +53,21 @@ class Assessment(db.Model):
         self.status = 'completed'
         self.completed_at = datetime.utcnow()
     
+    def mark_processing(self):
+        """标记为处理中"""
+        self.status = 'processing'
+    
+    def mark_failed(self, error):
+        """标记为失败并记录错误信息"""
+        self.detailed_results = json.dumps({'error': error})
+        self.status = 'failed'
+        self.completed_at = datetime.utcnow()
+    
+    def mark_cancelled(self):
+        """标记为已取消"""
+        self.status = 'cancelled'
+        self.completed_at = datetime.utcnow()
+    
     def get_detailed_results(self):
         """获取详细评估结果"""
         if self.detailed_results:
@@ -6,11 +6,21 @@ from models.dataset import Dataset
 from models.assessment import Assessment, DataQualityRule
 import pytz
 from forms.assessment_forms import AssessmentForm, DataQualityRuleForm
-from utils.assessment_engine import run_assessment
+from utils.job_queue import get_assessment_queue
+from utils.chart_renderer import remove_assessment_charts
 
 # 创建蓝图
 assessment_bp = Blueprint('assessment', __name__)
 
+# 评估状态显示映射
+STATUS_DISPLAY_MAP = {
+    'pending': '等待中',
+    'processing': '处理中',
+    'completed': '已完成',
+    'failed': '失败',
+    'cancelled': '已取消'
+}
+
 @assessment_bp.route('/assessments')
 @login_required
 def list_assessments():
@@ -31,6 +41,7 @@ def list_assessments():
             'created_at': (assessment.created_at + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M'),
             'completed_at': (assessment.completed_at + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M') if assessment.completed_at else None,
             'status': assessment.status,
+            'status_display': STATUS_DISPLAY_MAP.get(assessment.status, assessment.status),
             'quality_score': assessment.quality_score,
             'overall_score': assessment.overall_value_score,  # 添加overall_score别名
             'overall_value_score': assessment.overall_value_score,
@@ -71,24 +82,22 @@ def new_assessment(dataset_id):
         db.session.add(assessment)
         db.session.commit()
         
-        # 启动评估任务
+        # 提交评估任务，由后台工作进程执行
         selected_rule_ids = [int(rule_id) for rule_id in form.rules.data]
-        selected_rules = DataQualityRule.query.filter(DataQualityRule.id.in_(selected_rule_ids)).all()
-        
-        # 更新评估状态
-        assessment.status = 'processing'
-        db.session.commit()
-        
-        # 运行评估
         try:
-            results = run_assessment(dataset, selected_rules)
-            assessment.set_results(results)
-            db.session.commit()
-            flash('评估已完成！', 'success')
+            get_assessment_queue().submit(assessment.id, selected_rule_ids)
         except Exception as e:
-            assessment.status = 'failed'
+            assessment.mark_failed(str(e))
             db.session.commit()
-            flash(f'评估失败: {str(e)}', 'danger')
+        
+        db.session.refresh(assessment)
+        if assessment.status == 'completed':
+            flash('评估已完成！', 'success')
+        elif assessment.status == 'failed':
+            error = (assessment.get_detailed_results() or {}).get('error')
+            flash(f'评估失败: {error}', 'danger')
+        else:
+            flash('评估已提交，正在后台处理，完成后页面将自动更新', 'info')
         
         return redirect(url_for('assessment.view_assessment', assessment_id=assessment.id))
     
@@ -117,14 +126,6 @@ def view_assessment(assessment_id):
     detailed_results = assessment.get_detailed_results()
     
     # 转换时间为中国时区
-    # 创建状态显示映射
-    status_display_map = {
-        'pending': '等待中',
-        'processing': '处理中',
-        'completed': '已完成',
-        'failed': '失败'
-    }
-    
     # 计算评估耗时
     duration = None
     if assessment.completed_at and assessment.created_at:
@@ -137,7 +138,7 @@ def view_assessment(assessment_id):
         'created_at': (assessment.created_at + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M'),
         'completed_at': (assessment.completed_at + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M') if assessment.completed_at else None,
         'status': assessment.status,
-        'status_display': status_display_map.get(assessment.status, assessment.status),
+        'status_display': STATUS_DISPLAY_MAP.get(assessment.status, assessment.status),
         'quality_score': assessment.quality_score,
         'overall_score': assessment.overall_value_score,  # 使用overall_value_score作为overall_score
         'overall_value_score': assessment.overall_value_score,
@@ -154,6 +155,102 @@ def view_assessment(assessment_id):
         detailed_results=detailed_results
     )
 
+@assessment_bp.route('/assessments/<int:assessment_id>/status')
+@login_required
+def assessment_status(assessment_id):
+    """获取评估状态（供详情页轮询）"""
+    assessment = Assessment.query.get_or_404(assessment_id)
+    
+    # 确保用户有权限查看此评估
+    if assessment.user_id != current_user.id and not current_user.is_admin:
+        return jsonify({'error': '没有权限访问此评估'}), 403
+    
+    status = {
+        'id': assessment.id,
+        'status': assessment.status,
+        'status_display': STATUS_DISPLAY_MAP.get(assessment.status, assessment.status),
+        'finished': assessment.status in ('completed', 'failed', 'cancelled'),
+        'completed_at': assessment.completed_at.isoformat() if assessment.completed_at else None,
+        'overall_value_score': assessment.overall_value_score,
+        'job': None
+    }
+    
+    if assessment.status == 'failed':
+        status['error'] = (assessment.get_detailed_results() or {}).get('error')
+    
+    job = get_assessment_queue().get_job(assessment.id)
+    if job:
+        status['job'] = {
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'position': job.get('position'),
+            'created_at': job['created_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at']
+        }
+    
+    return jsonify(status)
+
+@assessment_bp.route('/assessments/<int:assessment_id>/cancel', methods=['POST'])
+@login_required
+def cancel_assessment(assessment_id):
+    """取消排队中或执行中的评估"""
+    assessment = Assessment.query.get_or_404(assessment_id)
+    
+    # 确保用户有权限取消此评估
+    if assessment.user_id != current_user.id and not current_user.is_admin:
+        flash('您没有权限取消此评估', 'danger')
+        return redirect(url_for('assessment.list_assessments'))
+    
+    if assessment.status not in ('pending', 'processing'):
+        flash('评估已结束，无法取消', 'warning')
+        return redirect(url_for('assessment.view_assessment', assessment_id=assessment.id))
+    
+    job_status = get_assessment_queue().cancel(assessment.id)
+    if job_status == 'cancelling':
+        # 调度线程终止工作进程后再把评估标记为已取消
+        flash('正在取消评估', 'info')
+    else:
+        assessment.mark_cancelled()
+        db.session.commit()
+        flash('评估已取消', 'success')
+    
+    return redirect(url_for('assessment.view_assessment', assessment_id=assessment.id))
+
+@assessment_bp.route('/admin/result-cache')
+@login_required
+def result_cache_stats():
+    """查看评估结果缓存的使用情况（仅管理员）"""
+    from utils.result_cache import get_result_cache_stats
+    if not current_user.is_admin:
+        return jsonify({'error': '只有管理员可以管理评估结果缓存'}), 403
+    
+    return jsonify(get_result_cache_stats())
+
+@assessment_bp.route('/admin/result-cache/invalidate', methods=['POST'])
+@login_required
+def invalidate_result_cache_entries():
+    """删除缓存的评估结果（仅管理员），可通过 dataset_id 只删除某个数据集的结果"""
+    from utils.result_cache import invalidate_result_cache
+    if not current_user.is_admin:
+        return jsonify({'error': '只有管理员可以管理评估结果缓存'}), 403
+    
+    dataset_id = request.values.get('dataset_id', type=int)
+    if dataset_id is None and request.is_json:
+        dataset_id = (request.get_json(silent=True) or {}).get('dataset_id')
+    
+    if dataset_id is not None:
+        dataset = Dataset.query.get_or_404(dataset_id)
+        try:
+            removed = invalidate_result_cache(dataset.file_path)
+        except OSError:
+            # 数据文件已不存在，无法确定其内容哈希
+            removed = 0
+    else:
+        removed = invalidate_result_cache()
+    
+    return jsonify({'removed': removed, 'dataset_id': dataset_id})
+
 @assessment_bp.route('/assessments/<int:assessment_id>/delete', methods=['POST'])
 @login_required
 def delete_assessment(assessment_id):
@@ -165,6 +262,8 @@ def delete_assessment(assessment_id):
         flash('您没有权限删除此评估', 'danger')
         return redirect(url_for('assessment.list_assessments'))
     
+    remove_assessment_charts(assessment.id)
+    
     db.session.delete(assessment)
     db.session.commit()
     
@@ -1,12 +1,12 @@
 import os
+import uuid
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from extensions import db
 from models.dataset import Dataset
 from models.assessment import Assessment
-from forms.data_forms import DatasetUploadForm, DatasetEditForm
-from utils.data_processor import process_dataset_file, get_file_info
+from forms.data_forms import DatasetUploadForm, DatasetEditForm, DatasetAppendForm
 
 # 创建蓝图
 data_bp = Blueprint('data', __name__)
@@ -22,6 +22,8 @@ def list_datasets():
 @login_required
 def upload_dataset():
     """上传新数据集"""
+    from utils.data_processor import get_file_info
+    from utils.summary_cache import schedule_summary
     form = DatasetUploadForm()
     
     if form.validate_on_submit():
@@ -50,13 +52,19 @@ def upload_dataset():
             row_count=file_info.get('row_count'),
             column_count=file_info.get('column_count'),
             schema=file_info.get('schema'),
-            status='processed'  # 文件处理完成，设置为已处理状态
+            # 文件处理完成，设置为已处理状态；超出内存预算等无法处理的文件标记为错误
+            status='error' if file_info.get('error') else 'processed'
         )
         
         db.session.add(dataset)
         db.session.commit()
         
-        flash('数据集上传成功！', 'success')
+        if file_info.get('error'):
+            flash(f"数据集已上传，但无法处理: {file_info['error']}", 'warning')
+        else:
+            # 在后台预先生成可视化页面的图表数据
+            schedule_summary(current_app._get_current_object(), dataset.file_path, dataset.file_type)
+            flash('数据集上传成功！', 'success')
         return redirect(url_for('data.view_dataset', dataset_id=dataset.id))
     
     return render_template('data/upload_dataset.html', title='上传数据集', form=form)
@@ -65,6 +73,7 @@ def upload_dataset():
 @login_required
 def view_dataset(dataset_id):
     """查看数据集详情"""
+    from utils.data_processor import process_dataset_file
     dataset = Dataset.query.get_or_404(dataset_id)
     
     # 确保用户有权限查看此数据集
@@ -72,11 +81,13 @@ def view_dataset(dataset_id):
         flash('您没有权限查看此数据集', 'danger')
         return redirect(url_for('data.list_datasets'))
     
-    # 获取数据集的预览数据
-    preview_result = process_dataset_file(dataset.file_path, preview=True)
+    # 获取数据集的预览数据（只读取所需的行）
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    preview_result = process_dataset_file(dataset.file_path, preview=True, offset=offset)
     
-    # 只传递预览数据，而不是整个结果字典
+    # 只传递预览数据和列类型，而不是整个结果字典
     preview_data = preview_result.get('data', [])
+    column_types = preview_result.get('dtypes', {})
     
     # 获取与该数据集相关的评估
     assessments = Assessment.query.filter_by(dataset_id=dataset.id).order_by(Assessment.created_at.desc()).all()
@@ -98,6 +109,8 @@ def view_dataset(dataset_id):
         title=f'数据集: {dataset.name}',
         dataset=dataset,
         preview_data=preview_data,
+        column_types=column_types,
+        preview_offset=offset,
         assessments=assessments_with_local_time
     )
 
@@ -125,10 +138,53 @@ def edit_dataset(dataset_id):
     
     return render_template('data/edit_dataset.html', title='编辑数据集', form=form, dataset=dataset)
 
+@data_bp.route('/datasets/<int:dataset_id>/append', methods=['GET', 'POST'])
+@login_required
+def append_dataset(dataset_id):
+    """向数据集追加新的数据"""
+    from utils.incremental_assessment import append_to_dataset, dataset_append_lock
+    from utils.summary_cache import schedule_summary
+    dataset = Dataset.query.get_or_404(dataset_id)
+    
+    # 确保用户有权限修改此数据集
+    if dataset.user_id != current_user.id and not current_user.is_admin:
+        flash('您没有权限修改此数据集', 'danger')
+        return redirect(url_for('data.list_datasets'))
+    
+    form = DatasetAppendForm()
+    
+    if form.validate_on_submit():
+        # 追加的片段先保存为临时文件，追加完成后删除
+        file = form.file.data
+        filename = secure_filename(file.filename)
+        slice_path = os.path.join(os.path.dirname(dataset.file_path), f'.append_{dataset.id}_{uuid.uuid4().hex}_{filename}')
+        file.save(slice_path)
+        
+        try:
+            # 提交也在锁内，并发追加时数据集记录的行数不会被较早的追加覆盖
+            with dataset_append_lock(dataset.file_path):
+                result = append_to_dataset(dataset, slice_path)
+                db.session.commit()
+            schedule_summary(current_app._get_current_object(), dataset.file_path, dataset.file_type)
+            flash(f'已追加 {result["appended_rows"]} 行数据', 'success')
+            return redirect(url_for('data.view_dataset', dataset_id=dataset.id))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'追加数据失败: {str(e)}', 'danger')
+        finally:
+            try:
+                os.remove(slice_path)
+            except OSError:
+                pass
+    
+    return render_template('data/append_dataset.html', title='追加数据', form=form, dataset=dataset)
+
 @data_bp.route('/datasets/<int:dataset_id>/delete', methods=['POST'])
 @login_required
 def delete_dataset(dataset_id):
     """删除数据集"""
+    from utils.dataset_loader import remove_dataset_cache
+    from utils.incremental_assessment import remove_incremental_state
     dataset = Dataset.query.get_or_404(dataset_id)
     
     # 确保用户有权限删除此数据集
@@ -136,8 +192,10 @@ def delete_dataset(dataset_id):
         flash('您没有权限删除此数据集', 'danger')
         return redirect(url_for('data.list_datasets'))
     
-    # 删除文件
+    # 删除文件及其缓存
     try:
+        remove_dataset_cache(dataset.file_path)
+        remove_incremental_state(dataset.file_path)
         os.remove(dataset.file_path)
     except OSError:
         # 文件可能已经不存在，忽略错误
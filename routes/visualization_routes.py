@@ -1,9 +1,17 @@
+import os
 import json
-from flask import Blueprint, render_template, jsonify, request
+import hashlib
+from datetime import datetime, timezone
+from flask import Blueprint, render_template, jsonify, request, current_app, url_for, abort
 from flask_login import login_required, current_user
+from werkzeug.http import is_resource_modified
 from models.dataset import Dataset
 from models.assessment import Assessment
-from utils.visualization_helper import generate_dataset_summary, generate_assessment_charts
+from routes.assessment_routes import STATUS_DISPLAY_MAP
+from utils.chart_renderer import (
+    make_chart_spec, get_chart_cache_key, get_dataset_chart_version, get_dataset_chart_png,
+    get_assessment_chart_version, get_assessment_chart_png
+)
 
 # 创建蓝图
 visualization_bp = Blueprint('visualization', __name__)
@@ -12,6 +20,7 @@ visualization_bp = Blueprint('visualization', __name__)
 @login_required
 def visualize_dataset(dataset_id):
     """可视化数据集"""
+    from utils.visualization_helper import generate_dataset_summary
     dataset = Dataset.query.get_or_404(dataset_id)
     
     # 确保用户有权限查看此数据集
@@ -32,6 +41,7 @@ def visualize_dataset(dataset_id):
 @login_required
 def visualize_assessment(assessment_id):
     """可视化评估结果"""
+    from utils.visualization_helper import generate_assessment_charts
     assessment = Assessment.query.get_or_404(assessment_id)
     
     # 确保用户有权限查看此评估
@@ -56,7 +66,7 @@ def visualize_assessment(assessment_id):
         'business_value_score': assessment.business_value_score or 0,
         'overall_score': assessment.overall_value_score,
         'status': assessment.status,
-        'status_display': '已完成' if assessment.status == 'completed' else '进行中' if assessment.status == 'processing' else '待处理'
+        'status_display': STATUS_DISPLAY_MAP.get(assessment.status, assessment.status)
     }
     
     return render_template(
@@ -64,38 +74,196 @@ def visualize_assessment(assessment_id):
         title=f'评估可视化: {assessment.name}',
         assessment=assessment_dict,
         dataset=dataset,
-        chart_data=chart_data
+        chart_data=chart_data,
+        # 已完成的评估提供服务端渲染的雷达图，用于报告
+        radar_image_url=chart_image_url(assessment, 'radar') if assessment.status == 'completed' else None
     )
 
 @visualization_bp.route('/api/dataset/<int:dataset_id>/summary')
 @login_required
 def api_dataset_summary(dataset_id):
     """API: 获取数据集摘要数据"""
+    from utils.summary_cache import get_summary_cache_key
+    from utils.visualization_helper import generate_dataset_summary
     dataset = Dataset.query.get_or_404(dataset_id)
     
     # 确保用户有权限查看此数据集
     if dataset.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': '没有权限访问此数据集'}), 403
     
-    # 生成数据集摘要
-    summary_data = generate_dataset_summary(dataset)
+    # 文件内容和数据集信息不变时，客户端缓存的摘要仍然有效
+    try:
+        etag = _make_etag(
+            get_summary_cache_key(dataset.file_path),
+            dataset.id, dataset.name, dataset.file_type, dataset.row_count, dataset.column_count, dataset.size_bytes
+        )
+        file_modified = datetime.utcfromtimestamp(os.path.getmtime(dataset.file_path))
+        last_modified = max(filter(None, [file_modified, dataset.updated_at]))
+    except OSError:
+        # 数据文件已不存在，返回摘要中的错误信息，不允许缓存
+        etag, last_modified = None, None
     
-    return jsonify(summary_data)
+    return _conditional_json(
+        lambda: generate_dataset_summary(dataset), etag, last_modified, 'private, no-cache'
+    )
 
 @visualization_bp.route('/api/assessment/<int:assessment_id>/charts')
 @login_required
 def api_assessment_charts(assessment_id):
     """API: 获取评估结果的图表数据"""
+    from utils.visualization_helper import generate_assessment_charts, get_point_budget, ASSESSMENT_CHARTS_VERSION
     assessment = Assessment.query.get_or_404(assessment_id)
     
     # 确保用户有权限查看此评估
     if assessment.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': '没有权限访问此评估'}), 403
     
-    # 生成评估结果的图表数据
-    chart_data = generate_assessment_charts(assessment)
+    # 图表数据包含可以随时修改的评估名称，客户端每次重新验证；评估和名称都未变化时返回304
+    etag = _make_etag(
+        ASSESSMENT_CHARTS_VERSION, get_point_budget(), assessment.id, assessment.name, assessment.status,
+        assessment.completed_at.isoformat() if assessment.completed_at else None
+    )
+    
+    return _conditional_json(
+        lambda: generate_assessment_charts(assessment), etag,
+        assessment.completed_at or assessment.created_at, 'private, no-cache'
+    )
+
+@visualization_bp.route('/charts/dataset/<int:dataset_id>/<kind>.png')
+@login_required
+def dataset_chart_image(dataset_id, kind):
+    """服务端渲染的数据集图表（histogram、missing），用于报告和邮件"""
+    dataset = Dataset.query.get_or_404(dataset_id)
+    
+    # 确保用户有权限查看此数据集
+    if dataset.user_id != current_user.id and not current_user.is_admin:
+        return jsonify({'error': '没有权限访问此数据集'}), 403
+    
+    try:
+        spec = make_chart_spec('dataset', kind, request.args.get('column'),
+                               request.args.get('width', type=int), request.args.get('height', type=int))
+        version = get_dataset_chart_version(dataset)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OSError:
+        abort(404)
+    
+    return _chart_image_response(version, spec, lambda: get_dataset_chart_png(dataset, spec, version))
+
+@visualization_bp.route('/charts/assessment/<int:assessment_id>/<kind>.png')
+@login_required
+def assessment_chart_image(assessment_id, kind):
+    """服务端渲染的评估图表（radar），用于报告和邮件"""
+    assessment = Assessment.query.get_or_404(assessment_id)
+    
+    # 确保用户有权限查看此评估
+    if assessment.user_id != current_user.id and not current_user.is_admin:
+        return jsonify({'error': '没有权限访问此评估'}), 403
+    
+    try:
+        spec = make_chart_spec('assessment', kind, None,
+                               request.args.get('width', type=int), request.args.get('height', type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    version = get_assessment_chart_version(assessment)
+    
+    return _chart_image_response(version, spec, lambda: get_assessment_chart_png(assessment, spec, version))
+
+@visualization_bp.app_template_global()
+def chart_image_url(target, kind, **params):
+    """
+    服务端渲染图表的地址，可在模板和邮件中使用
+    
+    地址中带有数据版本标识 v，数据变化后地址随之变化，因此响应可以长期缓存。
+    
+    Args:
+        target: 数据集或评估模型实例
+        kind: 图表类型（histogram、missing 或 radar）
+        **params: column、width、height 等图表参数
+        
+    Returns:
+        str: 图片地址
+    """
+    if isinstance(target, Dataset):
+        token = _version_token(get_dataset_chart_version(target))
+        return url_for('visualization.dataset_chart_image', dataset_id=target.id, kind=kind, v=token, **params)
+    token = _version_token(get_assessment_chart_version(target))
+    return url_for('visualization.assessment_chart_image', assessment_id=target.id, kind=kind, v=token, **params)
+
+def _version_token(version):
+    """地址中使用的数据版本标识"""
+    return hashlib.sha256(version.encode('utf-8')).hexdigest()[:12]
+
+def _chart_image_response(version, spec, render):
+    """
+    返回PNG图片，支持条件请求
+    
+    请求地址中的 v 与当前数据版本一致时，图片内容不会再变化，使用长期缓存；
+    否则（没有 v 或数据已变化）要求客户端每次重新验证。
+    """
+    etag = _make_etag(get_chart_cache_key(version, spec))
+    if request.args.get('v') == _version_token(version):
+        max_age = current_app.config.get('CHART_IMAGE_MAX_AGE', 31536000)
+        cache_control = f'private, max-age={max_age}, immutable'
+    else:
+        cache_control = 'private, no-cache'
+    
+    if not is_resource_modified(request.environ, etag=etag):
+        response = current_app.response_class(status=304)
+    else:
+        try:
+            response = current_app.response_class(render(), mimetype='image/png')
+        except ValueError as e:
+            # 数据集没有可以绘制的数据
+            return jsonify({'error': str(e)}), 404
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def _make_etag(*parts):
+    """由决定响应内容的各项计算强ETag"""
+    return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()[:32]
+
+def _conditional_json(build, etag, last_modified, cache_control):
+    """
+    按条件请求头返回JSON响应
+
+    请求携带的 If-None-Match / If-Modified-Since 与当前的ETag和修改时间一致时返回304，
+    不生成响应内容。
+
+    Args:
+        build: 生成响应数据的函数
+        etag: 强ETag；为None时不做条件判断，响应也不允许缓存
+        last_modified: 最后修改时间（UTC，可选）
+        cache_control: Cache-Control 头
+
+    Returns:
+        Response: 200 或 304 响应
+    """
+    if etag is None:
+        response = jsonify(build())
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    if last_modified is not None:
+        # HTTP日期只精确到秒
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        data = build()
+        response = jsonify(data)
+        if isinstance(data, dict) and data.get('error'):
+            # 生成失败的结果不缓存
+            response.headers['Cache-Control'] = 'no-store'
+            return response
     
-    return jsonify(chart_data)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 @visualization_bp.route('/dashboard/overview')
 @login_required
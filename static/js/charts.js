@@ -239,6 +239,75 @@ function getLineOption(data = null) {
     };
 }
 
+// 获取服务端降采样后的折线图/时间序列配置（数据为 [x, y] 点列表或 categories 加数值列表）
+function getSampledLineOption(data) {
+    const pointSeries = data.series.length > 0 && Array.isArray(data.series[0].data[0]);
+    return {
+        title: {
+            text: data.title,
+            left: 'center'
+        },
+        tooltip: {
+            trigger: 'axis'
+        },
+        legend: {
+            data: data.series.map(series => series.name),
+            bottom: 10
+        },
+        xAxis: pointSeries ? {
+            type: data.type === 'time_series' ? 'time' : 'value'
+        } : {
+            type: 'category',
+            data: data.categories
+        },
+        yAxis: {
+            type: 'value'
+        },
+        series: data.series.map(series => ({
+            name: series.name,
+            type: 'line',
+            showSymbol: false,
+            sampling: 'lttb',
+            data: series.data
+        }))
+    };
+}
+
+// 获取二维密度热力图配置（点数过多的散点图在服务端转换为分箱计数）
+function getDensityOption(data) {
+    const binLabels = edges => edges.slice(0, -1).map((edge, i) => `${edge.toFixed(2)} - ${edges[i + 1].toFixed(2)}`);
+    const maxCount = data.data.reduce((max, cell) => Math.max(max, cell[2]), 1);
+    return {
+        title: {
+            text: data.title,
+            left: 'center'
+        },
+        tooltip: {
+            position: 'top'
+        },
+        xAxis: {
+            type: 'category',
+            data: binLabels(data.x_edges)
+        },
+        yAxis: {
+            type: 'category',
+            data: binLabels(data.y_edges)
+        },
+        visualMap: {
+            min: 0,
+            max: maxCount,
+            calculable: true,
+            orient: 'horizontal',
+            left: 'center',
+            bottom: 0
+        },
+        series: [{
+            type: 'heatmap',
+            data: data.data
+        }]
+    };
+}
+
 // 从API获取数据并更新图表
 function loadChartData(chart, apiUrl) {
     fetch(apiUrl)
@@ -295,6 +364,8 @@ window.ChartUtils = {
     getBarOption,
     getPieOption,
     getLineOption,
+    getSampledLineOption,
+    getDensityOption,
     loadChartData,
     exportChart
 };
\ No newline at end of file
@@ -1,10 +1,34 @@
-from utils.data_processor import process_dataset_file, get_file_info, analyze_data_quality
-from utils.assessment_engine import run_assessment, apply_quality_rules
-from utils.visualization_helper import generate_dataset_summary, generate_assessment_charts
+"""
+工具函数
+
+子模块依赖 pandas、numpy 等较重的库，这里导出的函数在第一次访问时才导入对应的子模块，
+导入 utils 包（例如 utils.settings）不会载入这些库。
+"""
+import importlib
+
+# 导出的函数及其所在的子模块
+_EXPORTS = {
+    'load_dataset': 'utils.dataset_loader',
+    'get_file_hash': 'utils.dataset_loader',
+    'process_dataset_file': 'utils.data_processor',
+    'get_file_info': 'utils.data_processor',
+    'analyze_data_quality': 'utils.data_processor',
+    'run_assessment': 'utils.assessment_engine',
+    'apply_quality_rules': 'utils.assessment_engine',
+    'generate_dataset_summary': 'utils.visualization_helper',
+    'generate_assessment_charts': 'utils.visualization_helper'
+}
 
 # 导出所有工具函数
-__all__ = [
-    'process_dataset_file', 'get_file_info', 'analyze_data_quality',
-    'run_assessment', 'apply_quality_rules',
-    'generate_dataset_summary', 'generate_assessment_charts'
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'utils' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
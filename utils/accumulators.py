@@ -0,0 +1,552 @@
+import numpy as np
+import pandas as pd
+from utils.sketches import DistinctCounter
+from utils.date_detection import get_date_sample, detect_dates, parse_dates
+from utils.dataset_profile import column_kind, evaluate_profile_stages
+
+# 字符串列的缺失值转换为字符串后为 'nan'，长度为3
+_MISSING_STRING_LENGTH = 3
+
+class Moments:
+    """
+    可合并的一阶、二阶矩统计（计数、均值、平方差之和、最小值、最大值）
+
+    使用Chan等人的并行合并公式，合并结果与一次性计算在数值上等价。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        """加入一批数值（不应包含缺失值）"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        batch = Moments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def update_constant(self, value, count):
+        """加入 count 个相同的数值"""
+        if count <= 0:
+            return
+        batch = Moments()
+        batch.count = count
+        batch.mean = float(value)
+        batch.min = batch.max = float(value)
+        self.merge(batch)
+
+    def merge(self, other):
+        """合并另一个Moments"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def std(self):
+        """样本标准差（ddof=1），与pandas的默认值一致"""
+        if self.count < 2:
+            return float('nan')
+        return float(np.sqrt(self.m2 / (self.count - 1)))
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        moments = cls()
+        moments.count = data['count']
+        moments.mean = data['mean']
+        moments.m2 = data['m2']
+        moments.min = data['min']
+        moments.max = data['max']
+        return moments
+
+class ColumnAccumulator:
+    """
+    单列的可合并统计状态
+
+    覆盖数据质量、默认准确性、时效性和价值维度评估所需的全部统计量。
+    """
+
+    def __init__(self, name, check_dates=False):
+        self.name = name
+        self.row_count = 0
+        self.null_count = 0
+        self.kinds = set()
+        self.distinct = DistinctCounter()
+        self.numeric = Moments()
+        self.finite_count = 0
+        self.nonblank_count = 0
+        self.string_lengths = Moments()
+        self.check_dates = check_dates
+        self.date_parse_ok = True
+        self.date_format = None
+        self.latest_date = None
+        self.outlier_count = 0
+
+    def add_missing(self, count):
+        """记录 count 行缺失值（例如JSON对象中缺少该键）"""
+        self.row_count += count
+        self.null_count += count
+        self.string_lengths.update_constant(_MISSING_STRING_LENGTH, count)
+
+    def update(self, series):
+        """加入一个数据块中的该列数据"""
+        nulls = series.isna()
+        null_count = int(nulls.sum())
+        self.row_count += len(series)
+        self.null_count += null_count
+        self.distinct.add_series(series)
+
+        # 全部为空的数据块无法判断类型，只计入缺失值
+        kind = column_kind(series) if null_count < len(series) else None
+        if kind is not None:
+            self.kinds.add(kind)
+
+        if kind == 'numeric':
+            values = series[~nulls].astype('float64')
+            self.numeric.update(values)
+            self.finite_count += int(np.isfinite(values).sum())
+        elif kind in ('object', None):
+            strings = series.astype(str)
+            self.nonblank_count += int((~nulls & (strings.str.strip() != '')).sum())
+            self.string_lengths.update(strings.str.len())
+
+        self._update_latest_date(series, kind)
+
+    def _update_latest_date(self, series, kind):
+        """更新日期列的最新日期"""
+        parsed = None
+        if kind == 'datetime':
+            parsed = series
+        elif kind == 'object' and self.date_parse_ok:
+            # 第一个数据块推断出的日期格式沿用到后续数据块
+            date_format, parsed = detect_dates(series, get_date_sample(series), self.date_format)
+            if parsed is None:
+                self.date_parse_ok = False
+            elif self.date_format is None:
+                self.date_format = date_format
+        if parsed is None and self.check_dates and kind is not None:
+            try:
+                parsed = parse_dates(series, self.date_format if kind == 'object' else None)
+            except Exception:
+                parsed = None
+        if parsed is None or parsed.isna().all():
+            return
+        latest = parsed.max()
+        try:
+            if self.latest_date is None or latest > self.latest_date:
+                self.latest_date = latest
+        except TypeError:
+            pass
+
+    def merge(self, other):
+        """合并另一个分区中同一列的统计状态"""
+        self.row_count += other.row_count
+        self.null_count += other.null_count
+        self.kinds |= other.kinds
+        self.distinct.merge(other.distinct)
+        self.numeric.merge(other.numeric)
+        self.finite_count += other.finite_count
+        self.nonblank_count += other.nonblank_count
+        self.string_lengths.merge(other.string_lengths)
+        self.date_parse_ok = self.date_parse_ok and other.date_parse_ok
+        self.date_format = self.date_format or other.date_format
+        if other.latest_date is not None:
+            try:
+                if self.latest_date is None or other.latest_date > self.latest_date:
+                    self.latest_date = other.latest_date
+            except TypeError:
+                pass
+        self.outlier_count += other.outlier_count
+        return self
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        return {
+            'name': self.name,
+            'row_count': self.row_count,
+            'null_count': self.null_count,
+            'kinds': sorted(self.kinds),
+            'distinct': self.distinct.to_dict(),
+            'numeric': self.numeric.to_dict(),
+            'finite_count': self.finite_count,
+            'nonblank_count': self.nonblank_count,
+            'string_lengths': self.string_lengths.to_dict(),
+            'check_dates': self.check_dates,
+            'date_parse_ok': self.date_parse_ok,
+            'date_format': self.date_format,
+            'latest_date': self.latest_date.isoformat() if self.latest_date is not None else None,
+            'outlier_count': self.outlier_count
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        accumulator = cls(data['name'], check_dates=data['check_dates'])
+        accumulator.row_count = data['row_count']
+        accumulator.null_count = data['null_count']
+        accumulator.kinds = set(data['kinds'])
+        accumulator.distinct = DistinctCounter.from_dict(data['distinct'])
+        accumulator.numeric = Moments.from_dict(data['numeric'])
+        accumulator.finite_count = data['finite_count']
+        accumulator.nonblank_count = data['nonblank_count']
+        accumulator.string_lengths = Moments.from_dict(data['string_lengths'])
+        accumulator.date_parse_ok = data['date_parse_ok']
+        accumulator.date_format = data['date_format']
+        accumulator.latest_date = pd.Timestamp(data['latest_date']) if data['latest_date'] else None
+        accumulator.outlier_count = data['outlier_count']
+        return accumulator
+
+    def kind(self, default='numeric'):
+        """
+        合并各数据块的类型；出现字符串或类型不一致时按字符串列处理
+
+        Args:
+            default: 整列为空时的类型（CSV读取为float64，JSON读取为object）
+        """
+        if not self.kinds:
+            return default
+        if 'object' in self.kinds or len(self.kinds) > 1:
+            return 'object'
+        return next(iter(self.kinds))
+
+    def needs_outlier_pass(self, default_kind='numeric'):
+        """是否需要第二遍扫描统计异常值"""
+        return self.kind(default_kind) == 'numeric' and self.numeric.std() > 0
+
+    def update_outliers(self, series):
+        """第二遍扫描：统计Z分数超过3的异常值数量"""
+        std = self.numeric.std()
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            self.outlier_count += int((np.abs((values - self.numeric.mean) / std) > 3).sum())
+
+    def summary(self, default_kind='numeric'):
+        """
+        生成与数据集档案中列条目相同字段的统计汇总
+
+        Args:
+            default_kind: 整列为空时的类型
+        """
+        kind = self.kind(default_kind)
+        if kind == 'numeric':
+            valid_count = self.finite_count
+        elif kind == 'object':
+            # 混合类型列中数值块的非空值转换为字符串后不会是空白
+            valid_count = self.nonblank_count + self.numeric.count
+        else:
+            valid_count = self.row_count - self.null_count
+
+        std = self.numeric.std()
+        length_std = self.string_lengths.std()
+        return {
+            'name': self.name,
+            'kind': kind,
+            'row_count': self.row_count,
+            'missing_count': self.null_count,
+            'unique_count': self.distinct.count(),
+            'valid_count': valid_count,
+            'std': None if np.isnan(std) else std,
+            'outlier_count': self.outlier_count,
+            'length_mean': self.string_lengths.mean if self.string_lengths.count else None,
+            'length_std': None if np.isnan(length_std) else length_std,
+            'is_date': self.check_dates or kind == 'datetime' or (kind == 'object' and self.date_parse_ok),
+            'latest_date': self.latest_date.isoformat() if self.latest_date is not None else None
+        }
+
+class RuleAccumulator:
+    """
+    单条数据质量规则的可合并状态
+
+    按数据块调用 apply_rule_condition 并累加符合条件的行数；
+    unique 条件使用去重计数器，不能直接累加。
+    """
+
+    def __init__(self, rule=None):
+        if rule is None:
+            # 由 from_dict 填充各字段
+            return
+        rule_def = rule.get_rule_definition()
+        self.rule_id = rule.id
+        self.rule_name = rule.name
+        self.rule_type = rule.rule_type
+        self.column = rule_def.get('column')
+        self.condition = rule_def.get('condition')
+        self.value = rule_def.get('value')
+        self.valid_count = 0
+        self.total_count = 0
+        self.details = None
+        self.error = None
+
+    def update(self, chunk):
+        """加入一个数据块"""
+        from utils.assessment_engine import apply_rule_condition
+
+        if self.error is not None or self.condition == 'unique':
+            return
+        if self.column not in chunk.columns:
+            chunk = chunk.reindex(columns=list(chunk.columns) + [self.column])
+        result = apply_rule_condition(chunk, self.column, self.condition, self.value)
+        if 'valid_count' not in result['details']:
+            self.error = result
+            return
+        self.valid_count += result['details']['valid_count']
+        self.total_count += result['details']['total_count']
+        if self.details is None:
+            self.details = dict(result['details'])
+
+    def merge(self, other):
+        """合并另一个分区中同一规则的状态"""
+        if self.error is None and other.error is not None:
+            self.error = other.error
+        self.valid_count += other.valid_count
+        self.total_count += other.total_count
+        if self.details is None and other.details is not None:
+            self.details = dict(other.details)
+        return self
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        return {
+            'rule_id': self.rule_id,
+            'rule_name': self.rule_name,
+            'rule_type': self.rule_type,
+            'column': self.column,
+            'condition': self.condition,
+            'value': self.value,
+            'valid_count': self.valid_count,
+            'total_count': self.total_count,
+            'details': self.details,
+            'error': self.error
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        accumulator = cls()
+        for key, value in data.items():
+            setattr(accumulator, key, value)
+        return accumulator
+
+    def finalize(self, column_accumulator):
+        """
+        计算规则的最终结果，结构与 apply_rule_condition 的返回值一致
+
+        Args:
+            column_accumulator: 规则所在列的 ColumnAccumulator（用于unique条件）
+        """
+        if self.error is not None:
+            return self.error
+        result = {'passed': False, 'pass_rate': 0, 'details': {}}
+        total_count = column_accumulator.row_count
+        try:
+            if self.condition == 'unique':
+                unique_count = column_accumulator.distinct.count()
+                pass_rate = (unique_count / total_count) * 100 if total_count > 0 else 0
+                result['passed'] = pass_rate >= float(self.value)
+                result['pass_rate'] = round(pass_rate, 2)
+                result['details'] = {
+                    'unique_count': int(unique_count),
+                    'total_count': total_count,
+                    'threshold': float(self.value)
+                }
+                return result
+
+            threshold = float(self.value) if self.condition == 'not_null' else 95  # 默认95%符合率为通过
+            pass_rate = (self.valid_count / total_count) * 100 if total_count > 0 else 0
+            result['passed'] = pass_rate >= threshold
+            result['pass_rate'] = round(pass_rate, 2)
+            result['details'] = dict(self.details or {})
+            result['details'].update({
+                'valid_count': int(self.valid_count),
+                'total_count': total_count
+            })
+        except Exception as e:
+            result['details'] = {'error': str(e)}
+        return result
+
+class DatasetAccumulator:
+    """
+    整个数据集的可合并统计状态
+
+    可以逐块更新，也可以在多个分区之间合并；
+    finalize_stages 返回与内存评估各阶段完全相同结构的结果。
+    """
+
+    def __init__(self, rules=None, file_type='csv'):
+        self.file_type = file_type
+        self.columns = {}
+        self.row_count = 0
+        self.chunk_count = 0
+        self.rules = [RuleAccumulator(rule) for rule in rules] if rules else []
+
+    def _get_column(self, name):
+        """获取列的统计状态，首次出现的列补记之前的缺失行"""
+        if name not in self.columns:
+            from utils.assessment_engine import DATE_KEYWORDS
+            check_dates = isinstance(name, str) and any(keyword in name.lower() for keyword in DATE_KEYWORDS)
+            accumulator = ColumnAccumulator(name, check_dates=check_dates)
+            accumulator.add_missing(self.row_count)
+            self.columns[name] = accumulator
+        return self.columns[name]
+
+    def update(self, chunk):
+        """加入一个数据块"""
+        for col in chunk.columns:
+            self._get_column(col).update(chunk[col])
+        for name, accumulator in self.columns.items():
+            if name not in chunk.columns:
+                accumulator.add_missing(len(chunk))
+        for rule in self.rules:
+            rule.update(chunk)
+        self.row_count += len(chunk)
+        self.chunk_count += 1
+
+    def merge(self, other):
+        """合并另一个分区的统计状态（other 中的行位于当前分区之后）"""
+        for name, accumulator in other.columns.items():
+            if name not in self.columns:
+                self._get_column(name)
+            self.columns[name].merge(accumulator)
+        for name, accumulator in self.columns.items():
+            if name not in other.columns:
+                accumulator.add_missing(other.row_count)
+        for rule, other_rule in zip(self.rules, other.rules):
+            rule.merge(other_rule)
+        self.row_count += other.row_count
+        self.chunk_count += other.chunk_count
+        return self
+
+    def to_dict(self):
+        """
+        转换为可JSON序列化的字典
+
+        规则状态与规则集合有关，不包含在内，由调用方按规则分别保存。
+        """
+        return {
+            'file_type': self.file_type,
+            'row_count': self.row_count,
+            'chunk_count': self.chunk_count,
+            'columns': [acc.to_dict() for acc in self.columns.values()]
+        }
+
+    @classmethod
+    def from_dict(cls, data, rules=None):
+        """
+        从 to_dict 的结果恢复
+
+        Args:
+            data: to_dict 的结果
+            rules: RuleAccumulator 列表（可选）
+        """
+        accumulator = cls(file_type=data['file_type'])
+        accumulator.row_count = data['row_count']
+        accumulator.chunk_count = data['chunk_count']
+        for column in data['columns']:
+            accumulator.columns[column['name']] = ColumnAccumulator.from_dict(column)
+        accumulator.rules = list(rules or [])
+        return accumulator
+
+    @property
+    def default_kind(self):
+        """整列为空时的类型"""
+        return 'numeric' if self.file_type == 'csv' else 'object'
+
+    def outlier_columns(self):
+        """需要第二遍扫描统计异常值的列"""
+        return [name for name, acc in self.columns.items() if acc.needs_outlier_pass(self.default_kind)]
+
+    def update_outliers(self, chunk):
+        """第二遍扫描：加入一个只包含数值列的数据块"""
+        for col in chunk.columns:
+            if col in self.columns:
+                self.columns[col].update_outliers(chunk[col])
+
+    def summary(self):
+        """
+        生成与数据集档案相同结构的统计汇总
+
+        Returns:
+            dict: 包含 row_count、column_count、outlier_detector、columns 的字典
+        """
+        return {
+            'row_count': self.row_count,
+            'column_count': len(self.columns),
+            'outlier_detector': 'zscore',
+            'columns': [acc.summary(self.default_kind) for acc in self.columns.values()]
+        }
+
+    def finalize_stages(self):
+        """
+        计算各评估阶段的结果
+
+        Returns:
+            dict: 包含 quality、rules、accuracy、timeliness、value_dimensions 的字典
+        """
+        stages = evaluate_profile_stages(self.summary())
+        stages['rules'] = self._finalize_rules() if self.rules else None
+        if self.rules:
+            stages['accuracy'] = None
+        stages['chunk_count'] = self.chunk_count
+        return stages
+
+    def _finalize_rules(self):
+        """与 apply_quality_rules 相同结构的结果"""
+        rule_results = {
+            'rule_count': len(self.rules),
+            'passed_rules': 0,
+            'failed_rules': 0,
+            'pass_percentage': 0,
+            'details': []
+        }
+        for rule in self.rules:
+            if rule.column not in self.columns:
+                rule_results['details'].append({
+                    'rule_id': rule.rule_id,
+                    'rule_name': rule.rule_name,
+                    'status': 'skipped',
+                    'reason': f"列 '{rule.column}' 不存在"
+                })
+                continue
+
+            result = rule.finalize(self.columns[rule.column])
+            if result['passed']:
+                rule_results['passed_rules'] += 1
+            else:
+                rule_results['failed_rules'] += 1
+            rule_results['details'].append({
+                'rule_id': rule.rule_id,
+                'rule_name': rule.rule_name,
+                'rule_type': rule.rule_type,
+                'status': 'passed' if result['passed'] else 'failed',
+                'pass_rate': result['pass_rate'],
+                'details': result['details']
+            })
+
+        if rule_results['rule_count'] > 0:
+            rule_results['pass_percentage'] = round(
+                (rule_results['passed_rules'] / rule_results['rule_count']) * 100, 2
+            )
+        return rule_results
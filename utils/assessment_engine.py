@@ -4,18 +4,70 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from utils.data_processor import process_dataset_file, analyze_data_quality
+from utils.dataset_loader import STREAMING_FILE_TYPES, load_dataset
+from utils.dataset_profile import load_dataset_profile, evaluate_profile_stages, evaluate_profile_rules
+from utils.settings import get_setting
+from utils.column_stats import ColumnStats
+from utils.rule_plan import compile_rule_plan
+from utils.parallel_assessment import get_parallel_workers, run_column_parallel_stages
+from utils.partitioned_assessment import run_row_parallel_stages
+from utils.result_cache import get_result_cache_key, load_cached_result, save_cached_result
+from utils.sampling_assessment import (
+    SAMPLE_REPLICATE_GROUPS, SAMPLE_CONFIDENCE_LEVEL, draw_sample, estimate_confidence_intervals
+)
+from utils.incremental_assessment import load_incremental_state, run_incremental_stages
+from utils.stage_profiler import StageProfiler
+from utils.memory_budget import plan_memory_strategy, format_budget_error
 
-def run_assessment(dataset, rules=None):
+# 用于识别日期列的列名关键词
+DATE_KEYWORDS = ['date', 'time', 'day', 'month', 'year', '日期', '时间']
+
+# 评估引擎版本，评分逻辑变化时递增，使缓存的评估结果失效
+ENGINE_VERSION = 1
+
+# 内存分配失败时的错误信息（MemoryError 本身通常没有信息）
+MEMORY_LIMIT_ERROR = '评估超过内存限制，已终止'
+
+# 业务价值得分的权重
+BUSINESS_VALUE_WEIGHTS = {
+    'quality': 0.2,
+    'completeness': 0.2,
+    'consistency': 0.15,
+    'accuracy': 0.25,
+    'timeliness': 0.2
+}
+
+# 综合价值得分的权重
+OVERALL_VALUE_WEIGHTS = {
+    'quality': 0.3,
+    'business_value': 0.7
+}
+
+def run_assessment(dataset, rules=None, mode='auto', chunk_size=None, use_profile=True, use_cache=True,
+                   sample_size=None, stratify_column=None):
     """
     运行数据价值评估
     
     Args:
         dataset: 数据集模型实例
         rules: 数据质量规则列表（可选）
+        mode: 执行模式，memory为整体载入内存，streaming为分块流式评估，
+              columns为按列分区的多进程评估，rows为按行分区的多进程评估（CSV），sample为抽样评估，incremental为使用追加数据时维护的增量状态，
+              auto在数据集有可用的增量状态时使用增量评估，否则根据文件大小和列数自动选择；
+              需要整体载入时先检查内存预算，估计超出预算时改用流式评估或抽样评估
+        chunk_size: 流式评估时每块的行数（可选，默认使用配置）
+        use_profile: 文件未变化时是否直接使用保存的数据集档案
+        use_cache: 是否使用缓存的评估结果（文件、规则、引擎版本和评分配置都未变化时）
+        sample_size: 抽样评估的样本行数（可选，默认使用配置；指定时auto模式使用抽样评估）
+        stratify_column: 抽样评估按该列分层抽样（可选，默认均匀抽样）
         
     Returns:
-        dict: 包含评估结果的字典
+        dict: 包含评估结果的字典；开启性能分析时 profile 中记录各阶段的耗时和内存
     """
+    profiler = StageProfiler(
+        get_setting('ASSESSMENT_PROFILE_ENABLED', True),
+        get_setting('ASSESSMENT_PROFILE_MEMORY', 'rss')
+    )
     # 初始化结果字典
     results = {
         'dataset_id': dataset.id,
@@ -32,182 +84,396 @@ def run_assessment(dataset, rules=None):
     }
     
     try:
-        # 读取数据集文件
-        file_path = dataset.file_path
-        file_type = dataset.file_type
-        
-        # 根据文件类型读取数据
-        if file_type == 'csv':
-            df = pd.read_csv(file_path)
-        elif file_type in ['xlsx', 'xls']:
-            df = pd.read_excel(file_path)
-        elif file_type == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                df = pd.DataFrame(data)
-            else:
-                raise ValueError("JSON文件格式不支持，需要包含对象列表")
-        else:
-            raise ValueError(f"不支持的文件类型: {file_type}")
-        
-        # 1. 数据质量评估
-        quality_results = analyze_data_quality(df)
-        results['quality_score'] = quality_results['overall_score']
-        results['completeness_score'] = quality_results['completeness']['overall_score']
-        results['consistency_score'] = quality_results['consistency']['overall_score']
-        
-        # 重构详细结果结构，使其与模板匹配
-        results['details'] = {
-            '数据质量': {
-                '完整性': {
-                    'score': quality_results['completeness']['overall_score'],
-                    'description': '数据完整性评估，检查缺失值比例'
-                },
-                '一致性': {
-                    'score': quality_results['consistency']['overall_score'],
-                    'description': '数据一致性评估，检查数据类型和格式一致性'
-                },
-                '唯一性': {
-                    'score': quality_results['uniqueness']['overall_score'],
-                    'description': '数据唯一性评估，检查重复值比例'
+        if mode == 'auto' and sample_size:
+            mode = 'sample'
+        
+        # 追加过数据的数据集保存了增量状态，直接由状态计算结果
+        incremental_state = None
+        if mode in ('auto', 'incremental') and dataset.file_type in STREAMING_FILE_TYPES:
+            incremental_state = load_incremental_state(dataset.file_path)
+            if incremental_state is not None:
+                mode = 'incremental'
+        
+        # 抽样评估的结果是近似值，增量评估不需要读取整个文件计算哈希，
+        # 两者都不读写评估结果缓存，也不使用数据集档案
+        cache_key = None
+        if use_cache and mode not in ('sample', 'incremental') and get_setting('RESULT_CACHE_ENABLED', True):
+            with profiler.stage('result_cache'):
+                cache_key = get_result_cache_key(dataset.file_path, rules, ENGINE_VERSION, {
+                    'business_value': BUSINESS_VALUE_WEIGHTS,
+                    'overall_value': OVERALL_VALUE_WEIGHTS,
+                    'outlier_detector': get_setting('ASSESSMENT_OUTLIER_DETECTOR', 'zscore'),
+                    'approximate_stats': get_setting('ASSESSMENT_APPROXIMATE_STATS', False)
+                })
+                cached = load_cached_result(cache_key)
+            if cached is not None:
+                # 相同内容的文件可能属于其他数据集，数据集信息和评估时间使用本次的值
+                cached['execution'] = {
+                    'mode': 'cached',
+                    'cached_at': cached['assessment_time'],
+                    'source': cached.get('execution')
                 }
+                cached.update({
+                    'dataset_id': dataset.id,
+                    'dataset_name': dataset.name,
+                    'assessment_time': results['assessment_time'],
+                    'profile': profiler.summary()
+                })
+                return cached
+        
+        budget_check = False
+        memory_plan = None
+        if mode == 'auto':
+            mode = select_execution_mode(dataset)
+            budget_check = mode in ('memory', 'columns')
+        
+        use_profile = use_profile and mode not in ('sample', 'incremental')
+        profile = None
+        if use_profile:
+            with profiler.stage('dataset_profile') as record:
+                profile = load_dataset_profile(dataset.file_path)
+                if profile is not None:
+                    stages = evaluate_profile_stages(profile)
+                    stages['rules'] = evaluate_profile_rules(profile, rules) if rules else None
+                    _record_shape(record, stages)
+        
+        # 需要整体载入数据时（没有档案，或规则无法只用档案评估），按估计的内存占用检查预算
+        if budget_check and (profile is None or (rules and stages['rules'] is None)):
+            with profiler.stage('memory_budget'):
+                memory_plan = plan_memory_strategy(dataset.file_path, dataset.file_type, dataset.row_count)
+            if memory_plan is not None and memory_plan['strategy'] != 'memory':
+                mode = _budget_fallback_mode(memory_plan, dataset)
+                profile = None
+                if mode == 'sample':
+                    # 抽样评估的结果是近似值，不写入结果缓存
+                    cache_key = None
+        
+        if profile is not None:
+            # 文件未变化时直接使用上传时保存的列档案，只有规则需要时才读取数据
+            rules_from_data = bool(rules) and stages['rules'] is None
+            if rules_from_data:
+                with profiler.stage('load') as record:
+                    df = load_dataset(dataset.file_path, dataset.file_type)
+                    record['rows'], record['columns'] = df.shape
+                with profiler.stage('rules', len(df), _rule_column_count(df, rules)):
+                    stages['rules'] = apply_quality_rules(df, rules)
+            if rules:
+                stages['accuracy'] = None
+            results['execution'] = {
+                'mode': 'profile',
+                'profile_version': profile['version'],
+                'rules_from_data': rules_from_data
             }
-        }
-        
-        # 2. 应用数据质量规则（如果提供）
-        if rules:
-            rule_results = apply_quality_rules(df, rules)
-            results['details']['规则评估'] = {
-                '规则通过率': {
-                    'score': rule_results['pass_percentage'],
-                    'description': f'应用了{rule_results["rule_count"]}条规则，{rule_results["passed_rules"]}条通过'
-                }
+        elif mode == 'sample':
+            # 单遍扫描抽取样本，在样本上运行全部评估阶段和规则
+            sample_size = sample_size or get_setting('ASSESSMENT_SAMPLE_SIZE', 100000)
+            with profiler.stage('sampling') as record:
+                sample, population_rows = draw_sample(
+                    dataset.file_path, dataset.file_type, sample_size, stratify_column,
+                    chunk_size=chunk_size or get_setting('ASSESSMENT_CHUNK_SIZE', 100000),
+                    seed=get_setting('ASSESSMENT_SAMPLE_SEED')
+                )
+                record['rows'], record['columns'] = population_rows, len(sample.columns)
+            stages = evaluate_dataframe_stages(sample, rules, profiler=profiler)
+            results['execution'] = {'mode': 'sample', 'sample_size': len(sample)}
+        elif mode == 'incremental' and dataset.file_type in STREAMING_FILE_TYPES:
+            # 只在没有状态或有新规则时扫描文件
+            chunk_size = chunk_size or get_setting('ASSESSMENT_CHUNK_SIZE', 100000)
+            with profiler.stage('incremental') as record:
+                stages = run_incremental_stages(
+                    dataset.file_path, dataset.file_type, rules, chunk_size, state=incremental_state
+                )
+                _record_shape(record, stages)
+            results['execution'] = {
+                'mode': 'incremental',
+                'state_built': stages['state_built'],
+                'rules_backfilled': stages['rules_backfilled']
             }
-            results['accuracy_score'] = rule_results['pass_percentage']
+        elif mode in ('rows', 'streaming') and dataset.file_type in STREAMING_FILE_TYPES:
+            # 分块读取文件，峰值内存只与块大小有关；rows模式把文件按行分区交给多个工作进程
+            chunk_size = chunk_size or get_setting('ASSESSMENT_CHUNK_SIZE', 100000)
+            stages = None
+            if mode == 'rows':
+                with profiler.stage('rows') as record:
+                    stages = run_row_parallel_stages(dataset.file_path, dataset.file_type, rules, chunk_size=chunk_size)
+                    if stages is not None:
+                        _record_shape(record, stages)
+            if stages is not None:
+                results['execution'] = {
+                    'mode': 'rows',
+                    'chunk_size': chunk_size,
+                    'chunk_count': stages['chunk_count'],
+                    'workers': stages['workers'],
+                    'partition_count': stages['partition_count']
+                }
+            else:
+                from utils.streaming_assessment import run_streaming_stages
+                with profiler.stage('streaming') as record:
+                    stages = run_streaming_stages(dataset.file_path, dataset.file_type, rules, chunk_size)
+                    _record_shape(record, stages)
+                results['execution'] = {
+                    'mode': 'streaming',
+                    'chunk_size': chunk_size,
+                    'chunk_count': stages['chunk_count']
+                }
         else:
-            # 如果没有自定义规则，使用默认的准确性评估
-            accuracy_score = evaluate_default_accuracy(df)
-            results['details']['准确性评估'] = {
-                '数据准确性': {
-                    'score': accuracy_score,
-                    'description': '基于数据类型和值范围的准确性评估'
+            stages = None
+            if mode == 'columns':
+                # 宽表按列分区交给多个工作进程；无法使用列式缓存时退回内存评估
+                with profiler.stage('columns') as record:
+                    stages = run_column_parallel_stages(dataset.file_path, dataset.file_type, rules)
+                    if stages is not None:
+                        _record_shape(record, stages)
+            
+            if stages is not None:
+                results['execution'] = {
+                    'mode': 'columns',
+                    'workers': stages['workers'],
+                    'partition_count': stages['partition_count']
                 }
+            else:
+                # 读取数据集文件
+                with profiler.stage('load') as record:
+                    df = load_dataset(dataset.file_path, dataset.file_type)
+                    record['rows'], record['columns'] = df.shape
+                # 各阶段共享同一份列统计缓存，每项统计只计算一次
+                stats = ColumnStats(df)
+                stages = evaluate_dataframe_stages(df, rules, stats, profiler)
+                results['execution'] = {'mode': 'memory', 'column_stats': stats.summary()}
+        
+        if memory_plan is not None:
+            results['execution']['memory_budget'] = memory_plan
+        
+        with profiler.stage('scoring'):
+            assemble_results(results, stages, rules)
+        
+        if mode == 'sample':
+            results['sampling'] = {
+                'strategy': 'stratified' if stratify_column else 'uniform',
+                'stratify_column': stratify_column,
+                'sample_size': len(sample),
+                'population_rows': population_rows,
+                'replicate_groups': SAMPLE_REPLICATE_GROUPS,
+                'confidence_level': SAMPLE_CONFIDENCE_LEVEL
             }
-            results['accuracy_score'] = accuracy_score
-        
-        # 3. 时效性评估
-        timeliness_score = evaluate_timeliness(df)
-        results['timeliness_score'] = timeliness_score
-        results['details']['时效性评估'] = {
-            '数据时效性': {
-                'score': timeliness_score,
-                'description': '基于数据最新更新时间的时效性评估'
-            }
-        }
+            with profiler.stage('confidence_intervals', len(sample), len(sample.columns)):
+                results['sampling']['confidence_intervals'] = estimate_confidence_intervals(
+                    sample, rules, results, population_rows, seed=get_setting('ASSESSMENT_SAMPLE_SEED')
+                )
         
-        # 4. 数据价值维度评估
-        value_dimensions = evaluate_value_dimensions(df)
-        results['details']['价值维度'] = value_dimensions
-        
-        # 5. 业务价值评估
-        business_value_score = calculate_business_value(
-            results['quality_score'],
-            results['completeness_score'],
-            results['consistency_score'],
-            results['accuracy_score'],
-            results['timeliness_score']
-        )
-        results['business_value_score'] = business_value_score
-        
-        # 6. 计算综合价值得分
-        results['overall_value_score'] = calculate_overall_value(results)
-        
-        # 添加综合评估结果
-        results['details']['综合评估'] = {
-            '数据质量得分': {
-                'score': results['quality_score'],
-                'description': '数据质量综合得分'
-            },
-            '业务价值得分': {
-                'score': results['business_value_score'],
-                'description': '数据业务价值综合得分'
-            },
-            '综合价值得分': {
-                'score': results['overall_value_score'],
-                'description': '数据综合价值得分'
-            }
-        }
+        if cache_key:
+            save_cached_result(cache_key, results)
         
+    except MemoryError:
+        # 例如后台工作进程的地址空间限制（ASSESSMENT_ADDRESS_SPACE_LIMIT）使内存分配失败
+        results['error'] = MEMORY_LIMIT_ERROR
     except Exception as e:
         results['error'] = str(e)
     
+    results['profile'] = profiler.summary()
     return results
 
-def apply_quality_rules(df, rules):
+def evaluate_dataframe_stages(df, rules=None, stats=None, profiler=None):
     """
-    应用数据质量规则
+    在内存中的数据上计算各评估阶段的结果
     
     Args:
         df: pandas DataFrame
-        rules: 数据质量规则列表
+        rules: 数据质量规则列表（可选）
+        stats: 本次评估共享的列统计缓存（可选）
+        profiler: 记录各阶段耗时和内存的 StageProfiler（可选）
         
     Returns:
-        dict: 包含规则应用结果的字典
+        dict: 包含 quality、rules、accuracy、timeliness、value_dimensions 的字典
+    """
+    if stats is None:
+        stats = ColumnStats(df)
+    if profiler is None:
+        profiler = StageProfiler(enabled=False)
+    rows, columns = df.shape
+    
+    stages = {'rules': None, 'accuracy': None}
+    with profiler.stage('quality', rows, columns):
+        stages['quality'] = analyze_data_quality(df, stats)
+    if rules:
+        with profiler.stage('rules', rows, _rule_column_count(df, rules)):
+            stages['rules'] = apply_quality_rules(df, rules, stats)
+    else:
+        with profiler.stage('accuracy', rows, columns):
+            stages['accuracy'] = evaluate_default_accuracy(df, stats)
+    with profiler.stage('timeliness', rows, columns):
+        stages['timeliness'] = evaluate_timeliness(df, stats)
+    with profiler.stage('value_dimensions', rows, columns):
+        stages['value_dimensions'] = evaluate_value_dimensions(df, stats)
+    return stages
+
+def _rule_column_count(df, rules):
+    """规则涉及的、数据中存在的列数"""
+    return len({entry['column'] for entry in compile_rule_plan(rules).entries} & set(df.columns))
+
+def _record_shape(record, stages):
+    """由汇总方式得到的阶段结果补充性能分析记录中的行列数"""
+    record['rows'] = stages.get('row_count')
+    record['columns'] = len(stages['quality']['completeness']['column_scores'])
+
+def assemble_results(results, stages, rules=None):
+    """
+    根据各评估阶段的结果计算各项得分并构建详细结果
+    
+    Args:
+        results: 评估结果字典，得分和 details 直接写入其中
+        stages: 各评估阶段的结果
+        rules: 数据质量规则列表（可选）
     """
-    rule_results = {
-        'rule_count': len(rules),
-        'passed_rules': 0,
-        'failed_rules': 0,
-        'pass_percentage': 0,
-        'details': []
+    # 1. 数据质量评估
+    quality_results = stages['quality']
+    results['quality_score'] = quality_results['overall_score']
+    results['completeness_score'] = quality_results['completeness']['overall_score']
+    results['consistency_score'] = quality_results['consistency']['overall_score']
+    
+    # 重构详细结果结构，使其与模板匹配
+    results['details'] = {
+        '数据质量': {
+            '完整性': {
+                'score': quality_results['completeness']['overall_score'],
+                'description': '数据完整性评估，检查缺失值比例'
+            },
+            '一致性': {
+                'score': quality_results['consistency']['overall_score'],
+                'description': '数据一致性评估，检查数据类型和格式一致性'
+            },
+            '唯一性': {
+                'score': quality_results['uniqueness']['overall_score'],
+                'description': '数据唯一性评估，检查重复值比例'
+            }
+        }
     }
     
-    for rule in rules:
-        rule_def = rule.get_rule_definition()
-        column = rule_def.get('column')
-        condition = rule_def.get('condition')
-        value = rule_def.get('value')
-        
-        # 跳过不适用的规则
-        if column not in df.columns:
-            rule_result = {
-                'rule_id': rule.id,
-                'rule_name': rule.name,
-                'status': 'skipped',
-                'reason': f"列 '{column}' 不存在"
+    # 2. 应用数据质量规则（如果提供）
+    if rules:
+        rule_results = stages['rules']
+        results['details']['规则评估'] = {
+            '规则通过率': {
+                'score': rule_results['pass_percentage'],
+                'description': f'应用了{rule_results["rule_count"]}条规则，{rule_results["passed_rules"]}条通过'
+            }
+        }
+        results['accuracy_score'] = rule_results['pass_percentage']
+    else:
+        # 如果没有自定义规则，使用默认的准确性评估
+        accuracy_score = stages['accuracy']
+        results['details']['准确性评估'] = {
+            '数据准确性': {
+                'score': accuracy_score,
+                'description': '基于数据类型和值范围的准确性评估'
             }
-            rule_results['details'].append(rule_result)
-            continue
+        }
+        results['accuracy_score'] = accuracy_score
+    
+    # 3. 时效性评估
+    timeliness_score = stages['timeliness']
+    results['timeliness_score'] = timeliness_score
+    results['details']['时效性评估'] = {
+        '数据时效性': {
+            'score': timeliness_score,
+            'description': '基于数据最新更新时间的时效性评估'
+        }
+    }
+    
+    # 4. 数据价值维度评估
+    value_dimensions = stages['value_dimensions']
+    results['details']['价值维度'] = value_dimensions
+    
+    # 5. 业务价值评估
+    business_value_score = calculate_business_value(
+        results['quality_score'],
+        results['completeness_score'],
+        results['consistency_score'],
+        results['accuracy_score'],
+        results['timeliness_score']
+    )
+    results['business_value_score'] = business_value_score
+    
+    # 6. 计算综合价值得分
+    results['overall_value_score'] = calculate_overall_value(results)
+    
+    # 添加综合评估结果
+    results['details']['综合评估'] = {
+        '数据质量得分': {
+            'score': results['quality_score'],
+            'description': '数据质量综合得分'
+        },
+        '业务价值得分': {
+            'score': results['business_value_score'],
+            'description': '数据业务价值综合得分'
+        },
+        '综合价值得分': {
+            'score': results['overall_value_score'],
+            'description': '数据综合价值得分'
+        }
+    }
+
+def select_execution_mode(dataset):
+    """
+    选择评估的执行模式
+    
+    Args:
+        dataset: 数据集模型实例
+        
+    Returns:
+        str: memory、streaming、rows 或 columns
+    """
+    threshold = get_setting('ASSESSMENT_STREAMING_THRESHOLD', 256 * 1024 * 1024)
+    if dataset.file_type in STREAMING_FILE_TYPES and os.path.getsize(dataset.file_path) >= threshold:
+        # 有多个CPU时，大CSV文件按行分区并行读取
+        if dataset.file_type == 'csv' and get_parallel_workers() > 1:
+            return 'rows'
+        return 'streaming'
+    
+    # 列数较多的宽表按列分区并行评估
+    min_columns = get_setting('ASSESSMENT_PARALLEL_MIN_COLUMNS', 200)
+    if (dataset.column_count or 0) >= min_columns and get_parallel_workers() > 1:
+        return 'columns'
+    return 'memory'
+
+def _budget_fallback_mode(memory_plan, dataset):
+    """
+    超出内存预算时改用的执行模式
+    
+    Args:
+        memory_plan: plan_memory_strategy 返回的字典
+        dataset: 数据集模型实例
         
-        # 应用规则
-        result = apply_rule_condition(df, column, condition, value)
+    Returns:
+        str: streaming、rows 或 sample
         
-        # 记录结果
-        if result['passed']:
-            rule_results['passed_rules'] += 1
-        else:
-            rule_results['failed_rules'] += 1
-        
-        rule_result = {
-            'rule_id': rule.id,
-            'rule_name': rule.name,
-            'rule_type': rule.rule_type,
-            'status': 'passed' if result['passed'] else 'failed',
-            'pass_rate': result['pass_rate'],
-            'details': result['details']
-        }
-        rule_results['details'].append(rule_result)
+    Raises:
+        ValueError: 文件类型不支持分块读取
+    """
+    if memory_plan['strategy'] == 'rejected':
+        raise ValueError(format_budget_error(memory_plan))
+    if memory_plan['strategy'] == 'streaming' and dataset.file_type == 'csv' and get_parallel_workers() > 1:
+        return 'rows'
+    return memory_plan['strategy']
+
+def apply_quality_rules(df, rules, stats=None):
+    """
+    应用数据质量规则
     
-    # 计算通过率
-    if rule_results['rule_count'] > 0:
-        rule_results['pass_percentage'] = round(
-            (rule_results['passed_rules'] / rule_results['rule_count']) * 100, 2
-        )
+    规则集合先编译为执行计划（按规则集合哈希缓存），
+    同一列上的规则在一次扫描中批量执行。
     
-    return rule_results
+    Args:
+        df: pandas DataFrame
+        rules: 数据质量规则列表
+        stats: 本次评估共享的列统计缓存（可选）
+        
+    Returns:
+        dict: 包含规则应用结果的字典
+    """
+    return compile_rule_plan(rules).execute(df, stats)
 
-def apply_rule_condition(df, column, condition, value):
+def apply_rule_condition(df, column, condition, value, stats=None):
     """
     应用规则条件
     
@@ -216,6 +482,7 @@ def apply_rule_condition(df, column, condition, value):
         column: 列名
         condition: 条件类型
         value: 条件值
+        stats: 本次评估共享的列统计缓存（可选）
         
     Returns:
         dict: 包含规则应用结果的字典
@@ -226,10 +493,13 @@ def apply_rule_condition(df, column, condition, value):
         'details': {}
     }
     
+    if stats is None:
+        stats = ColumnStats(df)
+    
     try:
         if condition == 'not_null':
             # 检查非空值
-            valid_count = (~df[column].isna()).sum()
+            valid_count = (~stats.null_mask(column)).sum()
             total_count = len(df)
             pass_rate = (valid_count / total_count) * 100 if total_count > 0 else 0
             result['passed'] = pass_rate >= float(value)
@@ -242,7 +512,7 @@ def apply_rule_condition(df, column, condition, value):
         
         elif condition == 'unique':
             # 检查唯一值
-            unique_count = df[column].nunique()
+            unique_count = stats.nunique(column)
             total_count = len(df)
             pass_rate = (unique_count / total_count) * 100 if total_count > 0 else 0
             result['passed'] = pass_rate >= float(value)
@@ -278,7 +548,7 @@ def apply_rule_condition(df, column, condition, value):
             # 检查模式匹配
             try:
                 pattern = value
-                valid_count = df[column].astype(str).str.match(pattern).sum()
+                valid_count = stats.strings(column).str.match(pattern).sum()
                 total_count = len(df)
                 pass_rate = (valid_count / total_count) * 100 if total_count > 0 else 0
                 result['passed'] = pass_rate >= 95  # 默认95%符合率为通过
@@ -349,55 +619,102 @@ def apply_rule_condition(df, column, condition, value):
     
     return result
 
-def evaluate_timeliness(df):
+def evaluate_timeliness(df, stats=None):
     """
     评估数据的时效性
     
     Args:
         df: pandas DataFrame
+        stats: 本次评估共享的列统计缓存（可选）
         
     Returns:
         float: 时效性得分 (0-100)
     """
+    if stats is None:
+        stats = ColumnStats(df)
+    
     # 查找可能的日期列
+    date_columns = find_date_columns(df, stats)
+    
+    # 如果没有找到日期列，返回默认分数
+    if not date_columns:
+        return 50.0  # 默认中等分数
+    
+    # 分析最新的日期列
+    latest_dates = list(get_latest_dates(df, date_columns, stats).values())
+    
+    if not latest_dates:
+        return 50.0  # 默认中等分数
+    
+    return score_timeliness(max(latest_dates))
+
+def find_date_columns(df, stats=None):
+    """
+    查找可能的日期列
+    
+    Args:
+        df: pandas DataFrame
+        stats: 本次评估共享的列统计缓存（可选）
+        
+    Returns:
+        list: 日期列名列表
+    """
+    if stats is None:
+        stats = ColumnStats(df)
+    
     date_columns = []
     for col in df.columns:
         # 检查列名是否包含日期相关关键词
-        if any(keyword in col.lower() for keyword in ['date', 'time', 'day', 'month', 'year', '日期', '时间']):
+        if any(keyword in col.lower() for keyword in DATE_KEYWORDS):
             date_columns.append(col)
         
         # 检查是否为日期类型
-        if df[col].dtype == 'datetime64[ns]':
+        elif df[col].dtype == 'datetime64[ns]':
             date_columns.append(col)
         
         # 尝试转换为日期类型
-        if df[col].dtype == 'object':
-            try:
-                pd.to_datetime(df[col], errors='raise')
+        elif df[col].dtype == 'object':
+            if stats.parses_as_datetime(col):
                 date_columns.append(col)
-            except:
-                pass
     
-    # 如果没有找到日期列，返回默认分数
-    if not date_columns:
-        return 50.0  # 默认中等分数
+    return date_columns
+
+def get_latest_dates(df, date_columns, stats=None):
+    """
+    获取各日期列中的最新日期
     
-    # 分析最新的日期列
-    latest_dates = []
+    Args:
+        df: pandas DataFrame
+        date_columns: 日期列名列表
+        stats: 本次评估共享的列统计缓存（可选）
+        
+    Returns:
+        dict: {列名: 最新日期}，全部无法解析的列不包含在内
+    """
+    if stats is None:
+        stats = ColumnStats(df)
+    
+    latest_dates = {}
     for col in date_columns:
         try:
-            dates = pd.to_datetime(df[col], errors='coerce')
+            dates = stats.datetimes(col)
             if not dates.isna().all():
-                latest = dates.max()
-                latest_dates.append(latest)
+                latest_dates[col] = dates.max()
         except:
             pass
+    return latest_dates
+
+def score_timeliness(most_recent):
+    """
+    根据最新日期计算时效性得分
     
-    if not latest_dates:
-        return 50.0  # 默认中等分数
-    
+    Args:
+        most_recent: 数据中的最新日期
+        
+    Returns:
+        float: 时效性得分 (0-100)
+    """
     # 计算最新日期与当前日期的差距
-    most_recent = max(latest_dates)
     days_diff = (datetime.now() - most_recent).days
     
     # 根据差距计算时效性得分
@@ -431,13 +748,7 @@ def calculate_business_value(quality_score, completeness_score, consistency_scor
         float: 业务价值得分 (0-100)
     """
     # 权重设置
-    weights = {
-        'quality': 0.2,
-        'completeness': 0.2,
-        'consistency': 0.15,
-        'accuracy': 0.25,
-        'timeliness': 0.2
-    }
+    weights = BUSINESS_VALUE_WEIGHTS
     
     # 计算加权得分
     business_value = (
@@ -450,16 +761,20 @@ def calculate_business_value(quality_score, completeness_score, consistency_scor
     
     return round(business_value, 2)
 
-def evaluate_default_accuracy(df):
+def evaluate_default_accuracy(df, stats=None):
     """
     默认的准确性评估（当没有自定义规则时使用）
     
     Args:
         df: pandas DataFrame
+        stats: 本次评估共享的列统计缓存（可选）
         
     Returns:
         float: 准确性得分 (0-100)
     """
+    if stats is None:
+        stats = ColumnStats(df)
+    
     accuracy_scores = []
     
     for col in df.columns:
@@ -467,24 +782,20 @@ def evaluate_default_accuracy(df):
         
         # 数值型列的准确性评估
         if np.issubdtype(df[col].dtype, np.number):
-            # 检查异常值（超出3倍标准差）
-            if df[col].std() > 0:
-                z_scores = np.abs((df[col] - df[col].mean()) / df[col].std())
-                outlier_ratio = (z_scores > 3).mean()
-                col_score = max(0, 100 - outlier_ratio * 100)
-            else:
-                col_score = 100  # 如果标准差为0，所有值相同，准确性高
+            # 检查异常值（默认为超出3倍标准差的值；标准差为0时所有值相同，没有异常值）
+            outlier_ratio = stats.outlier_count(col) / len(df) if len(df) else 0
+            col_score = max(0, 100 - outlier_ratio * 100)
         
         # 字符串列的准确性评估
         elif df[col].dtype == 'object':
             # 检查空字符串和无效值
-            valid_ratio = (~df[col].isna() & (df[col].astype(str).str.strip() != '')).mean()
+            valid_ratio = stats.valid_string_mask(col).mean()
             col_score = valid_ratio * 100
         
         # 日期列的准确性评估
         elif df[col].dtype == 'datetime64[ns]':
             # 检查有效日期
-            valid_ratio = (~df[col].isna()).mean()
+            valid_ratio = (~stats.null_mask(col)).mean()
             col_score = valid_ratio * 100
         
         accuracy_scores.append(col_score)
@@ -492,67 +803,42 @@ def evaluate_default_accuracy(df):
     # 返回平均准确性得分
     return round(sum(accuracy_scores) / len(accuracy_scores), 2) if accuracy_scores else 50.0
 
-def evaluate_value_dimensions(df):
+def evaluate_value_dimensions(df, stats=None):
     """
     评估数据价值维度
     
     Args:
         df: pandas DataFrame
+        stats: 本次评估共享的列统计缓存（可选）
         
     Returns:
         dict: 包含各价值维度评估结果的字典
     """
-    dimensions = {
-        '数据完整性': {
-            'score': 0,
-            'description': '数据完整性和覆盖率评估'
-        },
-        '数据准确性': {
-            'score': 0,
-            'description': '数据准确性和可靠性评估'
-        },
-        '数据时效性': {
-            'score': 0,
-            'description': '数据时效性和新鲜度评估'
-        },
-        '数据一致性': {
-            'score': 0,
-            'description': '数据一致性和标准化评估'
-        },
-        '数据可用性': {
-            'score': 0,
-            'description': '数据可用性和易用性评估'
-        }
-    }
+    if stats is None:
+        stats = ColumnStats(df)
     
     # 计算数据完整性得分
-    completeness_score = (1 - df.isna().mean().mean()) * 100
-    dimensions['数据完整性']['score'] = round(completeness_score, 2)
+    null_ratios = pd.Series([stats.null_ratio(col) for col in df.columns], dtype='float64')
+    completeness_score = (1 - null_ratios.mean()) * 100
     
     # 计算数据准确性得分（基于数据类型和值范围）
     accuracy_scores = []
     for col in df.columns:
         if np.issubdtype(df[col].dtype, np.number):
             # 数值型列：检查异常值
-            if df[col].std() > 0:
-                z_scores = np.abs((df[col] - df[col].mean()) / df[col].std())
-                outlier_ratio = (z_scores > 3).mean()
-                accuracy_scores.append(100 - outlier_ratio * 100)
-            else:
-                accuracy_scores.append(100)
+            outlier_ratio = stats.outlier_count(col) / len(df) if len(df) else 0
+            accuracy_scores.append(100 - outlier_ratio * 100)
         else:
             # 非数值型列：检查有效值比例
-            valid_ratio = (~df[col].isna()).mean()
+            valid_ratio = (~stats.null_mask(col)).mean()
             accuracy_scores.append(valid_ratio * 100)
     
-    dimensions['数据准确性']['score'] = round(sum(accuracy_scores) / len(accuracy_scores), 2) if accuracy_scores else 50.0
-    
     # 计算数据一致性得分
     consistency_scores = []
     for col in df.columns:
         if df[col].dtype == 'object':
             # 字符串列：检查格式一致性（例如长度分布）
-            str_lens = df[col].astype(str).str.len()
+            str_lens = stats.string_lengths(col)
             if str_lens.std() > 0:
                 # 长度标准差越小，一致性越高
                 consistency_score = max(0, 100 - (str_lens.std() / str_lens.mean()) * 100)
@@ -562,6 +848,46 @@ def evaluate_value_dimensions(df):
         else:
             consistency_scores.append(100)  # 数值型列默认一致性高
     
+    return build_value_dimensions(completeness_score, accuracy_scores, consistency_scores, len(df))
+
+def build_value_dimensions(completeness_score, accuracy_scores, consistency_scores, row_count):
+    """
+    根据各列得分构建价值维度评估结果
+    
+    Args:
+        completeness_score: 数据完整性得分
+        accuracy_scores: 各列准确性得分列表
+        consistency_scores: 各列一致性得分列表
+        row_count: 数据行数
+        
+    Returns:
+        dict: 包含各价值维度评估结果的字典
+    """
+    dimensions = {
+        '数据完整性': {
+            'score': 0,
+            'description': '数据完整性和覆盖率评估'
+        },
+        '数据准确性': {
+            'score': 0,
+            'description': '数据准确性和可靠性评估'
+        },
+        '数据时效性': {
+            'score': 0,
+            'description': '数据时效性和新鲜度评估'
+        },
+        '数据一致性': {
+            'score': 0,
+            'description': '数据一致性和标准化评估'
+        },
+        '数据可用性': {
+            'score': 0,
+            'description': '数据可用性和易用性评估'
+        }
+    }
+    
+    dimensions['数据完整性']['score'] = round(completeness_score, 2)
+    dimensions['数据准确性']['score'] = round(sum(accuracy_scores) / len(accuracy_scores), 2) if accuracy_scores else 50.0
     dimensions['数据一致性']['score'] = round(sum(consistency_scores) / len(consistency_scores), 2) if consistency_scores else 100.0
     
     # 计算数据可用性得分
@@ -569,7 +895,7 @@ def evaluate_value_dimensions(df):
         dimensions['数据完整性']['score'] * 0.3 +
         dimensions['数据准确性']['score'] * 0.3 +
         dimensions['数据一致性']['score'] * 0.2 +
-        (100 if len(df) > 0 else 0) * 0.2  # 数据量得分
+        (100 if row_count > 0 else 0) * 0.2  # 数据量得分
     )
     dimensions['数据可用性']['score'] = round(usability_score, 2)
     
@@ -586,10 +912,7 @@ def calculate_overall_value(results):
         float: 综合价值得分 (0-100)
     """
     # 权重设置
-    weights = {
-        'quality': 0.3,
-        'business_value': 0.7
-    }
+    weights = OVERALL_VALUE_WEIGHTS
     
     # 计算加权得分
     overall_value = (
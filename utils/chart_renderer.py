@@ -0,0 +1,312 @@
+"""
+服务端渲染的PNG图表
+
+用于报告和邮件等无法执行前端脚本的场景：数值列直方图、缺失值比例柱状图和评分雷达图，
+数据来自缓存的摘要图表数据和评估图表数据，用matplotlib渲染为PNG。
+
+渲染结果按 (数据版本, 图表参数) 缓存在磁盘上：数据集的数据版本是摘要缓存键（包含文件内容哈希），
+评估的数据版本由评估ID、状态和完成时间决定。缓存总大小超过 CHART_CACHE_MAX_BYTES 时
+按最近访问时间淘汰，数据变化后旧的图片不再命中，随后被淘汰。
+"""
+import os
+import json
+import hashlib
+import threading
+import warnings
+from io import BytesIO
+from utils.settings import get_setting, get_cache_folder
+from utils.disk_cache import atomic_write, evict, remove_entries
+
+# 渲染方式变化时递增版本号，旧的图片不再命中
+CHART_RENDER_VERSION = 1
+
+# 各类对象支持的图表
+CHART_KINDS = {
+    'dataset': ('histogram', 'missing'),
+    'assessment': ('radar',)
+}
+
+# 图片尺寸（像素）
+DEFAULT_WIDTH = 800
+DEFAULT_HEIGHT = 500
+MIN_SIZE = 200
+MAX_SIZE = 2000
+CHART_DPI = 100
+
+# 依次尝试的中文字体，都不存在时使用matplotlib的默认字体
+CJK_FONTS = ['SimHei', 'Microsoft YaHei', 'PingFang SC', 'Noto Sans CJK SC', 'WenQuanYi Micro Hei', 'DejaVu Sans']
+
+# matplotlib 的全局状态（字体缓存等）不是线程安全的，同一进程内逐个渲染
+_render_lock = threading.Lock()
+
+def make_chart_spec(target, kind, column=None, width=None, height=None):
+    """
+    构建并校验图表参数
+
+    Args:
+        target: dataset 或 assessment
+        kind: 图表类型，见 CHART_KINDS
+        column: 直方图的列名（可选，默认第一个数值列）
+        width: 宽度像素（可选）
+        height: 高度像素（可选）
+
+    Returns:
+        dict: 图表参数
+
+    Raises:
+        ValueError: 图表类型不支持
+    """
+    if kind not in CHART_KINDS.get(target, ()):
+        raise ValueError(f"不支持的图表类型: {kind}")
+    return {
+        'target': target,
+        'kind': kind,
+        'column': column if kind == 'histogram' else None,
+        'width': min(max(int(width or DEFAULT_WIDTH), MIN_SIZE), MAX_SIZE),
+        'height': min(max(int(height or DEFAULT_HEIGHT), MIN_SIZE), MAX_SIZE)
+    }
+
+def get_dataset_chart_version(dataset):
+    """
+    数据集图表的数据版本，文件内容变化后随之变化
+
+    Args:
+        dataset: 数据集模型实例
+
+    Returns:
+        str: 数据版本
+
+    Raises:
+        OSError: 数据文件不存在
+    """
+    from utils.summary_cache import get_summary_cache_key
+    return f"dataset-{get_summary_cache_key(dataset.file_path)}"
+
+def get_assessment_chart_version(assessment):
+    """
+    评估图表的数据版本，评估重新执行或状态变化后随之变化
+
+    Args:
+        assessment: 评估模型实例
+
+    Returns:
+        str: 数据版本
+    """
+    completed_at = assessment.completed_at.strftime('%Y%m%d%H%M%S%f') if assessment.completed_at else '0'
+    return f"assessment-{assessment.id}-{assessment.status}-{completed_at}"
+
+def get_chart_cache_key(version, spec):
+    """
+    计算图片的缓存键
+
+    数据版本作为前缀，便于删除数据集或评估时删除其全部图片。
+
+    Args:
+        version: 数据版本
+        spec: make_chart_spec 返回的图表参数
+
+    Returns:
+        str: 缓存键
+    """
+    digest = hashlib.sha256(json.dumps({
+        'render_version': CHART_RENDER_VERSION,
+        'spec': spec
+    }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return f"{version}_{digest}"
+
+def get_dataset_chart_png(dataset, spec, version=None):
+    """
+    获取数据集图表的PNG，缓存中没有时渲染并保存
+
+    Args:
+        dataset: 数据集模型实例
+        spec: make_chart_spec 返回的图表参数
+        version: 数据版本（可选，默认由 get_dataset_chart_version 计算）
+
+    Returns:
+        bytes: PNG数据
+
+    Raises:
+        ValueError: 数据集没有可以绘制的数据
+    """
+    from utils.summary_cache import get_or_build_summary
+
+    version = version or get_dataset_chart_version(dataset)
+
+    def render():
+        payload = get_or_build_summary(dataset.file_path, file_type=dataset.file_type)
+        if spec['kind'] == 'histogram':
+            return render_histogram(_find_histogram(payload, spec['column']), spec['width'], spec['height'])
+        return render_missing(payload.get('missing_data') or {}, spec['width'], spec['height'])
+
+    return _get_or_render(get_chart_cache_key(version, spec), render)
+
+def get_assessment_chart_png(assessment, spec, version=None):
+    """
+    获取评估图表的PNG，缓存中没有时渲染并保存
+
+    Args:
+        assessment: 评估模型实例
+        spec: make_chart_spec 返回的图表参数
+        version: 数据版本（可选，默认由 get_assessment_chart_version 计算）
+
+    Returns:
+        bytes: PNG数据
+    """
+    from utils.visualization_helper import generate_assessment_charts
+
+    version = version or get_assessment_chart_version(assessment)
+
+    def render():
+        charts = generate_assessment_charts(assessment)['charts']
+        radar = next(chart for chart in charts if chart['type'] == 'radar')
+        return render_radar(radar, spec['width'], spec['height'])
+
+    return _get_or_render(get_chart_cache_key(version, spec), render)
+
+def render_histogram(chart, width, height):
+    """
+    渲染直方图
+
+    Args:
+        chart: 摘要图表数据中 type 为 histogram 的图表
+        width: 宽度像素
+        height: 高度像素
+
+    Returns:
+        bytes: PNG数据
+    """
+    fig, ax = _new_figure(width, height)
+    counts = chart['series'][0]['data']
+    ax.bar(range(len(counts)), counts, width=0.9, color='#4e73df')
+    ax.set_xticks(range(len(counts)))
+    ax.set_xticklabels(chart['categories'], rotation=45, ha='right', fontsize=8)
+    ax.set_ylabel('count')
+    ax.set_title(chart['title'])
+    return figure_to_png(fig)
+
+def render_missing(missing_data, width, height, limit=10):
+    """
+    渲染缺失值比例柱状图（缺失比例最高的若干列）
+
+    Args:
+        missing_data: 摘要图表数据中的 missing_data
+        width: 宽度像素
+        height: 高度像素
+        limit: 最多显示的列数
+
+    Returns:
+        bytes: PNG数据
+    """
+    fig, ax = _new_figure(width, height)
+    columns = (missing_data.get('columns') or [])[:limit]
+    if columns:
+        names = [name for name, _ in columns]
+        ax.barh(range(len(columns)), [pct for _, pct in columns], color='#e74a3b')
+        ax.set_yticks(range(len(columns)))
+        ax.set_yticklabels(names, fontsize=8)
+        ax.invert_yaxis()
+        ax.set_xlim(0, 100)
+    else:
+        ax.text(0.5, 0.5, '没有缺失值', ha='center', va='center', transform=ax.transAxes)
+        ax.set_axis_off()
+    ax.set_xlabel('%')
+    ax.set_title('缺失值比例')
+    return figure_to_png(fig)
+
+def render_radar(chart, width, height):
+    """
+    渲染评分雷达图
+
+    Args:
+        chart: 评估图表数据中 type 为 radar 的图表
+        width: 宽度像素
+        height: 高度像素
+
+    Returns:
+        bytes: PNG数据
+    """
+    import numpy as np
+
+    fig, _ = _new_figure(width, height, polar=True)
+    ax = fig.axes[0]
+    categories = chart['categories']
+    values = [float(value or 0) for value in chart['series'][0]['data']]
+    angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False).tolist()
+    # 首尾相连
+    ax.plot(angles + angles[:1], values + values[:1], color='#1cc88a', linewidth=2)
+    ax.fill(angles + angles[:1], values + values[:1], color='#1cc88a', alpha=0.25)
+    ax.set_xticks(angles)
+    ax.set_xticklabels(categories)
+    ax.set_ylim(0, 100)
+    ax.set_title(chart['title'])
+    return figure_to_png(fig)
+
+def figure_to_png(fig):
+    """
+    把matplotlib图形保存为PNG
+
+    Args:
+        fig: matplotlib.figure.Figure
+
+    Returns:
+        bytes: PNG数据
+    """
+    buf = BytesIO()
+    with warnings.catch_warnings():
+        # 没有中文字体时缺字的警告
+        warnings.simplefilter('ignore', UserWarning)
+        fig.savefig(buf, format='png', dpi=CHART_DPI)
+    return buf.getvalue()
+
+def remove_assessment_charts(assessment_id):
+    """
+    删除评估的全部图片
+
+    Args:
+        assessment_id: 评估ID
+
+    Returns:
+        int: 删除的图片数量
+    """
+    return remove_entries(get_cache_folder('charts'), f"assessment-{assessment_id}-*.png")
+
+def _new_figure(width, height, polar=False):
+    """创建不依赖pyplot全局状态的图形"""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(width / CHART_DPI, height / CHART_DPI), dpi=CHART_DPI, layout='tight')
+    ax = fig.add_subplot(projection='polar' if polar else None)
+    return fig, ax
+
+def _find_histogram(payload, column):
+    """在摘要图表数据中找到列的直方图；未指定列时使用第一个"""
+    for chart in payload.get('charts', []):
+        if chart['type'] == 'histogram' and (column is None or chart['series'][0]['name'] == column):
+            return chart
+    raise ValueError(f"没有列 {column} 的直方图" if column else "数据集没有数值列")
+
+def _get_or_render(key, render):
+    """读取缓存的图片，未命中时渲染并保存"""
+    path = os.path.join(get_cache_folder('charts'), key + '.png')
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)
+        return data
+    except OSError:
+        pass
+
+    with _render_lock:
+        from matplotlib import rcParams
+        rcParams['font.sans-serif'] = CJK_FONTS + [font for font in rcParams['font.sans-serif'] if font not in CJK_FONTS]
+        rcParams['axes.unicode_minus'] = False
+        data = render()
+
+    try:
+        atomic_write(path, lambda f: f.write(data), binary=True)
+    except OSError as e:
+        print(f"Error saving chart image {path}: {str(e)}")
+        return data
+    evict(get_cache_folder('charts'), '.png', get_setting('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    return data
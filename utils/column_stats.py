@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+from utils.settings import get_setting
+from utils.outlier_kernel import is_numeric_dtype, numeric_arrays, compute_outlier_counts
+from utils.date_detection import get_date_sample, sniff_date_format, detect_dates, parse_dates
+from utils.sketches import (
+    SKETCH_EXACT_LIMIT, SKETCH_HLL_PRECISION, TDIGEST_COMPRESSION, SPACE_SAVING_CAPACITY,
+    DistinctCounter, TDigest, SpaceSaving, hash_values
+)
+
+# 构建草图时每次处理的行数，限制哈希等临时数组的大小
+SKETCH_BLOCK_ROWS = 65536
+
+class ColumnStats:
+    """
+    单次评估内共享的列统计缓存
+
+    各评估阶段（数据质量、规则、准确性、时效性、价值维度）都通过它获取
+    空值掩码、均值/标准差、排序后的数值、字符串副本及长度、值计数、
+    日期解析结果和唯一值计数。
+    每项统计在首次请求时计算，之后直接返回缓存结果；hits/misses 记录命中情况。
+    全部数值列的均值、标准差和异常值数量由 outlier_kernel 按行分块批量计算。
+    近似统计模式下，唯一值数量、中位数和高频值改由按块构建的草图（见 sketches）估计。
+    """
+
+    def __init__(self, df, outlier_detector=None, approximate=None):
+        self.df = df
+        self.outlier_detector = outlier_detector or get_setting('ASSESSMENT_OUTLIER_DETECTOR', 'zscore')
+        if approximate is None:
+            approximate = get_setting('ASSESSMENT_APPROXIMATE_STATS', False)
+        self.approximate = approximate
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}
+
+    def _get(self, key, compute):
+        """返回缓存的统计量，不存在时调用compute计算并缓存"""
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+        self.misses += 1
+        value = compute()
+        self._cache[key] = value
+        return value
+
+    def null_mask(self, col):
+        """列的空值掩码"""
+        return self._get(('null_mask', col), lambda: self.df[col].isna())
+
+    def null_ratio(self, col):
+        """列的空值比例"""
+        return self._get(('null_ratio', col), lambda: self.null_mask(col).mean())
+
+    def nunique(self, col):
+        """列的唯一值数量（不含空值）；近似统计模式下为估计值"""
+        def compute():
+            if self.approximate:
+                # 估计值不超过非空值数量，唯一性比例不会超过100%
+                return min(self.distinct_sketch(col).count(), int((~self.null_mask(col)).sum()))
+            return self.df[col].nunique()
+        return self._get(('nunique', col), compute)
+
+    def distinct_sketch(self, col):
+        """列的去重计数草图"""
+        def compute():
+            counter = DistinctCounter(SKETCH_EXACT_LIMIT, SKETCH_HLL_PRECISION)
+            for block in self._blocks(col):
+                counter.add_hashes(hash_values(block))
+            return counter
+        return self._get(('distinct_sketch', col), compute)
+
+    def quantile_sketch(self, col):
+        """数值列的t-digest分位数草图"""
+        def compute():
+            digest = TDigest(TDIGEST_COMPRESSION)
+            for block in self._blocks(col):
+                digest.add_values(block.to_numpy(dtype='float64', na_value=np.nan))
+            return digest
+        return self._get(('quantile_sketch', col), compute)
+
+    def top_values_sketch(self, col):
+        """列的Space-Saving高频值草图"""
+        def compute():
+            sketch = SpaceSaving(SPACE_SAVING_CAPACITY)
+            for block in self._blocks(col):
+                sketch.add_series(block)
+            return sketch
+        return self._get(('top_values_sketch', col), compute)
+
+    def _blocks(self, col):
+        """按 SKETCH_BLOCK_ROWS 行切分列"""
+        series = self.df[col]
+        for start in range(0, len(series), SKETCH_BLOCK_ROWS):
+            yield series.iloc[start:start + SKETCH_BLOCK_ROWS]
+
+    def value_counts(self, col):
+        """列中各值（含空值）的出现次数"""
+        return self._get(('value_counts', col), lambda: self.df[col].value_counts(dropna=False))
+
+    def numeric_outliers(self):
+        """
+        全部数值列的均值、标准差和异常值数量（按 outlier_detector 判定）
+
+        Returns:
+            dict: {列名: (均值, 标准差, 异常值数量)}
+        """
+        def compute():
+            columns = [col for col in self.df.columns if is_numeric_dtype(self.df[col].dtype)]
+            if not columns:
+                return {}
+            result = compute_outlier_counts(numeric_arrays(self.df, columns), (self.outlier_detector,))
+            counts = result['outliers'][self.outlier_detector]
+            return {
+                col: (result['mean'][i], result['std'][i], int(counts[i]))
+                for i, col in enumerate(columns)
+            }
+        return self._get(('numeric_outliers',), compute)
+
+    def moments(self, col):
+        """数值列的 (均值, 标准差)"""
+        def compute():
+            outliers = self.numeric_outliers()
+            if col in outliers:
+                return outliers[col][:2]
+            return self.df[col].mean(), self.df[col].std()
+        return self._get(('moments', col), compute)
+
+    def outlier_count(self, col):
+        """
+        数值列的异常值数量
+
+        Returns:
+            int: 异常值数量；尺度（例如标准差）不大于0时为0
+        """
+        def compute():
+            outliers = self.numeric_outliers()
+            return outliers[col][2] if col in outliers else 0
+        return self._get(('outlier_count', col), compute)
+
+    def sorted_values(self, col):
+        """数值列去除空值后升序排列的float64数组"""
+        def compute():
+            values = self.df[col].to_numpy(dtype='float64', na_value=np.nan)
+            return np.sort(values[~np.isnan(values)])
+        return self._get(('sorted_values', col), compute)
+
+    def strings(self, col):
+        """列转换为字符串后的副本"""
+        return self._get(('strings', col), lambda: self.df[col].astype(str))
+
+    def valid_string_mask(self, col):
+        """非空且去除首尾空白后不为空字符串的掩码"""
+        return self._get(
+            ('valid_string_mask', col),
+            lambda: ~self.null_mask(col) & (self.strings(col).str.strip() != '')
+        )
+
+    def string_value_counts(self, col):
+        """列转换为字符串后各值的出现次数"""
+        return self._get(('string_value_counts', col), lambda: self.strings(col).value_counts())
+
+    def string_lengths(self, col):
+        """列转换为字符串后的长度"""
+        return self._get(('string_lengths', col), lambda: self.strings(col).str.len())
+
+    def date_sample(self, col):
+        """列中用于推断日期格式的非空样本"""
+        return self._get(('date_sample', col), lambda: get_date_sample(self.df[col]))
+
+    def date_format(self, col):
+        """
+        字符串列使用的日期格式
+
+        Returns:
+            str: 日期格式；不是字符串列或样本不匹配任何固定格式时返回None
+        """
+        def compute():
+            if self.df[col].dtype != 'object':
+                return None
+            return sniff_date_format(self.date_sample(col))
+        return self._get(('date_format', col), compute)
+
+    def parses_as_datetime(self, col):
+        """
+        列的全部值是否都能解析为日期
+
+        先用样本推断日期格式，整列只按推断出的格式解析一次；
+        解析成功时结果同时作为 datetimes 的缓存，不再重复解析。
+        """
+        def compute():
+            _, dates = detect_dates(self.df[col], self.date_sample(col), self.date_format(col))
+            if dates is None:
+                return False
+            self._cache[('datetimes', col)] = dates
+            return True
+        return self._get(('parses_as_datetime', col), compute)
+
+    def datetimes(self, col):
+        """列解析为日期的结果，无法解析的值为NaT"""
+        return self._get(('datetimes', col), lambda: parse_dates(self.df[col], self.date_format(col)))
+
+    def summary(self):
+        """
+        缓存命中情况
+
+        Returns:
+            dict: 包含 hits、misses 的字典
+        """
+        return {'hits': self.hits, 'misses': self.misses}
@@ -1,38 +1,58 @@
 import os
 import json
+import warnings
 import pandas as pd
 import numpy as np
+from utils.dataset_loader import SUPPORTED_FILE_TYPES, get_file_type, load_dataset, load_preview, read_json_file
+from utils.dataset_profile import build_dataset_profile, build_streamed_profile, save_dataset_profile
+from utils.memory_budget import plan_memory_strategy, format_budget_error
+from utils.column_stats import ColumnStats
 
 def get_file_info(file_path):
     """
     获取文件的基本信息
     
+    整体载入前先检查内存预算；超出预算的CSV/JSON文件分块扫描，
+    由分块生成的档案得到行列数和列信息（没有中位数），选择的方式记录在 memory_budget 中。
+    
     Args:
         file_path: 文件路径
         
     Returns:
-        dict: 包含文件信息的字典
+        dict: 包含文件信息的字典；超出内存预算且无法分块读取时包含 error
     """
     file_info = {
-        'file_type': os.path.splitext(file_path)[1][1:].lower(),
+        'file_type': get_file_type(file_path),
         'size_bytes': os.path.getsize(file_path)
     }
     
     # 根据文件类型读取更多信息
     try:
-        if file_info['file_type'] in ['csv']:
-            df = pd.read_csv(file_path)
-            file_info.update(_get_dataframe_info(df))
-        elif file_info['file_type'] in ['xlsx', 'xls']:
-            df = pd.read_excel(file_path)
-            file_info.update(_get_dataframe_info(df))
-        elif file_info['file_type'] == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                df = pd.DataFrame(data)
-                file_info.update(_get_dataframe_info(df))
-            else:
+        if file_info['file_type'] in SUPPORTED_FILE_TYPES:
+            plan = plan_memory_strategy(file_path, file_info['file_type'])
+            if plan is not None:
+                file_info['memory_budget'] = plan
+            if plan is not None and plan['strategy'] == 'rejected':
+                file_info['error'] = format_budget_error(plan)
+                return file_info
+            if plan is not None and plan['strategy'] != 'memory':
+                profile = build_streamed_profile(file_path, file_info['file_type'])
+                file_info.update(_get_profile_info(profile))
+                save_dataset_profile(file_path, profile)
+                return file_info
+            
+            try:
+                df = load_dataset(file_path, file_info['file_type'])
+                stats = ColumnStats(df)
+                file_info.update(_get_dataframe_info(df, stats))
+                
+                # 保存完整的列档案，供评估和可视化直接使用
+                save_dataset_profile(file_path, build_dataset_profile(df, schema=file_info['schema'], stats=stats))
+            except ValueError:
+                if file_info['file_type'] != 'json':
+                    raise
+                # JSON不是对象列表时，只记录其结构信息
+                data = read_json_file(file_path)
                 file_info['row_count'] = 1 if data else 0
                 file_info['column_count'] = len(data) if isinstance(data, dict) else 0
                 file_info['schema'] = {'type': 'json', 'structure': 'object'}
@@ -41,60 +61,172 @@ def get_file_info(file_path):
     
     return file_info
 
-def _get_dataframe_info(df):
+def _get_profile_info(profile):
+    """
+    由分块生成的数据集档案得到与 _get_dataframe_info 相同结构的信息
+    
+    Args:
+        profile: build_streamed_profile 生成的档案
+        
+    Returns:
+        dict: 包含 row_count、column_count、schema 的字典
+    """
+    schema = []
+    for column in profile['columns']:
+        keys = ['name', 'type', 'unique_count', 'missing_count', 'missing_percentage']
+        if column['kind'] == 'numeric':
+            keys += ['min', 'max', 'mean', 'std']
+        schema.append({key: column.get(key) for key in keys})
+    return {
+        'row_count': profile['row_count'],
+        'column_count': profile['column_count'],
+        'schema': schema
+    }
+
+def _get_dataframe_info(df, stats=None):
     """
     获取DataFrame的信息
     
+    数值列的统计量在整个数值块（二维数组）上一次性计算，
+    字符串列的长度统计在整个字符串块上一次性计算。
+    近似统计模式下，唯一值数量和中位数由列统计缓存中的草图估计，不再精确计算。
+    
     Args:
         df: pandas DataFrame
+        stats: 列统计缓存（可选）
         
     Returns:
         dict: 包含DataFrame信息的字典
     """
+    if stats is None:
+        stats = ColumnStats(df)
+    
     info = {
         'row_count': len(df),
         'column_count': len(df.columns)
     }
     
+    # 缺失值和唯一值计数
+    missing_counts = df.isna().sum().to_numpy()
+    missing_ratios = missing_counts / len(df) if len(df) > 0 else np.full(len(df.columns), np.nan)
+    
+    # 按列类型分块
+    numeric_positions = [i for i, dtype in enumerate(df.dtypes) if np.issubdtype(dtype, np.number)]
+    numeric_set = set(numeric_positions)
+    string_positions = [i for i, dtype in enumerate(df.dtypes) if i not in numeric_set and dtype == 'object']
+    
+    numeric_stats = dict(zip(
+        numeric_positions,
+        _profile_numeric_block(df.iloc[:, numeric_positions], median=not stats.approximate)
+    )) if numeric_positions else {}
+    string_stats = dict(zip(string_positions, _profile_string_block(df.iloc[:, string_positions]))) if string_positions else {}
+    
+    if stats.approximate:
+        unique_counts = [stats.nunique(col) for col in df.columns]
+        for i in numeric_positions:
+            numeric_stats[i]['median'] = stats.quantile_sketch(df.columns[i]).quantile(0.5)
+    else:
+        unique_counts = df.nunique().to_numpy()
+    
     # 获取列信息
     columns = []
-    for col in df.columns:
+    for i, col in enumerate(df.columns):
         col_info = {
             'name': col,
-            'type': str(df[col].dtype),
-            'unique_count': int(df[col].nunique()),
-            'missing_count': int(df[col].isna().sum()),
-            'missing_percentage': float(round(df[col].isna().mean() * 100, 2))
+            'type': str(df.dtypes.iloc[i]),
+            'unique_count': int(unique_counts[i]),
+            'missing_count': int(missing_counts[i]),
+            'missing_percentage': float(round(missing_ratios[i] * 100, 2))
         }
         
         # 对于数值型列，添加统计信息
-        if np.issubdtype(df[col].dtype, np.number):
-            col_info.update({
-                'min': float(df[col].min()) if not pd.isna(df[col].min()) else None,
-                'max': float(df[col].max()) if not pd.isna(df[col].max()) else None,
-                'mean': float(df[col].mean()) if not pd.isna(df[col].mean()) else None,
-                'median': float(df[col].median()) if not pd.isna(df[col].median()) else None,
-                'std': float(df[col].std()) if not pd.isna(df[col].std()) else None
-            })
+        if i in numeric_stats:
+            col_info.update(numeric_stats[i])
         
         # 对于字符串列，添加长度信息
-        elif df[col].dtype == 'object':
-            try:
-                str_lens = df[col].astype(str).str.len()
-                col_info.update({
-                    'min_length': int(str_lens.min()) if not pd.isna(str_lens.min()) else None,
-                    'max_length': int(str_lens.max()) if not pd.isna(str_lens.max()) else None,
-                    'mean_length': float(str_lens.mean()) if not pd.isna(str_lens.mean()) else None
-                })
-            except:
-                pass
+        elif i in string_stats:
+            col_info.update(string_stats[i])
         
         columns.append(col_info)
     
     info['schema'] = columns
     return info
 
-def process_dataset_file(file_path, preview=False, limit=100):
+def _profile_numeric_block(numeric_df, median=True):
+    """
+    在数值块（二维数组）上一次性计算各列的统计量
+    
+    Args:
+        numeric_df: 只包含数值列的DataFrame
+        median: 是否计算中位数（否则为None）
+        
+    Returns:
+        list: 按列顺序排列的统计量字典
+    """
+    values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+    n_cols = values.shape[1]
+    if values.shape[0] == 0:
+        return [dict.fromkeys(['min', 'max', 'mean', 'median', 'std']) for _ in range(n_cols)]
+    
+    # 全为空的列会产生 "All-NaN slice" 警告，结果为NaN，随后转换为None
+    with np.errstate(all='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mins = np.nanmin(values, axis=0)
+        maxs = np.nanmax(values, axis=0)
+        means = np.nanmean(values, axis=0)
+        medians = np.nanmedian(values, axis=0) if median else np.full(n_cols, np.nan)
+        stds = np.nanstd(values, axis=0, ddof=1)
+    
+    # 非空值少于2个时标准差为NaN，与pandas保持一致
+    counts = values.shape[0] - np.isnan(values).sum(axis=0)
+    stds = np.where(counts > 1, stds, np.nan)
+    
+    def _clean(value):
+        return None if np.isnan(value) else float(value)
+    
+    return [
+        {
+            'min': _clean(mins[j]),
+            'max': _clean(maxs[j]),
+            'mean': _clean(means[j]),
+            'median': _clean(medians[j]),
+            'std': _clean(stds[j])
+        }
+        for j in range(n_cols)
+    ]
+
+def _profile_string_block(string_df):
+    """
+    在字符串块上一次性计算各列的字符串长度统计
+    
+    Args:
+        string_df: 只包含object列的DataFrame
+        
+    Returns:
+        list: 按列顺序排列的长度统计字典；计算失败时返回空列表
+    """
+    try:
+        n_rows, n_cols = string_df.shape
+        flat = pd.Series(string_df.to_numpy().ravel(order='F'), dtype=object)
+        lengths = flat.astype(str).str.len().to_numpy(dtype=np.float64).reshape(n_cols, n_rows).T
+        if n_rows == 0:
+            return [{'min_length': None, 'max_length': None, 'mean_length': None} for _ in range(n_cols)]
+        mins = lengths.min(axis=0)
+        maxs = lengths.max(axis=0)
+        means = lengths.mean(axis=0)
+    except Exception:
+        return []
+    
+    return [
+        {
+            'min_length': int(mins[j]),
+            'max_length': int(maxs[j]),
+            'mean_length': float(means[j])
+        }
+        for j in range(n_cols)
+    ]
+
+def process_dataset_file(file_path, preview=False, limit=100, offset=0):
     """
     处理数据集文件，返回数据或预览
     
@@ -102,108 +234,114 @@ def process_dataset_file(file_path, preview=False, limit=100):
         file_path: 文件路径
         preview: 是否只返回预览数据
         limit: 预览行数限制
+        offset: 预览的起始行
         
     Returns:
         dict: 包含数据或预览的字典
     """
-    file_type = os.path.splitext(file_path)[1][1:].lower()
+    file_type = get_file_type(file_path)
     result = {'file_type': file_type}
     
     try:
-        if file_type == 'csv':
-            df = pd.read_csv(file_path)
-            if preview:
-                df = df.head(limit)
-            result['data'] = df.to_dict('records')
-            result['columns'] = df.columns.tolist()
+        if file_type not in SUPPORTED_FILE_TYPES:
+            result['error'] = f"不支持的文件类型: {file_type}"
+            return result
         
-        elif file_type in ['xlsx', 'xls']:
-            df = pd.read_excel(file_path)
+        try:
             if preview:
-                df = df.head(limit)
-            result['data'] = df.to_dict('records')
-            result['columns'] = df.columns.tolist()
-        
-        elif file_type == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                df = pd.DataFrame(data)
-                if preview:
-                    df = df.head(limit)
-                result['data'] = df.to_dict('records')
-                result['columns'] = df.columns.tolist()
+                # 预览只读取所需的行，不解析整个文件
+                df = load_preview(file_path, file_type, limit=limit, offset=offset)
             else:
-                result['data'] = data
-                result['preview'] = True
+                df = load_dataset(file_path, file_type)
+        except ValueError:
+            if file_type != 'json':
+                raise
+            # JSON不是对象列表时，直接返回原始内容
+            result['data'] = read_json_file(file_path)
+            result['preview'] = True
+            return result
         
-        else:
-            result['error'] = f"不支持的文件类型: {file_type}"
+        result['data'] = df.to_dict('records')
+        result['columns'] = df.columns.tolist()
+        result['dtypes'] = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
     
     except Exception as e:
         result['error'] = f"处理文件时出错: {str(e)}"
     
     return result
 
-def analyze_data_quality(df):
+def analyze_data_quality(df, stats=None):
     """
     分析数据质量
     
     Args:
         df: pandas DataFrame
+        stats: 本次评估共享的列统计缓存（可选）
         
     Returns:
         dict: 包含数据质量分析结果的字典
     """
-    quality_results = {
-        'completeness': {},
-        'uniqueness': {},
-        'consistency': {},
-        'overall_score': 0
-    }
+    if stats is None:
+        stats = ColumnStats(df)
     
     # 计算完整性 (非空值比例)
     completeness_scores = {}
     for col in df.columns:
-        non_null_ratio = 1 - df[col].isna().mean()
+        non_null_ratio = 1 - stats.null_ratio(col)
         completeness_scores[col] = round(non_null_ratio * 100, 2)
-    quality_results['completeness'] = {
-        'column_scores': completeness_scores,
-        'overall_score': round(sum(completeness_scores.values()) / len(completeness_scores), 2)
-    }
     
     # 计算唯一性 (唯一值比例)
     uniqueness_scores = {}
     for col in df.columns:
-        unique_ratio = df[col].nunique() / len(df) if len(df) > 0 else 0
+        unique_ratio = stats.nunique(col) / len(df) if len(df) > 0 else 0
         uniqueness_scores[col] = round(unique_ratio * 100, 2)
-    quality_results['uniqueness'] = {
-        'column_scores': uniqueness_scores,
-        'overall_score': round(sum(uniqueness_scores.values()) / len(uniqueness_scores), 2)
-    }
     
     # 计算一致性 (基于数据类型的有效值比例)
     consistency_scores = {}
     for col in df.columns:
         # 对于数值型列，检查非无穷大和非NaN的比例
         if np.issubdtype(df[col].dtype, np.number):
-            valid_ratio = (~df[col].isna() & np.isfinite(df[col])).mean()
+            valid_ratio = (~stats.null_mask(col) & np.isfinite(df[col])).mean()
         # 对于日期列，检查可解析为日期的比例
         elif df[col].dtype == 'datetime64[ns]':
-            valid_ratio = (~df[col].isna()).mean()
+            valid_ratio = (~stats.null_mask(col)).mean()
         # 对于字符串列，检查非空字符串的比例
         else:
             try:
-                valid_ratio = (~df[col].isna() & (df[col].astype(str).str.strip() != '')).mean()
+                valid_ratio = stats.valid_string_mask(col).mean()
             except:
-                valid_ratio = (~df[col].isna()).mean()
+                valid_ratio = (~stats.null_mask(col)).mean()
         
         consistency_scores[col] = round(valid_ratio * 100, 2)
     
-    quality_results['consistency'] = {
-        'column_scores': consistency_scores,
-        'overall_score': round(sum(consistency_scores.values()) / len(consistency_scores), 2)
+    return summarize_quality_scores(completeness_scores, uniqueness_scores, consistency_scores)
+
+def summarize_quality_scores(completeness_scores, uniqueness_scores, consistency_scores):
+    """
+    汇总各列的完整性、唯一性和一致性得分
+    
+    Args:
+        completeness_scores: 各列完整性得分
+        uniqueness_scores: 各列唯一性得分
+        consistency_scores: 各列一致性得分
+        
+    Returns:
+        dict: 与 analyze_data_quality 返回值结构相同的字典
+    """
+    quality_results = {
+        'completeness': {
+            'column_scores': completeness_scores,
+            'overall_score': round(sum(completeness_scores.values()) / len(completeness_scores), 2)
+        },
+        'uniqueness': {
+            'column_scores': uniqueness_scores,
+            'overall_score': round(sum(uniqueness_scores.values()) / len(uniqueness_scores), 2)
+        },
+        'consistency': {
+            'column_scores': consistency_scores,
+            'overall_score': round(sum(consistency_scores.values()) / len(consistency_scores), 2)
+        },
+        'overall_score': 0
     }
     
     # 计算总体得分 (各项得分的平均值)
@@ -0,0 +1,477 @@
+import os
+import glob
+import json
+import hashlib
+import pandas as pd
+import numpy as np
+from utils.settings import get_setting, get_cache_folder
+from utils.disk_cache import atomic_write
+
+# pyarrow 为可选依赖，未安装时直接解析原始文件
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+SUPPORTED_FILE_TYPES = ['csv', 'xlsx', 'xls', 'json']
+
+# 支持分块流式读取的文件类型
+STREAMING_FILE_TYPES = ['csv', 'json']
+
+_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# 以pyarrow流式读取CSV时每个批次的字节数
+CSV_BATCH_BLOCK_SIZE = 16 * 1024 * 1024
+
+# 与 pd.read_csv 默认值相同的缺失值和布尔值写法
+CSV_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+CSV_TRUE_VALUES = ['True', 'TRUE', 'true']
+CSV_FALSE_VALUES = ['False', 'FALSE', 'false']
+
+# 进程内的文件哈希缓存：{绝对路径: (文件大小, 修改时间, 哈希值)}
+_hash_memo = {}
+
+def get_file_type(file_path):
+    """
+    根据扩展名获取文件类型
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 小写的文件类型，例如 csv、xlsx、json
+    """
+    return os.path.splitext(file_path)[1][1:].lower()
+
+def get_file_hash(file_path, compute=True):
+    """
+    计算文件内容的SHA-256哈希
+
+    哈希值按 (文件大小, 修改时间) 记录在进程内存和缓存目录中，
+    文件未变化时不会重复读取整个文件。
+
+    Args:
+        file_path: 文件路径
+        compute: 没有已记录的哈希时是否读取文件计算
+
+    Returns:
+        str: 十六进制哈希字符串；compute为False且没有记录时返回None
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+
+    memo = _hash_memo.get(abs_path)
+    if memo and memo[:2] == signature:
+        return memo[2]
+
+    # 查找持久化的哈希记录
+    record_path = os.path.join(
+        get_cache_folder('fingerprints'),
+        hashlib.sha1(abs_path.encode('utf-8')).hexdigest() + '.json'
+    )
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        if (record['size'], record['mtime_ns']) == signature:
+            _hash_memo[abs_path] = signature + (record['hash'],)
+            return record['hash']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if not compute:
+        return None
+
+    digest = hashlib.sha256()
+    with open(abs_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    file_hash = digest.hexdigest()
+
+    _hash_memo[abs_path] = signature + (file_hash,)
+    _atomic_write_json(record_path, {
+        'path': abs_path,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': file_hash
+    })
+    return file_hash
+
+def load_dataset(file_path, file_type=None, use_cache=True):
+    """
+    统一的数据集加载入口
+
+    首次加载时解析原始文件，并按文件内容哈希写入列式缓存（Parquet）；
+    之后的加载直接以内存映射方式读取缓存，不再重新解析CSV/Excel/JSON。
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（可选，默认根据扩展名判断）
+        use_cache: 是否使用列式缓存
+
+    Returns:
+        pandas.DataFrame: 数据集内容
+
+    Raises:
+        ValueError: 文件类型或JSON结构不受支持
+    """
+    file_type = (file_type or get_file_type(file_path)).lower()
+    if file_type not in SUPPORTED_FILE_TYPES:
+        raise ValueError(f"不支持的文件类型: {file_type}")
+
+    if not (use_cache and HAS_PYARROW and get_setting('DATASET_CACHE_ENABLED', True)):
+        return _parse_file(file_path, file_type)
+
+    cache_path = get_columnar_cache_path(file_path)
+    if os.path.exists(cache_path):
+        try:
+            return read_columnar_cache(cache_path, file_type)
+        except Exception as e:
+            print(f"Error reading columnar cache {cache_path}: {str(e)}")
+
+    df = _parse_file(file_path, file_type)
+    _write_columnar_cache(df, cache_path)
+    return df
+
+def ensure_columnar_cache(file_path, file_type=None):
+    """
+    确保文件的列式缓存存在，不存在时解析文件并写入
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（可选，默认根据扩展名判断）
+
+    Returns:
+        str: 缓存文件路径；未安装pyarrow、缓存被禁用或写入失败时返回None
+    """
+    if not (HAS_PYARROW and get_setting('DATASET_CACHE_ENABLED', True)):
+        return None
+    cache_path = get_columnar_cache_path(file_path)
+    if not os.path.exists(cache_path):
+        file_type = (file_type or get_file_type(file_path)).lower()
+        _write_columnar_cache(_parse_file(file_path, file_type), cache_path)
+    return cache_path if os.path.exists(cache_path) else None
+
+def read_columnar_cache(cache_path, file_type, columns=None):
+    """
+    以内存映射方式读取列式缓存
+
+    Args:
+        cache_path: 缓存文件路径
+        file_type: 原始文件类型
+        columns: 只读取的列（可选）
+
+    Returns:
+        pandas.DataFrame: 数据集内容
+    """
+    df = pd.read_parquet(cache_path, columns=columns, memory_map=True)
+    if file_type != 'json':
+        _restore_missing_values(df)
+    return df
+
+def load_preview(file_path, file_type=None, limit=100, offset=0):
+    """
+    只读取数据集的一部分行用于预览
+
+    已有列式缓存时按批次读取缓存；否则CSV/Excel只解析所需的行，
+    JSON按数组元素增量解析，读取到足够的行后立即停止。
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（可选，默认根据扩展名判断）
+        limit: 预览行数
+        offset: 起始行（不含表头）
+
+    Returns:
+        pandas.DataFrame: 预览数据
+
+    Raises:
+        ValueError: 文件类型或JSON结构不受支持
+    """
+    file_type = (file_type or get_file_type(file_path)).lower()
+    if file_type not in SUPPORTED_FILE_TYPES:
+        raise ValueError(f"不支持的文件类型: {file_type}")
+    offset = max(int(offset), 0)
+    limit = max(int(limit), 0)
+
+    if HAS_PYARROW and get_setting('DATASET_CACHE_ENABLED', True):
+        file_hash = get_file_hash(file_path, compute=False)
+        cache_path = os.path.join(get_cache_folder('columnar'), f'{file_hash}.parquet')
+        if file_hash and os.path.exists(cache_path):
+            try:
+                df = _read_columnar_rows(cache_path, offset, limit)
+                if file_type != 'json':
+                    _restore_missing_values(df)
+                return df
+            except Exception as e:
+                print(f"Error reading columnar cache {cache_path}: {str(e)}")
+
+    skiprows = range(1, offset + 1) if offset else None
+    if file_type == 'csv':
+        return pd.read_csv(file_path, nrows=limit, skiprows=skiprows)
+    elif file_type in ['xlsx', 'xls']:
+        return pd.read_excel(file_path, nrows=limit, skiprows=skiprows)
+    else:
+        records = []
+        seen = 0
+        for record in _iter_json_array(file_path):
+            if seen == 0 and not isinstance(record, dict):
+                break
+            if offset <= seen < offset + limit:
+                records.append(record)
+            seen += 1
+            if seen >= offset + limit:
+                break
+        if seen == 0:
+            raise ValueError("JSON文件格式不支持，需要包含对象列表")
+        return pd.DataFrame(records)
+
+def iter_dataset_chunks(file_path, file_type=None, chunk_size=100000, usecols=None):
+    """
+    分块读取数据集，峰值内存只与块大小有关
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（可选，默认根据扩展名判断）
+        chunk_size: 每块的行数
+        usecols: 只读取的列（可选）
+
+    Yields:
+        pandas.DataFrame: 数据块
+
+    Raises:
+        ValueError: 文件类型不支持分块读取
+    """
+    file_type = (file_type or get_file_type(file_path)).lower()
+    if file_type not in STREAMING_FILE_TYPES:
+        raise ValueError(f"文件类型不支持流式读取: {file_type}")
+
+    if file_type == 'csv':
+        with pd.read_csv(file_path, chunksize=chunk_size, usecols=usecols) as reader:
+            for chunk in reader:
+                yield chunk
+        return
+
+    records = []
+    for record in _iter_json_array(file_path):
+        if not isinstance(record, dict):
+            raise ValueError("JSON文件格式不支持，需要包含对象列表")
+        records.append(record)
+        if len(records) >= chunk_size:
+            yield _records_to_frame(records, usecols)
+            records = []
+    if records:
+        yield _records_to_frame(records, usecols)
+
+def iter_csv_batches(file_path, block_size=CSV_BATCH_BLOCK_SIZE):
+    """
+    使用pyarrow多线程流式读取CSV，返回Arrow记录批次（不转换为pandas）
+
+    类型推断尽量与 pd.read_csv 一致：使用相同的缺失值和布尔值写法，
+    日期时间不自动解析（保留为字符串）。类型由第一个批次推断，
+    后续批次出现冲突的值时抛出 pyarrow.ArrowInvalid，调用方应退回 iter_dataset_chunks。
+
+    Args:
+        file_path: CSV文件路径
+        block_size: 每个批次的字节数
+
+    Yields:
+        pyarrow.RecordBatch: 记录批次
+
+    Raises:
+        ValueError: 未安装pyarrow
+    """
+    if not HAS_PYARROW:
+        raise ValueError("未安装pyarrow，无法使用Arrow读取CSV")
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    read_options = pa_csv.ReadOptions(block_size=block_size)
+    options = {
+        'null_values': CSV_NA_VALUES,
+        'true_values': CSV_TRUE_VALUES,
+        'false_values': CSV_FALSE_VALUES,
+        'strings_can_be_null': True
+    }
+    with pa_csv.open_csv(file_path, read_options=read_options,
+                         convert_options=pa_csv.ConvertOptions(**options)) as reader:
+        temporal_columns = {field.name: pa.string() for field in reader.schema if pa.types.is_temporal(field.type)}
+        if not temporal_columns:
+            yield from reader
+            return
+
+    # 被推断为日期时间的列重新按字符串读取
+    convert_options = pa_csv.ConvertOptions(column_types=temporal_columns, **options)
+    with pa_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options) as reader:
+        yield from reader
+
+def record_batch_to_frame(batch):
+    """
+    把 iter_csv_batches 返回的记录批次转换为与 pd.read_csv 结果一致的DataFrame
+
+    Args:
+        batch: pyarrow.RecordBatch
+
+    Returns:
+        pandas.DataFrame: 数据块
+    """
+    import pyarrow as pa
+    df = batch.to_pandas()
+    _restore_missing_values(df)
+    # 全部为空的列在read_csv中为float64
+    for field in batch.schema:
+        if pa.types.is_null(field.type):
+            df[field.name] = df[field.name].astype('float64')
+    return df
+
+def get_columnar_cache_path(file_path):
+    """
+    获取文件对应的列式缓存路径
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 缓存文件路径
+    """
+    return os.path.join(get_cache_folder('columnar'), get_file_hash(file_path) + '.parquet')
+
+def remove_dataset_cache(file_path):
+    """
+    删除文件对应的列式缓存、数据集档案、缓存的评估结果、摘要图表数据和渲染的图片
+
+    Args:
+        file_path: 文件路径
+    """
+    file_hash = get_file_hash(file_path)
+    paths = [
+        os.path.join(get_cache_folder('columnar'), file_hash + '.parquet'),
+        os.path.join(get_cache_folder('profiles'), file_hash + '.json')
+    ]
+    paths.extend(glob.glob(os.path.join(get_cache_folder('results'), file_hash + '_*.json')))
+    paths.extend(glob.glob(os.path.join(get_cache_folder('summaries'), file_hash + '_*.json')))
+    paths.extend(glob.glob(os.path.join(get_cache_folder('charts'), f'dataset-{file_hash}_*.png')))
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            # 缓存可能不存在，忽略错误
+            pass
+
+def read_json_file(file_path):
+    """
+    读取JSON文件的原始内容
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        JSON解析后的Python对象
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _parse_file(file_path, file_type):
+    """根据文件类型解析原始文件"""
+    if file_type == 'csv':
+        return pd.read_csv(file_path)
+    elif file_type in ['xlsx', 'xls']:
+        return pd.read_excel(file_path)
+    else:
+        data = read_json_file(file_path)
+        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
+            return pd.DataFrame(data)
+        raise ValueError("JSON文件格式不支持，需要包含对象列表")
+
+def _records_to_frame(records, usecols=None):
+    """将JSON对象列表转换为DataFrame"""
+    df = pd.DataFrame(records)
+    if usecols is not None:
+        df = df.reindex(columns=list(usecols))
+    return df
+
+def _read_columnar_rows(cache_path, offset, limit):
+    """从列式缓存中按批次读取 [offset, offset + limit) 范围内的行"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(cache_path, memory_map=True)
+    batches = []
+    rows = 0
+    for batch in parquet_file.iter_batches(batch_size=max(offset + limit, 1)):
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= offset + limit:
+            break
+    if batches:
+        table = pa.Table.from_batches(batches)
+    else:
+        table = parquet_file.schema_arrow.empty_table()
+    return table.slice(offset, limit).to_pandas()
+
+def _iter_json_array(file_path, block_size=64 * 1024):
+    """
+    增量解析顶层为数组的JSON文件，逐个返回数组元素
+
+    Raises:
+        ValueError: 顶层不是数组或内容无法解析
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(block_size).lstrip('\ufeff \t\r\n')
+        if not buffer.startswith('['):
+            raise ValueError("JSON文件格式不支持，需要包含对象列表")
+        pos = 1
+        eof = False
+        while True:
+            # 跳过元素之间的空白和逗号，必要时继续读取
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    return
+                chunk = f.read(block_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(block_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield item
+            pos = end
+
+def _restore_missing_values(df):
+    """
+    Parquet会把字符串列中的缺失值读回为None，而read_csv/read_excel使用NaN；
+    这里统一还原为NaN，保证缓存命中与直接解析的结果完全一致
+    """
+    for col in df.columns[df.dtypes == object]:
+        mask = df[col].isna()
+        if mask.any():
+            df[col] = df[col].where(~mask, np.nan)
+
+def _write_columnar_cache(df, cache_path):
+    """写入列式缓存，失败时（例如混合类型的列）仅记录日志"""
+    try:
+        atomic_write(cache_path, lambda f: df.to_parquet(f, index=False), binary=True)
+    except Exception as e:
+        print(f"Error writing columnar cache {cache_path}: {str(e)}")
+
+def _atomic_write_json(path, data):
+    """原子地写入JSON文件"""
+    try:
+        atomic_write(path, lambda f: json.dump(data, f))
+    except OSError as e:
+        print(f"Error writing {path}: {str(e)}")
@@ -0,0 +1,453 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from models.dataset import NumpyEncoder
+from utils.settings import get_setting, get_cache_folder
+from utils.disk_cache import atomic_write
+from utils.dataset_loader import get_file_hash
+from utils.column_stats import ColumnStats
+
+# 档案结构变化时递增版本号，旧版本的档案会被忽略并重新生成
+PROFILE_VERSION = 1
+
+# 直方图分箱数量和高频值数量
+HISTOGRAM_BINS = 10
+TOP_VALUES_LIMIT = 10
+
+# 分块生成档案时读取列数据类型的行数
+STREAMED_DTYPE_ROWS = 1000
+
+def column_kind(series):
+    """
+    判断列的类型类别，与评估函数中的判断顺序保持一致
+
+    Args:
+        series: pandas Series
+
+    Returns:
+        str: numeric、datetime、object 或 other
+    """
+    if np.issubdtype(series.dtype, np.number):
+        return 'numeric'
+    elif series.dtype == 'datetime64[ns]':
+        return 'datetime'
+    elif series.dtype == 'object':
+        return 'object'
+    return 'other'
+
+def build_dataset_profile(df, schema=None, outlier_detector=None, approximate=None, stats=None):
+    """
+    生成数据集的完整列档案
+
+    在上传时的列信息基础上，补充评估和图表需要的统计量：
+    有效值计数、异常值计数、字符串长度分布、日期列识别及最新日期、
+    数值列直方图和分类列高频值。
+    近似统计模式下，高频值由Space-Saving草图得到，各列的草图序列化后保存在 sketches 中，
+    之后可以与其他数据块的草图合并或查询其他分位数。
+
+    Args:
+        df: pandas DataFrame
+        schema: _get_dataframe_info 生成的列信息（可选，避免重复计算）
+        outlier_detector: 异常值检测器名称（可选，默认使用配置）
+        approximate: 是否使用近似统计（可选，默认使用配置）
+        stats: 生成 schema 时使用的列统计缓存（可选，提供时忽略前两个参数）
+
+    Returns:
+        dict: 数据集档案
+    """
+    from utils.data_processor import _get_dataframe_info
+    from utils.assessment_engine import find_date_columns, get_latest_dates
+
+    if stats is None:
+        stats = ColumnStats(df, outlier_detector, approximate)
+    if schema is None:
+        schema = _get_dataframe_info(df, stats)['schema']
+
+    date_columns = find_date_columns(df, stats)
+    latest_dates = get_latest_dates(df, date_columns, stats)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        column = dict(schema[i])
+        column.update(_profile_column(stats, col))
+        column['is_date'] = col in date_columns
+        column['latest_date'] = latest_dates[col].isoformat() if col in latest_dates else None
+        columns.append(column)
+
+    return {
+        'version': PROFILE_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'row_count': len(df),
+        'column_count': len(df.columns),
+        'outlier_detector': stats.outlier_detector,
+        'approximate': stats.approximate,
+        'columns': columns
+    }
+
+def _profile_column(stats, col):
+    """计算单列的评估统计量"""
+    series = stats.df[col]
+    nulls = stats.null_mask(col)
+    kind = column_kind(series)
+    profile = {
+        'kind': kind,
+        'row_count': len(series),
+        'valid_count': int((~nulls).sum())
+    }
+
+    if kind == 'numeric':
+        profile['valid_count'] = int((~nulls & np.isfinite(series)).sum())
+        std = stats.moments(col)[1]
+        profile['std'] = None if pd.isna(std) else float(std)
+        profile['outlier_count'] = stats.outlier_count(col)
+        profile['histogram'] = _histogram(series)
+
+    elif kind != 'datetime':
+        # 字符串列（及其他类型）：检查非空字符串的比例
+        try:
+            profile['valid_count'] = int(stats.valid_string_mask(col).sum())
+            if kind == 'object':
+                lengths = stats.string_lengths(col)
+                profile['length_mean'] = None if pd.isna(lengths.mean()) else float(lengths.mean())
+                profile['length_std'] = None if pd.isna(lengths.std()) else float(lengths.std())
+        except Exception:
+            pass
+
+    has_top_values = kind == 'object' or str(series.dtype) == 'category'
+    if has_top_values:
+        try:
+            if stats.approximate:
+                profile['top_values'] = stats.top_values_sketch(col).top(TOP_VALUES_LIMIT)
+            else:
+                value_counts = series.value_counts().head(TOP_VALUES_LIMIT)
+                profile['top_values'] = [[value, int(count)] for value, count in value_counts.items()]
+        except Exception:
+            profile['top_values'] = None
+
+    if stats.approximate:
+        profile['sketches'] = _column_sketches(stats, col, kind, has_top_values and profile['top_values'] is not None)
+
+    return profile
+
+def build_streamed_profile(file_path, file_type, chunk_size=None):
+    """
+    分块扫描文件生成数据集档案，峰值内存只与块大小有关
+
+    用于超过内存预算、不能整体载入的文件。评估需要的统计量与 build_dataset_profile 相同
+    （异常值固定使用zscore检测器，不同值较多的列唯一值数量为估计值），
+    但没有中位数、直方图和高频值；列的数据类型取自文件的前若干行。
+
+    Args:
+        file_path: 文件路径（csv 或 json）
+        file_type: 文件类型
+        chunk_size: 每块的行数（可选，默认使用配置）
+
+    Returns:
+        dict: 数据集档案
+    """
+    from utils.dataset_loader import load_preview
+    from utils.streaming_assessment import accumulate_dataset
+
+    chunk_size = chunk_size or get_setting('ASSESSMENT_CHUNK_SIZE', 100000)
+    accumulator = accumulate_dataset(file_path, file_type, chunk_size=chunk_size)
+    dtypes = load_preview(file_path, file_type, limit=STREAMED_DTYPE_ROWS).dtypes
+
+    columns = []
+    for summary in accumulator.summary()['columns']:
+        name = summary['name']
+        total = summary['row_count']
+        column = {
+            'name': name,
+            'type': str(dtypes[name]) if name in dtypes else 'object',
+            'missing_percentage': round(summary['missing_count'] / total * 100, 2) if total else 0.0
+        }
+        moments = accumulator.columns[name].numeric
+        if summary['kind'] == 'numeric' and moments.count:
+            column.update({'mean': moments.mean, 'min': moments.min, 'max': moments.max})
+        column.update(summary)
+        columns.append(column)
+
+    return {
+        'version': PROFILE_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'row_count': accumulator.row_count,
+        'column_count': len(columns),
+        'outlier_detector': 'zscore',
+        'approximate': get_setting('ASSESSMENT_APPROXIMATE_STATS', False),
+        'streamed': True,
+        'columns': columns
+    }
+
+def _column_sketches(stats, col, kind, has_top_values):
+    """序列化列的草图：去重计数、数值列的分位数和分类列的高频值"""
+    sketches = {'distinct': stats.distinct_sketch(col).to_dict()}
+    if kind == 'numeric':
+        sketches['quantiles'] = stats.quantile_sketch(col).to_dict()
+    if has_top_values:
+        sketches['top_values'] = stats.top_values_sketch(col).to_dict()
+    return sketches
+
+def _histogram(series):
+    """数值列直方图的分箱边界和计数；包含无穷值等无法分箱的情况返回None"""
+    try:
+        counts, edges = np.histogram(series.dropna(), bins=HISTOGRAM_BINS)
+        return {'edges': edges.tolist(), 'counts': counts.tolist()}
+    except Exception:
+        return None
+
+def get_profile_path(file_path):
+    """
+    获取文件对应的档案路径（按文件内容哈希命名）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 档案文件路径
+    """
+    return os.path.join(get_cache_folder('profiles'), get_file_hash(file_path) + '.json')
+
+def save_dataset_profile(file_path, profile):
+    """
+    保存数据集档案
+
+    Args:
+        file_path: 数据文件路径
+        profile: build_dataset_profile 生成的档案
+    """
+    profile_path = get_profile_path(file_path)
+    try:
+        atomic_write(profile_path, lambda f: json.dump(profile, f, cls=_ProfileEncoder, ensure_ascii=False))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error saving profile {profile_path}: {str(e)}")
+
+def load_dataset_profile(file_path):
+    """
+    读取数据集档案
+
+    档案按文件内容哈希保存，文件变化后自然失效；
+    版本、异常值检测器或近似统计模式与当前配置不一致的档案被忽略。
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        dict: 数据集档案；不存在或已过期时返回None
+    """
+    try:
+        with open(get_profile_path(file_path), 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get('version') != PROFILE_VERSION:
+        return None
+    if profile.get('outlier_detector', 'zscore') != get_setting('ASSESSMENT_OUTLIER_DETECTOR', 'zscore'):
+        return None
+    if profile.get('approximate', False) != get_setting('ASSESSMENT_APPROXIMATE_STATS', False):
+        return None
+    return profile
+
+def get_or_build_profile(file_path, df=None, file_type=None):
+    """
+    获取数据集档案，不存在时读取数据生成并保存
+
+    未提供数据且文件超过内存预算时，分块扫描文件生成档案；文件类型不支持分块读取时报错。
+
+    Args:
+        file_path: 数据文件路径
+        df: 已载入的数据（可选）
+        file_type: 文件类型（可选）
+
+    Returns:
+        dict: 数据集档案
+
+    Raises:
+        ValueError: 文件超过内存预算且不支持分块读取
+    """
+    profile = load_dataset_profile(file_path)
+    if profile is None:
+        if df is None:
+            from utils.dataset_loader import load_dataset, get_file_type
+            from utils.memory_budget import plan_memory_strategy, format_budget_error
+            file_type = (file_type or get_file_type(file_path)).lower()
+            plan = plan_memory_strategy(file_path, file_type)
+            if plan is not None and plan['strategy'] == 'rejected':
+                raise ValueError(format_budget_error(plan))
+            if plan is not None and plan['strategy'] in ('streaming', 'sample'):
+                profile = build_streamed_profile(file_path, file_type)
+                save_dataset_profile(file_path, profile)
+                return profile
+            df = load_dataset(file_path, file_type)
+        profile = build_dataset_profile(df)
+        save_dataset_profile(file_path, profile)
+    return profile
+
+def evaluate_profile_stages(profile):
+    """
+    根据列档案计算各评估阶段的结果，不需要读取数据
+
+    结果与 analyze_data_quality、evaluate_default_accuracy、evaluate_timeliness、
+    evaluate_value_dimensions 在完整数据上的计算结果一致。
+
+    Args:
+        profile: 数据集档案（或包含 columns、row_count 的统计汇总）
+
+    Returns:
+        dict: 包含 quality、accuracy、timeliness、value_dimensions、row_count 的字典
+    """
+    from utils.data_processor import summarize_quality_scores
+    from utils.assessment_engine import build_value_dimensions, score_timeliness
+
+    completeness_scores = {}
+    uniqueness_scores = {}
+    consistency_scores = {}
+    default_accuracy_scores = []
+    value_accuracy_scores = []
+    value_consistency_scores = []
+    null_ratios = []
+    latest_dates = []
+    has_date_columns = False
+
+    for column in profile['columns']:
+        name = column['name']
+        total = column['row_count']
+        kind = column['kind']
+        null_ratio = column['missing_count'] / total if total else 0
+        valid_ratio = column['valid_count'] / total if total else 0
+        null_ratios.append(null_ratio)
+
+        # 数据质量
+        completeness_scores[name] = round((1 - null_ratio) * 100, 2)
+        uniqueness_scores[name] = round((column['unique_count'] / total if total > 0 else 0) * 100, 2)
+        consistency_scores[name] = round(valid_ratio * 100, 2)
+
+        # 默认准确性与价值维度中的准确性
+        if kind == 'numeric':
+            if column.get('std') is not None and column['std'] > 0:
+                outlier_score = max(0, 100 - column['outlier_count'] / total * 100)
+            else:
+                outlier_score = 100
+            default_accuracy_scores.append(outlier_score)
+            value_accuracy_scores.append(outlier_score)
+        else:
+            default_accuracy_scores.append(valid_ratio * 100 if kind in ('object', 'datetime') else 0)
+            value_accuracy_scores.append((1 - null_ratio) * 100)
+
+        # 价值维度中的一致性
+        length_std = column.get('length_std')
+        if kind == 'object' and length_std is not None and length_std > 0:
+            value_consistency_scores.append(max(0, 100 - (length_std / column['length_mean']) * 100))
+        else:
+            value_consistency_scores.append(100)
+
+        # 时效性
+        if column.get('is_date'):
+            has_date_columns = True
+            if column.get('latest_date'):
+                latest_dates.append(pd.Timestamp(column['latest_date']))
+
+    timeliness = 50.0  # 默认中等分数
+    if has_date_columns and latest_dates:
+        try:
+            timeliness = score_timeliness(max(latest_dates))
+        except TypeError:
+            pass
+
+    completeness_score = (1 - sum(null_ratios) / len(null_ratios)) * 100 if null_ratios else float('nan')
+    accuracy = round(sum(default_accuracy_scores) / len(default_accuracy_scores), 2) if default_accuracy_scores else 50.0
+
+    return {
+        'quality': summarize_quality_scores(completeness_scores, uniqueness_scores, consistency_scores),
+        'accuracy': accuracy,
+        'timeliness': timeliness,
+        'value_dimensions': build_value_dimensions(
+            completeness_score, value_accuracy_scores, value_consistency_scores, profile['row_count']
+        ),
+        'row_count': profile['row_count']
+    }
+
+def evaluate_profile_rules(profile, rules):
+    """
+    只用列档案评估规则；not_null 和 unique 以外的条件需要读取数据
+
+    Args:
+        profile: 数据集档案
+        rules: 数据质量规则列表
+
+    Returns:
+        dict: 与 apply_quality_rules 相同结构的结果；需要读取数据时返回None
+    """
+    columns = {column['name']: column for column in profile['columns']}
+    rule_results = {
+        'rule_count': len(rules),
+        'passed_rules': 0,
+        'failed_rules': 0,
+        'pass_percentage': 0,
+        'details': []
+    }
+
+    for rule in rules:
+        rule_def = rule.get_rule_definition()
+        column = rule_def.get('column')
+        condition = rule_def.get('condition')
+        value = rule_def.get('value')
+
+        if column not in columns:
+            rule_results['details'].append({
+                'rule_id': rule.id,
+                'rule_name': rule.name,
+                'status': 'skipped',
+                'reason': f"列 '{column}' 不存在"
+            })
+            continue
+        if condition not in ('not_null', 'unique'):
+            return None
+
+        stats = columns[column]
+        total_count = stats['row_count']
+        result = {'passed': False, 'pass_rate': 0, 'details': {}}
+        try:
+            if condition == 'not_null':
+                count_key, count = 'valid_count', total_count - stats['missing_count']
+            else:
+                count_key, count = 'unique_count', stats['unique_count']
+            pass_rate = (count / total_count) * 100 if total_count > 0 else 0
+            result['passed'] = pass_rate >= float(value)
+            result['pass_rate'] = round(pass_rate, 2)
+            result['details'] = {
+                count_key: int(count),
+                'total_count': total_count,
+                'threshold': float(value)
+            }
+        except Exception as e:
+            result['details'] = {'error': str(e)}
+
+        if result['passed']:
+            rule_results['passed_rules'] += 1
+        else:
+            rule_results['failed_rules'] += 1
+        rule_results['details'].append({
+            'rule_id': rule.id,
+            'rule_name': rule.name,
+            'rule_type': rule.rule_type,
+            'status': 'passed' if result['passed'] else 'failed',
+            'pass_rate': result['pass_rate'],
+            'details': result['details']
+        })
+
+    if rule_results['rule_count'] > 0:
+        rule_results['pass_percentage'] = round(
+            (rule_results['passed_rules'] / rule_results['rule_count']) * 100, 2
+        )
+    return rule_results
+
+class _ProfileEncoder(NumpyEncoder):
+    """在NumpyEncoder基础上，把时间戳等其他对象转换为字符串"""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
@@ -0,0 +1,119 @@
+"""
+日期列识别
+
+判断字符串列是否为日期列时，先用少量非空样本匹配常见的日期格式，推断出整列使用的格式，
+再按该格式一次性解析整列；样本无法解析的列直接判定为非日期列，不再解析整列。
+样本不匹配任何固定格式时（例如带时区或英文月份的日期），退回到pandas的通用解析。
+"""
+from datetime import datetime
+import pandas as pd
+
+# 参与推断的日期格式，按优先级排列（有歧义时与pandas一样优先按月在前解析）
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y%m%d',
+    '%m/%d/%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M:%S',
+]
+
+# 推断日期格式时使用的样本数量
+DATE_SNIFF_SAMPLE_SIZE = 100
+
+def get_date_sample(series, sample_size=DATE_SNIFF_SAMPLE_SIZE):
+    """
+    获取列开头的至多 sample_size 个非空值
+
+    只检查列的开头部分，开头全部为空时才扫描整列。
+
+    Args:
+        series: pandas Series
+        sample_size: 样本数量
+
+    Returns:
+        pandas.Series: 样本
+    """
+    head = series.iloc[:sample_size * 2]
+    sample = head[head.notna()]
+    if sample.empty and len(series) > len(head):
+        sample = series[series.notna()]
+    return sample.iloc[:sample_size]
+
+def sniff_date_format(sample):
+    """
+    推断样本使用的日期格式
+
+    Args:
+        sample: 不含空值的样本
+
+    Returns:
+        str: 全部样本都符合的日期格式；样本不全是字符串或没有匹配的格式时返回None
+    """
+    values = sample.tolist()
+    if not values or not all(isinstance(value, str) for value in values):
+        return None
+    for date_format in DATE_FORMATS:
+        # 先用第一个值快速排除，再检查全部样本
+        try:
+            datetime.strptime(values[0], date_format)
+        except ValueError:
+            continue
+        if pd.to_datetime(sample, format=date_format, errors='coerce').notna().all():
+            return date_format
+    return None
+
+def detect_dates(series, sample, date_format=None):
+    """
+    判断整列的全部值是否都能解析为日期，能解析时同时返回解析结果
+
+    与 pd.to_datetime(series, errors='raise') 的判断结果一致：
+    样本（包含第一个非空值）无法解析时整列也无法解析，因此只解析样本即可排除非日期列。
+
+    Args:
+        series: pandas Series
+        sample: 列的非空样本（见 get_date_sample）
+        date_format: 已推断的日期格式（可选，默认根据样本推断）
+
+    Returns:
+        tuple: (日期格式, 解析结果)；无法解析时解析结果为None，没有固定格式时日期格式为None
+    """
+    if date_format is None:
+        date_format = sniff_date_format(sample)
+    if date_format is not None:
+        try:
+            return date_format, pd.to_datetime(series, format=date_format, errors='raise')
+        except Exception:
+            pass
+    elif len(sample) and all(isinstance(value, str) for value in sample.tolist()):
+        try:
+            pd.to_datetime(sample, errors='raise')
+        except Exception:
+            return None, None
+    try:
+        return None, pd.to_datetime(series, errors='raise')
+    except Exception:
+        return None, None
+
+def parse_dates(series, date_format=None):
+    """
+    把列解析为日期，无法解析的值为NaT
+
+    Args:
+        series: pandas Series
+        date_format: 日期格式（可选，默认由pandas推断）
+
+    Returns:
+        pandas.Series: 解析结果
+    """
+    if date_format is not None:
+        return pd.to_datetime(series, format=date_format, errors='coerce')
+    return pd.to_datetime(series, errors='coerce')
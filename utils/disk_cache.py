@@ -0,0 +1,112 @@
+"""
+磁盘缓存的公共操作
+
+评估结果、摘要图表数据和PNG图表等缓存都以文件形式保存在缓存目录的子目录中：
+写入时先写临时文件再替换，读者不会看到写了一半的文件；
+目录总大小超过上限时按最近访问时间（读取时更新的修改时间）淘汰最久未使用的文件。
+"""
+import os
+import glob
+import threading
+
+def temp_path(path):
+    """
+    目标文件同目录下的临时文件路径
+
+    包含进程号和线程号，同一进程内的多个线程同时写入同一个文件时互不干扰。
+
+    Args:
+        path: 目标文件路径
+
+    Returns:
+        str: 临时文件路径
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def atomic_write(path, write, binary=False):
+    """
+    原子地写入文件：内容写入临时文件后再替换目标文件
+
+    Args:
+        path: 目标文件路径
+        write: 接收打开的临时文件并写入内容的函数
+        binary: 是否以二进制方式打开（默认以UTF-8文本方式打开）
+
+    Raises:
+        Exception: write 或文件操作失败时原样抛出，临时文件已删除
+    """
+    tmp_path = temp_path(path)
+    try:
+        if binary:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def list_entries(folder, suffix):
+    """
+    列出缓存目录中的条目
+
+    Args:
+        folder: 缓存目录
+        suffix: 条目文件的扩展名（例如 .json）
+
+    Returns:
+        list: [(路径, 大小, 最近访问时间), ...]
+    """
+    entries = []
+    for path in glob.glob(os.path.join(folder, '*' + suffix)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+def evict(folder, suffix, max_bytes):
+    """
+    删除最久未访问的条目，直到总大小不超过上限
+
+    Args:
+        folder: 缓存目录
+        suffix: 条目文件的扩展名
+        max_bytes: 总大小上限（字节）
+    """
+    entries = sorted(list_entries(folder, suffix), key=lambda entry: entry[2])
+    total = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def remove_entries(folder, pattern):
+    """
+    删除缓存目录中与模式匹配的条目
+
+    Args:
+        folder: 缓存目录
+        pattern: 文件名的glob模式
+
+    Returns:
+        int: 删除的条目数量
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(folder, pattern)):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,329 @@
+"""
+数据集追加与增量评估
+
+按天追加的日志类数据集，每次评估都重新读取全部历史数据。本模块为CSV/JSON数据集
+保存一份可合并的统计状态（DatasetAccumulator：空值计数、矩统计、去重计数器、
+最新日期等，以及各规则的符合行数），追加数据时只读取新增的文件片段并更新该状态，
+之后的评估直接由状态计算结果，耗时只与新增的行数有关。
+
+状态按数据文件路径保存，并记录文件的 (大小, 修改时间)；文件被其他方式修改后状态失效。
+首次追加（或首次以增量模式评估）时需要完整扫描一遍已有数据。
+
+与内存评估相比的误差说明（与流式评估相同，见 streaming_assessment）：
+- 唯一性：不同值超过16384个的列使用HyperLogLog估计；
+- 异常值：新增行按合并后的均值和标准差判定，已有行的判定结果不随新数据重新计算。
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from models.dataset import NumpyEncoder
+from utils.settings import get_setting, get_cache_folder
+from utils.disk_cache import atomic_write
+from utils.dataset_loader import (
+    STREAMING_FILE_TYPES, get_file_type, get_file_hash, iter_dataset_chunks, read_json_file, remove_dataset_cache
+)
+from utils.accumulators import DatasetAccumulator, RuleAccumulator
+from utils.rule_plan import rule_set_hash
+from utils.streaming_assessment import accumulate_dataset
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl 模块，不对追加加锁
+    fcntl = None
+
+# 状态结构变化时递增版本号，旧版本的状态会被忽略并重新生成
+INCREMENTAL_STATE_VERSION = 1
+
+# 当前线程已持有追加锁的数据文件
+_held_append_locks = threading.local()
+
+def get_incremental_state_path(file_path):
+    """
+    获取数据文件对应的增量状态路径（按文件路径命名，追加后路径不变）
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        str: 状态文件路径
+    """
+    abs_path = os.path.abspath(file_path)
+    return os.path.join(get_cache_folder('incremental'), hashlib.sha1(abs_path.encode('utf-8')).hexdigest() + '.json')
+
+def load_incremental_state(file_path):
+    """
+    读取数据文件的增量状态
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        dict: 包含 accumulator（DatasetAccumulator）、rules（{规则键: RuleAccumulator}）和
+              signature（状态对应的文件 (大小, 修改时间)）的字典；
+              不存在、版本不一致或文件已变化时返回None
+    """
+    try:
+        with open(get_incremental_state_path(file_path), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        stat = os.stat(file_path)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != INCREMENTAL_STATE_VERSION:
+        return None
+    if (data['size'], data['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    return {
+        'accumulator': DatasetAccumulator.from_dict(data['dataset']),
+        'rules': {key: RuleAccumulator.from_dict(rule) for key, rule in data['rules'].items()},
+        'signature': (stat.st_size, stat.st_mtime_ns)
+    }
+
+def save_incremental_state(file_path, state):
+    """
+    保存数据文件的增量状态，同时记录文件当前的大小和修改时间
+
+    Args:
+        file_path: 数据文件路径
+        state: load_incremental_state 返回结构的字典
+    """
+    state_path = get_incremental_state_path(file_path)
+    stat = os.stat(file_path)
+    data = {
+        'version': INCREMENTAL_STATE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'dataset': state['accumulator'].to_dict(),
+        'rules': {key: rule.to_dict() for key, rule in state['rules'].items()}
+    }
+    try:
+        atomic_write(state_path, lambda f: json.dump(data, f, cls=NumpyEncoder, ensure_ascii=False))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error saving incremental state {state_path}: {str(e)}")
+
+def remove_incremental_state(file_path):
+    """
+    删除数据文件的增量状态
+
+    Args:
+        file_path: 数据文件路径
+    """
+    try:
+        os.remove(get_incremental_state_path(file_path))
+    except OSError:
+        # 状态可能不存在，忽略错误
+        pass
+
+@contextmanager
+def dataset_append_lock(file_path):
+    """
+    串行化对同一数据文件的追加
+
+    对数据文件对应的锁文件加排他的文件锁（fcntl.flock），跨线程和跨进程都有效。
+    追加时读取增量状态、写入数据文件和保存状态都在锁内完成，调用方也可以把数据库提交包含在内；
+    增量评估扫描文件和保存状态时同样持有该锁。同一线程内重复获取时直接通过。
+
+    Args:
+        file_path: 数据文件路径
+    """
+    abs_path = os.path.abspath(file_path)
+    held = getattr(_held_append_locks, 'paths', None)
+    if held is None:
+        held = _held_append_locks.paths = set()
+    if abs_path in held:
+        yield
+        return
+
+    lock_path = os.path.splitext(get_incremental_state_path(file_path))[0] + '.lock'
+    with open(lock_path, 'ab') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        held.add(abs_path)
+        try:
+            yield
+        finally:
+            held.discard(abs_path)
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def append_to_dataset(dataset, slice_path, chunk_size=None):
+    """
+    把新的文件片段追加到数据集文件末尾，并更新数据集的增量状态
+
+    只读取新增的片段；数据集第一次追加时会先完整扫描一遍已有数据。
+    数据集记录的行数、列数、文件大小和列信息中的缺失值、唯一值计数随之更新，
+    调用方负责提交数据库会话。对同一数据集的追加由 dataset_append_lock 串行化。
+
+    Args:
+        dataset: 数据集模型实例
+        slice_path: 新增片段的文件路径（与数据集相同的文件类型，CSV需要相同的表头）
+        chunk_size: 读取时每块的行数（可选，默认使用配置）
+
+    Returns:
+        dict: 包含 appended_rows、row_count 的字典
+
+    Raises:
+        ValueError: 文件类型不支持追加或与数据集不一致
+    """
+    file_type = dataset.file_type.lower()
+    if file_type not in STREAMING_FILE_TYPES:
+        raise ValueError(f"文件类型不支持追加: {file_type}")
+    if get_file_type(slice_path) != file_type:
+        raise ValueError("追加文件的类型与数据集不一致")
+    if file_type == 'csv':
+        _check_csv_header(dataset.file_path, slice_path)
+
+    chunk_size = chunk_size or get_setting('ASSESSMENT_CHUNK_SIZE', 100000)
+    with dataset_append_lock(dataset.file_path):
+        state = load_incremental_state(dataset.file_path)
+        if state is None:
+            state = {
+                'accumulator': accumulate_dataset(dataset.file_path, file_type, chunk_size=chunk_size),
+                'rules': {}
+            }
+
+        # 已保存的规则状态随数据一起更新
+        accumulator = state['accumulator']
+        accumulator.rules = list(state['rules'].values())
+        rows_before = accumulator.row_count
+        accumulate_dataset(slice_path, file_type, chunk_size=chunk_size, accumulator=accumulator)
+
+        # 旧文件内容对应的列式缓存、档案和评估结果不再有用；哈希未记录时跳过，避免读取整个文件
+        if get_file_hash(dataset.file_path, compute=False) is not None:
+            remove_dataset_cache(dataset.file_path)
+
+        if file_type == 'csv':
+            _append_csv(dataset.file_path, slice_path)
+        else:
+            _append_json(dataset.file_path, slice_path)
+        save_incremental_state(dataset.file_path, state)
+
+        dataset.row_count = accumulator.row_count
+        dataset.column_count = len(accumulator.columns)
+        dataset.size_bytes = os.path.getsize(dataset.file_path)
+        _update_schema(dataset, accumulator)
+
+        return {
+            'appended_rows': accumulator.row_count - rows_before,
+            'row_count': accumulator.row_count
+        }
+
+def run_incremental_stages(file_path, file_type, rules=None, chunk_size=100000, state=None):
+    """
+    由增量状态计算各评估阶段的结果
+
+    没有可用的状态时完整扫描一遍文件生成状态；状态中没有的规则扫描一遍文件补齐，
+    之后对同一规则的评估都不再读取数据。
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（csv 或 json）
+        rules: 数据质量规则列表（可选）
+        chunk_size: 需要扫描文件时每块的行数
+        state: 已读取的增量状态（可选）
+
+    Returns:
+        dict: 与内存评估相同结构的各阶段结果，另含 chunk_count、state_built、rules_backfilled
+    """
+    rules = rules or []
+    state_built = False
+    # 扫描文件和保存状态期间不允许追加；状态读取后文件又被追加时重新读取
+    with dataset_append_lock(file_path):
+        if state is not None and state.get('signature') != _file_signature(file_path):
+            state = None
+        if state is None:
+            state = load_incremental_state(file_path)
+        if state is None:
+            accumulator = accumulate_dataset(file_path, file_type, rules, chunk_size)
+            state = {
+                'accumulator': accumulator,
+                'rules': {_rule_key(rule): rule_state for rule, rule_state in zip(rules, accumulator.rules)}
+            }
+            state_built = True
+
+        missing = [rule for rule in rules if _rule_key(rule) not in state['rules']]
+        if missing:
+            rule_states = [RuleAccumulator(rule) for rule in missing]
+            for chunk in iter_dataset_chunks(file_path, file_type, chunk_size=chunk_size):
+                for rule_state in rule_states:
+                    rule_state.update(chunk)
+            for rule, rule_state in zip(missing, rule_states):
+                state['rules'][_rule_key(rule)] = rule_state
+
+        if state_built or missing:
+            save_incremental_state(file_path, state)
+
+    accumulator = state['accumulator']
+    accumulator.rules = [state['rules'][_rule_key(rule)] for rule in rules]
+    stages = accumulator.finalize_stages()
+    stages['state_built'] = state_built
+    stages['rules_backfilled'] = len(missing)
+    return stages
+
+def _file_signature(file_path):
+    """文件的 (大小, 修改时间)"""
+    stat = os.stat(file_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+def _rule_key(rule):
+    """规则状态的键，规则定义变化后对应新的状态"""
+    return rule_set_hash([rule])
+
+def _check_csv_header(file_path, slice_path):
+    """检查追加的CSV片段与数据集的表头是否一致"""
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    slice_columns = list(pd.read_csv(slice_path, nrows=0).columns)
+    if columns != slice_columns:
+        raise ValueError("追加文件的列与数据集不一致")
+
+def _append_csv(file_path, slice_path):
+    """把CSV片段去掉表头后追加到文件末尾"""
+    with open(slice_path, 'rb') as src, open(file_path, 'r+b') as dst:
+        src.readline()
+        dst.seek(0, os.SEEK_END)
+        if dst.tell() > 0:
+            dst.seek(-1, os.SEEK_END)
+            if dst.read(1) not in (b'\n', b'\r'):
+                dst.write(b'\n')
+        shutil.copyfileobj(src, dst)
+
+def _append_json(file_path, slice_path, tail_size=64 * 1024):
+    """把JSON片段中的对象追加到文件中的对象数组末尾，不重写已有内容"""
+    records = read_json_file(slice_path)
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError("JSON文件格式不支持，需要包含对象列表")
+    if not records:
+        return
+
+    with open(file_path, 'r+b') as f:
+        f.seek(0, os.SEEK_END)
+        start = max(0, f.tell() - tail_size)
+        f.seek(start)
+        tail = f.read().rstrip()
+        if not tail.endswith(b']'):
+            raise ValueError("JSON文件格式不支持，需要包含对象列表")
+        # 从数组的结束括号处开始覆盖；括号之前是 '[' 说明数组为空
+        is_empty = tail[:-1].rstrip().endswith(b'[')
+        f.seek(start + len(tail) - 1)
+        f.truncate()
+        text = json.dumps(records, ensure_ascii=False)[1:-1]
+        f.write(((text if is_empty else ', ' + text) + ']').encode('utf-8'))
+
+def _update_schema(dataset, accumulator):
+    """用合并后的统计状态更新数据集列信息中的缺失值和唯一值计数"""
+    schema = dataset.get_schema()
+    if not isinstance(schema, list):
+        return
+    for column in schema:
+        column_state = accumulator.columns.get(column.get('name'))
+        if column_state is None:
+            continue
+        column['missing_count'] = column_state.null_count
+        column['missing_percentage'] = round(column_state.null_count / column_state.row_count * 100, 2) \
+            if column_state.row_count else 0.0
+        column['unique_count'] = column_state.distinct.count()
+    dataset.schema = json.dumps(schema, cls=NumpyEncoder)
@@ -0,0 +1,621 @@
+"""
+后台评估任务队列
+
+评估任务保存在本地SQLite文件中，由Web进程内的调度线程领取，每个任务在单独的子进程中执行，
+请求处理只负责创建评估记录和入队，响应时间与数据集大小无关。
+
+子进程设置了CPU时间和地址空间的资源限制（rlimit），调度线程另外检查墙钟超时；
+超限、超时或被取消的任务连同其创建的进程（同一进程组）一起终止，
+病态的正则表达式或过大的文件不会拖住或拖垮Web进程。
+
+评估状态的变化：
+pending（已入队）-> processing（工作进程开始执行）-> completed / failed / cancelled
+
+任务状态的变化：
+queued -> running -> done / failed；取消时 queued 直接变为 cancelled，
+running 先变为 cancelling，由执行它的调度线程终止子进程后变为 cancelled
+"""
+import os
+import json
+import time
+import atexit
+import pickle
+import signal
+import sqlite3
+import threading
+import uuid
+import multiprocessing
+from contextlib import closing
+from datetime import datetime
+from flask import current_app
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，不设置资源限制
+    resource = None
+
+# 调度线程检查新任务、超时和取消请求的间隔（秒）
+JOB_POLL_INTERVAL = 0.5
+
+# CPU时间软限制到硬限制之间留给进程处理SIGXCPU的时间（秒）
+CPU_LIMIT_GRACE = 5
+
+# forkserver 预先导入的模块，子进程从已导入这些模块的服务进程fork，启动时不再重新导入
+WORKER_PRELOAD_MODULES = ['app', 'utils.assessment_engine']
+
+_context = None
+
+# 当前进程的标识：(进程ID, 标识)，见 _owner_token
+_own_token = None
+
+class JobStore:
+    """基于SQLite的评估任务存储，可被多个进程同时访问"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS assessment_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    assessment_id INTEGER NOT NULL,
+                    rule_ids TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    owner_pid INTEGER,
+                    owner_token TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            ''')
+            # 早期版本的任务表没有 owner_token 列
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(assessment_jobs)')}
+            if 'owner_token' not in columns:
+                conn.execute('ALTER TABLE assessment_jobs ADD COLUMN owner_token TEXT')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_assessment_jobs_status ON assessment_jobs (status, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_assessment_jobs_assessment ON assessment_jobs (assessment_id)')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, assessment_id, rule_ids):
+        """
+        添加任务
+
+        Args:
+            assessment_id: 评估ID
+            rule_ids: 数据质量规则ID列表
+
+        Returns:
+            int: 任务ID
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                'INSERT INTO assessment_jobs (assessment_id, rule_ids, created_at) VALUES (?, ?, ?)',
+                (assessment_id, json.dumps(list(rule_ids)), datetime.utcnow().isoformat())
+            )
+            return cursor.lastrowid
+
+    def claim(self, owner_pid, owner_token):
+        """
+        领取最早入队的任务
+
+        Args:
+            owner_pid: 领取任务的调度进程ID
+            owner_token: 调度进程的标识（见 _owner_token），进程ID被重复使用时据此区分
+
+        Returns:
+            dict: 任务信息；没有待执行的任务时返回None
+        """
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT * FROM assessment_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE assessment_jobs SET status = 'running', attempts = attempts + 1, "
+                "owner_pid = ?, owner_token = ?, started_at = ? WHERE id = ?",
+                (owner_pid, owner_token, datetime.utcnow().isoformat(), row['id'])
+            )
+            conn.execute('COMMIT')
+        job = _row_to_dict(row)
+        job['status'] = 'running'
+        return job
+
+    def finish(self, job_id, status, error=None):
+        """
+        记录任务结束
+
+        Args:
+            job_id: 任务ID
+            status: done、failed 或 cancelled
+            error: 错误信息（可选）
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'UPDATE assessment_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                (status, error, datetime.utcnow().isoformat(), job_id)
+            )
+
+    def request_cancel(self, assessment_id):
+        """
+        请求取消评估最近一次的任务
+
+        排队中的任务（以及调度进程已退出的运行中任务）直接取消；
+        运行中的任务标记为 cancelling，由执行它的调度线程终止子进程。
+
+        Args:
+            assessment_id: 评估ID
+
+        Returns:
+            str: cancelled 或 cancelling；没有可取消的任务时返回None
+        """
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT * FROM assessment_jobs WHERE assessment_id = ? ORDER BY id DESC LIMIT 1',
+                (assessment_id,)
+            ).fetchone()
+            if row is None or row['status'] not in ('queued', 'running', 'cancelling'):
+                conn.execute('COMMIT')
+                return None
+            if row['status'] == 'queued' or not _owner_alive(row['owner_pid'], row['owner_token']):
+                status = 'cancelled'
+                conn.execute(
+                    'UPDATE assessment_jobs SET status = ?, finished_at = ? WHERE id = ?',
+                    (status, datetime.utcnow().isoformat(), row['id'])
+                )
+            else:
+                status = 'cancelling'
+                conn.execute('UPDATE assessment_jobs SET status = ? WHERE id = ?', (status, row['id']))
+            conn.execute('COMMIT')
+        return status
+
+    def cancelling_jobs(self, owner_pid, owner_token):
+        """
+        获取调度进程正在执行、已被请求取消的任务
+
+        Args:
+            owner_pid: 调度进程ID
+            owner_token: 调度进程的标识
+
+        Returns:
+            set: 任务ID集合
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM assessment_jobs WHERE status = 'cancelling' AND owner_pid = ? AND owner_token = ?",
+                (owner_pid, owner_token)
+            ).fetchall()
+        return {row['id'] for row in rows}
+
+    def recover(self):
+        """
+        把调度进程已退出的运行中任务重新放回队列
+
+        调度进程按 (进程ID, 标识) 判断：重启后的进程即使得到了相同的进程ID，也不会被当作原来的调度进程。
+
+        Returns:
+            int: 重新入队的任务数量
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, owner_pid, owner_token, status FROM assessment_jobs WHERE status IN ('running', 'cancelling')"
+            ).fetchall()
+            rows = [row for row in rows if not _owner_alive(row['owner_pid'], row['owner_token'])]
+            stale = [row['id'] for row in rows if row['status'] == 'running']
+            for row in rows:
+                if row['status'] == 'cancelling':
+                    # 调度进程退出前已被请求取消的任务不再执行
+                    conn.execute(
+                        "UPDATE assessment_jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                        (datetime.utcnow().isoformat(), row['id'])
+                    )
+            for job_id in stale:
+                conn.execute(
+                    "UPDATE assessment_jobs SET status = 'queued', owner_pid = NULL, owner_token = NULL "
+                    "WHERE id = ? AND status = 'running'",
+                    (job_id,)
+                )
+        return len(stale)
+
+    def get_job(self, assessment_id):
+        """
+        获取评估最近一次的任务信息
+
+        Args:
+            assessment_id: 评估ID
+
+        Returns:
+            dict: 任务信息，排队中的任务包含 position（前面还有多少个任务）；不存在时返回None
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT * FROM assessment_jobs WHERE assessment_id = ? ORDER BY id DESC LIMIT 1',
+                (assessment_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = _row_to_dict(row)
+            if job['status'] == 'queued':
+                job['position'] = conn.execute(
+                    "SELECT COUNT(*) FROM assessment_jobs WHERE status = 'queued' AND id < ?",
+                    (job['id'],)
+                ).fetchone()[0]
+        return job
+
+class AssessmentQueue:
+    """
+    评估任务队列
+
+    ASSESSMENT_WORKERS 为0时在当前请求中同步执行（用于测试和调试，没有资源限制和超时）；
+    否则任务入队，第一次提交时启动调度线程，同时最多执行 ASSESSMENT_WORKERS 个子进程。
+    """
+
+    def __init__(self, app, store, max_workers, timeout=0, cpu_limit=0, address_space_limit=0):
+        self.app = app
+        self.store = store
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.limits = {'cpu_seconds': cpu_limit, 'address_space': address_space_limit}
+        self._config = None
+        self._thread = None
+        self._running = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def submit(self, assessment_id, rule_ids):
+        """
+        提交评估任务
+
+        Args:
+            assessment_id: 评估ID
+            rule_ids: 数据质量规则ID列表
+        """
+        if self.max_workers <= 0:
+            execute_assessment(assessment_id, rule_ids)
+            return
+        self.store.enqueue(assessment_id, rule_ids)
+        self._start()
+        self._wakeup.set()
+
+    def cancel(self, assessment_id):
+        """
+        请求取消评估任务
+
+        Args:
+            assessment_id: 评估ID
+
+        Returns:
+            str: cancelled（已取消）或 cancelling（正在终止执行中的子进程）；没有可取消的任务时返回None
+        """
+        if self.max_workers <= 0:
+            return None
+        status = self.store.request_cancel(assessment_id)
+        if status == 'cancelling':
+            self._wakeup.set()
+        return status
+
+    def get_job(self, assessment_id):
+        """获取评估最近一次的任务信息"""
+        return self.store.get_job(assessment_id)
+
+    def _start(self):
+        """启动调度线程（只启动一次）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            recovered = self.store.recover()
+            if recovered:
+                print(f"Requeued {recovered} interrupted assessment jobs")
+            self._config = _worker_config(self.app)
+            atexit.register(self._terminate_all)
+            self._thread = threading.Thread(target=self._dispatch, name='assessment-dispatcher', daemon=True)
+            self._thread.start()
+
+    def _dispatch(self):
+        """调度循环：检查执行中的子进程，有空闲位置时领取任务并启动子进程"""
+        while True:
+            self._wakeup.wait(JOB_POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self._check_running()
+            except Exception as e:
+                print(f"Error checking assessment jobs: {str(e)}")
+            while len(self._running) < self.max_workers:
+                try:
+                    job = self.store.claim(os.getpid(), _owner_token())
+                except sqlite3.Error as e:
+                    print(f"Error claiming assessment job: {str(e)}")
+                    break
+                if job is None:
+                    break
+                try:
+                    process = _get_context().Process(
+                        target=_run_job_process,
+                        args=(self._config, job['assessment_id'], job['rule_ids'], self.limits),
+                        name=f"assessment-job-{job['id']}"
+                    )
+                    process.start()
+                except Exception as e:
+                    self._job_failed(job, str(e) or e.__class__.__name__)
+                    continue
+                deadline = time.monotonic() + self.timeout if self.timeout > 0 else None
+                with self._lock:
+                    self._running[job['id']] = {'job': job, 'process': process, 'deadline': deadline}
+
+    def _check_running(self):
+        """处理已结束、超时和被请求取消的子进程"""
+        if not self._running:
+            return
+        cancelling = self.store.cancelling_jobs(os.getpid(), _owner_token())
+        now = time.monotonic()
+        for job_id, entry in list(self._running.items()):
+            job, process = entry['job'], entry['process']
+            if process.exitcode is not None:
+                self._release(job_id)
+                if process.exitcode == 0:
+                    self.store.finish(job_id, 'done')
+                else:
+                    self._job_failed(job, self._exit_message(process.exitcode))
+            elif job_id in cancelling:
+                _kill_process_group(process)
+                self._release(job_id)
+                self._job_cancelled(job)
+            elif entry['deadline'] is not None and now > entry['deadline']:
+                _kill_process_group(process)
+                self._release(job_id)
+                self._job_failed(job, f"评估超过时间限制（{self.timeout}秒），已终止")
+
+    def _release(self, job_id):
+        with self._lock:
+            entry = self._running.pop(job_id)
+        entry['process'].join(1)
+
+    def _exit_message(self, exitcode):
+        """子进程非正常退出时的错误信息"""
+        if resource is not None and exitcode in (-signal.SIGXCPU, -signal.SIGKILL) and self.limits['cpu_seconds']:
+            return f"评估超过CPU时间限制（{self.limits['cpu_seconds']}秒），已终止"
+        if exitcode == -signal.SIGKILL:
+            return "工作进程被强制终止（可能是内存不足）"
+        return f"工作进程异常退出（退出码 {exitcode}）"
+
+    def _job_failed(self, job, message):
+        """子进程异常退出、超时等情况：记录任务失败并把评估标记为失败"""
+        print(f"Error running assessment job {job['id']}: {message}")
+        self.store.finish(job['id'], 'failed', message)
+        from extensions import db
+        from models.assessment import Assessment
+        with self.app.app_context():
+            assessment = db.session.get(Assessment, job['assessment_id'])
+            if assessment is not None and assessment.status not in ('completed', 'failed', 'cancelled'):
+                assessment.mark_failed(message)
+                db.session.commit()
+
+    def _job_cancelled(self, job):
+        """子进程已按取消请求终止：记录任务取消并把评估标记为已取消"""
+        self.store.finish(job['id'], 'cancelled')
+        from extensions import db
+        from models.assessment import Assessment
+        with self.app.app_context():
+            assessment = db.session.get(Assessment, job['assessment_id'])
+            if assessment is not None and assessment.status not in ('completed', 'failed', 'cancelled'):
+                assessment.mark_cancelled()
+                db.session.commit()
+
+    def _terminate_all(self):
+        """Web进程退出时终止执行中的子进程，任务在下次启动时重新入队"""
+        for entry in list(self._running.values()):
+            _kill_process_group(entry['process'])
+
+def init_job_queue(app):
+    """
+    初始化评估任务队列
+
+    Args:
+        app: Flask应用实例
+    """
+    db_path = app.config.get('ASSESSMENT_QUEUE_DATABASE') or os.path.join(app.instance_path, 'assessment_jobs.sqlite')
+    store = JobStore(db_path)
+    app.extensions['assessment_queue'] = AssessmentQueue(
+        app, store, app.config.get('ASSESSMENT_WORKERS', 2),
+        timeout=app.config.get('ASSESSMENT_TIMEOUT', 0),
+        cpu_limit=app.config.get('ASSESSMENT_CPU_LIMIT', 0),
+        address_space_limit=app.config.get('ASSESSMENT_ADDRESS_SPACE_LIMIT', 0)
+    )
+
+def get_assessment_queue():
+    """
+    获取当前应用的评估任务队列
+
+    Returns:
+        AssessmentQueue: 任务队列
+    """
+    return current_app.extensions['assessment_queue']
+
+def execute_assessment(assessment_id, rule_ids):
+    """
+    执行评估并更新评估状态，需要在应用上下文中调用
+
+    Args:
+        assessment_id: 评估ID
+        rule_ids: 数据质量规则ID列表
+    """
+    from extensions import db
+    from models.dataset import Dataset
+    from models.assessment import Assessment, DataQualityRule
+    from utils.assessment_engine import run_assessment, MEMORY_LIMIT_ERROR
+
+    assessment = db.session.get(Assessment, assessment_id)
+    if assessment is None:
+        # 评估在排队期间已被删除
+        return
+
+    assessment.mark_processing()
+    db.session.commit()
+
+    try:
+        dataset = db.session.get(Dataset, assessment.dataset_id)
+        rules = DataQualityRule.query.filter(DataQualityRule.id.in_(rule_ids)).all() if rule_ids else []
+        results = run_assessment(dataset, rules)
+    except MemoryError:
+        # run_assessment 之外（例如读取规则时）的内存分配失败
+        results = {'error': MEMORY_LIMIT_ERROR}
+    except Exception as e:
+        results = {'error': str(e)}
+
+    if 'error' in results:
+        assessment.mark_failed(results['error'])
+    else:
+        assessment.set_results(results)
+    db.session.commit()
+
+def _run_job_process(config, assessment_id, rule_ids, limits):
+    """
+    在子进程中执行评估任务
+
+    子进程自成一个进程组，终止时连同评估创建的进程池一起终止；
+    资源限制由该进程组中的各进程继承。
+    """
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    _apply_resource_limits(limits['cpu_seconds'], limits['address_space'])
+    from app import create_app
+    app = create_app(config)
+    with app.app_context():
+        execute_assessment(assessment_id, rule_ids)
+
+def _apply_resource_limits(cpu_seconds, address_space):
+    """
+    设置当前进程的CPU时间和地址空间限制
+
+    Args:
+        cpu_seconds: CPU时间（秒），超过后收到SIGXCPU；0表示不限制
+        address_space: 地址空间（字节），超过后内存分配失败（MemoryError）；0表示不限制
+    """
+    if resource is None:
+        return
+    if cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + int(cpu_seconds)
+        _set_limit(resource.RLIMIT_CPU, soft, soft + CPU_LIMIT_GRACE)
+    if address_space:
+        _set_limit(resource.RLIMIT_AS, int(address_space), int(address_space))
+
+def _set_limit(kind, soft, hard):
+    """设置资源限制，不超过已有的硬限制"""
+    current_hard = resource.getrlimit(kind)[1]
+    if current_hard != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current_hard), min(hard, current_hard)
+    try:
+        resource.setrlimit(kind, (soft, hard))
+    except (ValueError, OSError) as e:
+        print(f"Error setting resource limit {kind}: {str(e)}")
+
+def _kill_process_group(process):
+    """终止子进程及其所在进程组中的全部进程"""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        # 子进程尚未建立进程组或已退出
+        if process.exitcode is None:
+            process.kill()
+    process.join(5)
+
+def _get_context():
+    """
+    启动子进程使用的多进程上下文
+
+    支持时使用 forkserver：子进程从预先导入了评估模块的单线程服务进程fork，
+    既避免在含有线程的Web进程中fork，又不需要每个任务重新导入pandas等模块；否则使用spawn。
+    """
+    global _context
+    if _context is None:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            _context = multiprocessing.get_context('forkserver')
+            _context.set_forkserver_preload(WORKER_PRELOAD_MODULES)
+        else:
+            _context = multiprocessing.get_context('spawn')
+    return _context
+
+def _worker_config(app):
+    """提取可以传递给子进程的配置项"""
+    config = {}
+    for key, value in app.config.items():
+        if not key.isupper():
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        config[key] = value
+    return config
+
+def _row_to_dict(row):
+    job = dict(row)
+    job['rule_ids'] = json.loads(job['rule_ids'])
+    return job
+
+def _owner_token(pid=None):
+    """
+    调度进程的标识，用于区分重复使用的进程ID
+
+    Linux上由系统启动ID和进程的启动时间组成，其他进程也可以据此核对；
+    无法读取 /proc 时，当前进程使用进程内生成的随机标识，其他进程返回None。
+
+    Args:
+        pid: 进程ID（可选，默认当前进程）
+
+    Returns:
+        str: 进程标识；无法获取时返回None
+    """
+    global _own_token
+    current = pid is None or pid == os.getpid()
+    pid = os.getpid() if pid is None else pid
+    if current and _own_token is not None and _own_token[0] == pid:
+        return _own_token[1]
+
+    token = None
+    try:
+        with open('/proc/sys/kernel/random/boot_id', 'r') as f:
+            boot_id = f.read().strip()
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+        # 进程名中可能含有空格和括号，从最后一个 ')' 之后解析；其后第20个字段是启动时间
+        token = f"{boot_id}:{stat[stat.rindex(b')') + 2:].split()[19].decode()}"
+    except (OSError, ValueError, IndexError):
+        pass
+    if current:
+        token = token or uuid.uuid4().hex
+        _own_token = (pid, token)
+    return token
+
+def _owner_alive(pid, token):
+    """
+    检查领取任务的调度进程是否仍在运行
+
+    进程ID相同但标识不同（例如重启后的进程得到了相同的进程ID）视为原进程已退出。
+    """
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return token == _owner_token()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    # 无法获取其他进程的标识时只能按进程ID判断
+    current = _owner_token(pid)
+    return current is None or token is None or current == token
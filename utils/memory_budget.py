@@ -0,0 +1,167 @@
+"""
+单个任务的内存预算
+
+在整体载入数据集之前，根据文件大小、列数和抽样读取的前若干行的数据类型
+估计载入后DataFrame占用的内存；估计值（乘以解析和评估的额外开销系数）超过预算时，
+调用方改用分块流式或抽样的执行方式，避免一个过大的上传文件耗尽工作进程的内存。
+
+估计方法：
+- 每行内存：前 ESTIMATE_SAMPLE_ROWS 行的 DataFrame.memory_usage(deep=True) 除以行数；
+- 行数：已知时直接使用；CSV按抽样行在文件中占用的字节数推算，JSON按抽样记录序列化后的长度推算，
+  XLSX读取工作表记录的行数，无法得到时按文件大小乘以解压系数估计内存。
+"""
+import os
+from utils.settings import get_setting
+from utils.dataset_loader import STREAMING_FILE_TYPES, get_file_type, load_preview
+
+# 估计每行内存时抽样读取的行数
+ESTIMATE_SAMPLE_ROWS = 1000
+
+# 解析文件时的临时缓冲和评估过程中的中间结果相对DataFrame本身的倍数
+LOAD_OVERHEAD_FACTOR = 2.0
+
+# 无法得到行数的Excel文件：载入后的内存约为压缩文件大小的倍数
+EXCEL_EXPANSION_FACTOR = 10
+
+# 超出预算时可用的执行方式
+FALLBACK_STRATEGIES = ('streaming', 'sample')
+
+def get_memory_budget():
+    """
+    获取单个任务的内存预算
+
+    Returns:
+        int: 字节数，0表示不限制
+    """
+    return int(get_setting('ASSESSMENT_MEMORY_BUDGET', 2 * 1024 * 1024 * 1024) or 0)
+
+def estimate_dataframe_size(file_path, file_type=None, row_count=None, sample_rows=ESTIMATE_SAMPLE_ROWS):
+    """
+    估计整体载入文件后DataFrame占用的内存
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（可选，默认根据扩展名判断）
+        row_count: 已知的行数（可选）
+        sample_rows: 抽样读取的行数
+
+    Returns:
+        dict: 包含 estimated_rows、column_count、bytes_per_row、estimated_bytes 的字典
+    """
+    file_type = (file_type or get_file_type(file_path)).lower()
+    size = os.path.getsize(file_path)
+    sample = load_preview(file_path, file_type, limit=sample_rows)
+    bytes_per_row = float(sample.memory_usage(deep=True, index=False).sum()) / len(sample) if len(sample) else 0.0
+
+    if row_count is None and len(sample) < sample_rows:
+        # 抽样已读到文件末尾
+        row_count = len(sample)
+    if row_count is None:
+        if file_type == 'csv':
+            row_count = _estimate_csv_rows(file_path, size, len(sample))
+        elif file_type == 'json':
+            text_bytes = len(sample.to_json(orient='records', force_ascii=False).encode('utf-8'))
+            row_count = int(size / (text_bytes / len(sample)))
+        else:
+            row_count = _excel_row_count(file_path)
+
+    if row_count is None:
+        estimated_bytes = size * EXCEL_EXPANSION_FACTOR
+    else:
+        estimated_bytes = bytes_per_row * row_count
+
+    return {
+        'estimated_rows': row_count,
+        'column_count': len(sample.columns),
+        'bytes_per_row': round(bytes_per_row, 1),
+        'estimated_bytes': int(estimated_bytes)
+    }
+
+def plan_memory_strategy(file_path, file_type=None, row_count=None):
+    """
+    按内存预算选择整体载入还是改用其他执行方式
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（可选，默认根据扩展名判断）
+        row_count: 已知的行数（可选）
+
+    Returns:
+        dict: 包含 budget_bytes、estimated_bytes、required_bytes、estimated_rows 和 strategy 的字典；
+              strategy 为 memory（在预算内）、streaming、sample，
+              或 rejected（超出预算且文件类型不支持分块读取）；未设置预算时返回None
+    """
+    budget = get_memory_budget()
+    if budget <= 0:
+        return None
+
+    file_type = (file_type or get_file_type(file_path)).lower()
+    try:
+        estimate = estimate_dataframe_size(file_path, file_type, row_count)
+    except Exception as e:
+        # 无法估计时按原方式整体载入
+        print(f"Error estimating memory for {file_path}: {str(e)}")
+        return {'budget_bytes': budget, 'estimated_bytes': None, 'strategy': 'memory'}
+
+    required = int(estimate['estimated_bytes'] * LOAD_OVERHEAD_FACTOR)
+    if required <= budget:
+        strategy = 'memory'
+    elif file_type in STREAMING_FILE_TYPES:
+        strategy = get_setting('ASSESSMENT_MEMORY_FALLBACK', 'streaming')
+        if strategy not in FALLBACK_STRATEGIES:
+            raise ValueError(f"未知的内存预算回退方式: {strategy}")
+    else:
+        strategy = 'rejected'
+
+    return {
+        'budget_bytes': budget,
+        'estimated_bytes': estimate['estimated_bytes'],
+        'required_bytes': required,
+        'estimated_rows': estimate['estimated_rows'],
+        'column_count': estimate['column_count'],
+        'strategy': strategy
+    }
+
+def format_budget_error(plan):
+    """
+    超出预算且无法分块读取时的错误信息
+
+    Args:
+        plan: plan_memory_strategy 返回的字典
+
+    Returns:
+        str: 错误信息
+    """
+    return (f"数据集载入约需 {plan['required_bytes'] / 1024 / 1024:.0f} MB 内存，"
+            f"超过内存预算 {plan['budget_bytes'] / 1024 / 1024:.0f} MB，且该文件类型不支持分块读取")
+
+def _estimate_csv_rows(file_path, size, sample_rows):
+    """按前若干行在文件中占用的字节数推算CSV的行数（引号内的换行按行计，只影响估计精度）"""
+    with open(file_path, 'rb') as f:
+        header_bytes = len(f.readline())
+        sample_bytes = 0
+        lines = 0
+        for line in f:
+            sample_bytes += len(line)
+            lines += 1
+            if lines >= sample_rows:
+                break
+    if sample_bytes == 0:
+        return 0
+    return int((size - header_bytes) / (sample_bytes / lines))
+
+def _excel_row_count(file_path):
+    """读取XLSX工作表记录的行数（不含表头）；无法得到时返回None"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        return None
+    try:
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            max_row = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+    except Exception:
+        return None
+    return max_row - 1 if max_row else None
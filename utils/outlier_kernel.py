@@ -0,0 +1,185 @@
+"""
+数值列的批量异常值检测
+
+按 OUTLIER_BLOCK_ROWS 行分块遍历全部数值列：第一遍用Chan的合并公式累计各列的
+有效值数量、均值和离差平方和，第二遍统计各检测器判定的异常值数量。
+各分块复用同一组临时数组，不复制整列数据，也不为每一列单独生成Z分数等临时Series。
+
+均值和标准差与逐列调用 Series.mean()、Series.std() 在浮点误差范围内一致；
+zscore 检测器的判定与 np.abs((series - mean) / std) > 3 相同。
+
+检测器把每列描述为 (中心, 尺度, 阈值)，|x - 中心| / 尺度 > 阈值 的值为异常值；
+尺度不大于0（或无法计算）的列没有异常值。
+"""
+import numpy as np
+
+# Z分数检测器：偏离均值超过3倍标准差
+ZSCORE_THRESHOLD = 3
+
+# MAD检测器：修正Z分数 0.6745 * |x - 中位数| / MAD 超过3.5
+MAD_SCALE = 0.6745
+MAD_THRESHOLD = 3.5
+
+# IQR检测器：超出 [Q1 - 1.5 * IQR, Q3 + 1.5 * IQR]
+IQR_FACTOR = 1.5
+
+# 每次处理的行数，限制临时数组的大小
+OUTLIER_BLOCK_ROWS = 65536
+
+def is_numeric_dtype(dtype):
+    """
+    判断列类型能否按数值处理（整数、无符号整数和浮点数）
+
+    Args:
+        dtype: 列的数据类型
+
+    Returns:
+        bool: 是否为数值类型
+    """
+    return isinstance(dtype, np.dtype) and dtype.kind in 'iuf'
+
+def numeric_arrays(df, columns):
+    """
+    取出数值列的一维数组（尽可能不复制数据）
+
+    Args:
+        df: pandas DataFrame
+        columns: 数值列名列表
+
+    Returns:
+        list: 各列的numpy数组
+    """
+    return [df[col].to_numpy() for col in columns]
+
+def _row_blocks(arrays):
+    """
+    按 OUTLIER_BLOCK_ROWS 行分块，把各列的值复制到复用的float64缓冲区
+
+    Yields:
+        numpy.ndarray: 形状为 (分块行数, 列数) 的数组，缺失值为NaN
+    """
+    length = len(arrays[0]) if arrays else 0
+    buffer = np.empty((min(length, OUTLIER_BLOCK_ROWS), len(arrays)), dtype=np.float64, order='F')
+    for start in range(0, length, OUTLIER_BLOCK_ROWS):
+        rows = buffer[:min(OUTLIER_BLOCK_ROWS, length - start)]
+        for i, values in enumerate(arrays):
+            rows[:, i] = values[start:start + len(rows)]
+        yield rows
+
+def _valid_values(values):
+    """去除缺失值后的float64副本，可以原地修改"""
+    if values.dtype.kind == 'f':
+        return values[~np.isnan(values)].astype(np.float64, copy=False)
+    return values.astype(np.float64)
+
+def _zscore_detector(arrays, moments):
+    return moments['mean'], moments['std'], ZSCORE_THRESHOLD
+
+def _mad_detector(arrays, moments):
+    median = np.full(len(arrays), np.nan)
+    mad = np.full(len(arrays), np.nan)
+    for i, values in enumerate(arrays):
+        values = _valid_values(values)
+        if not len(values):
+            continue
+        # 逐列计算，中位数和绝对离差都在同一个副本上原地完成
+        median[i] = np.median(values, overwrite_input=True)
+        np.subtract(values, median[i], out=values)
+        np.abs(values, out=values)
+        mad[i] = np.median(values, overwrite_input=True)
+    return median, mad / MAD_SCALE, MAD_THRESHOLD
+
+def _iqr_detector(arrays, moments):
+    q1 = np.full(len(arrays), np.nan)
+    q3 = np.full(len(arrays), np.nan)
+    for i, values in enumerate(arrays):
+        values = _valid_values(values)
+        if len(values):
+            q1[i], q3[i] = np.percentile(values, [25, 75], overwrite_input=True)
+    # 以四分位数的中点为中心、IQR为尺度，阈值 0.5 + 1.5 对应上下两个边界
+    return (q1 + q3) / 2, q3 - q1, 0.5 + IQR_FACTOR
+
+# 可用的异常值检测器：名称 -> 计算 (中心, 尺度, 阈值) 的函数
+OUTLIER_DETECTORS = {
+    'zscore': _zscore_detector,
+    'mad': _mad_detector,
+    'iqr': _iqr_detector
+}
+
+def column_moments(arrays):
+    """
+    分块计算各列的有效值数量、均值和样本标准差（ddof=1）
+
+    每个分块先求出自身的数量、均值和离差平方和，再用Chan的公式合并到累计结果中。
+
+    Args:
+        arrays: numeric_arrays 返回的数组列表
+
+    Returns:
+        dict: 包含 count、mean、std 三个一维数组的字典
+    """
+    count = np.zeros(len(arrays), dtype=np.int64)
+    mean = np.zeros(len(arrays))
+    m2 = np.zeros(len(arrays))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for rows in _row_blocks(arrays):
+            mask = np.isnan(rows)
+            block_count = len(rows) - mask.sum(axis=0)
+            np.copyto(rows, 0.0, where=mask)
+            block_mean = rows.sum(axis=0) / np.maximum(block_count, 1)
+
+            # 原地计算分块内的离差平方
+            np.subtract(rows, block_mean, out=rows)
+            np.square(rows, out=rows)
+            np.copyto(rows, 0.0, where=mask)
+            block_m2 = rows.sum(axis=0)
+
+            total = count + block_count
+            delta = block_mean - mean
+            weight = np.where(total > 0, block_count / np.maximum(total, 1), 0.0)
+            mean += delta * weight
+            m2 += block_m2 + delta * delta * count * weight
+            count = total
+
+        mean = np.where(count > 0, mean, np.nan)
+        # 有效值不足两个时标准差为NaN
+        std = np.sqrt(m2 / np.where(count > 1, count - 1, np.nan))
+    return {'count': count, 'mean': mean, 'std': std}
+
+def compute_outlier_counts(arrays, detectors=('zscore',)):
+    """
+    计算各列的均值、标准差和各检测器判定的异常值数量
+
+    Args:
+        arrays: numeric_arrays 返回的数组列表
+        detectors: 检测器名称列表，见 OUTLIER_DETECTORS
+
+    Returns:
+        dict: 包含 count、mean、std 以及 outliers（{检测器名称: 各列异常值数量}）的字典
+    """
+    moments = column_moments(arrays)
+    parameters = {}
+    for name in detectors:
+        if name not in OUTLIER_DETECTORS:
+            raise ValueError(f"未知的异常值检测器: {name}")
+        parameters[name] = OUTLIER_DETECTORS[name](arrays, moments)
+
+    outliers = {name: np.zeros(len(arrays), dtype=np.int64) for name in parameters}
+    length = len(arrays[0]) if arrays else 0
+    deviation_buffer = np.empty((min(length, OUTLIER_BLOCK_ROWS), len(arrays)), dtype=np.float64, order='F')
+    flags_buffer = np.empty(deviation_buffer.shape, dtype=bool, order='F')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for rows in _row_blocks(arrays):
+            deviation = deviation_buffer[:len(rows)]
+            exceeded = flags_buffer[:len(rows)]
+            for name, (center, scale, threshold) in parameters.items():
+                np.subtract(rows, center, out=deviation)
+                np.divide(deviation, scale, out=deviation)
+                np.abs(deviation, out=deviation)
+                np.greater(deviation, threshold, out=exceeded)
+                outliers[name] += exceeded.sum(axis=0)
+
+    for name, (center, scale, threshold) in parameters.items():
+        outliers[name][~(scale > 0)] = 0
+
+    return dict(moments, outliers=outliers)
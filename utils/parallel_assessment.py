@@ -0,0 +1,151 @@
+"""
+按列分区的多进程评估
+
+宽表的各项评估都是逐列独立计算的。本模块把列集合切分为若干分区交给进程池，
+每个工作进程以内存映射方式只读取自己分区的列（列式缓存文件），
+数据本身不在进程之间传递；各分区返回的列档案和规则结果按原列顺序合并，
+再由 evaluate_profile_stages 汇总为与内存评估相同的 column_scores 等结果。
+合并后的档案会被保存，之后的评估和图表可以直接使用。
+"""
+import os
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.settings import get_setting
+from utils.dataset_loader import ensure_columnar_cache, read_columnar_cache
+from utils.dataset_profile import PROFILE_VERSION, build_dataset_profile, save_dataset_profile, evaluate_profile_stages
+from utils.rule_plan import compile_rule_plan
+
+# 每个工作进程平均分到的分区数，分区越多负载越均衡
+PARTITIONS_PER_WORKER = 2
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_parallel_workers():
+    """
+    获取按列并行评估的工作进程数量
+
+    Returns:
+        int: 工作进程数量
+    """
+    return get_setting('ASSESSMENT_PARALLEL_WORKERS', 0) or os.cpu_count() or 1
+
+def run_column_parallel_stages(file_path, file_type, rules=None, workers=None):
+    """
+    以按列分区的多进程方式计算各评估阶段的结果
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型
+        rules: 数据质量规则列表（可选）
+        workers: 工作进程数量（可选，默认使用配置）
+
+    Returns:
+        dict: 与内存评估相同结构的各阶段结果，另含 workers、partition_count；
+              无法使用列式缓存时返回None
+    """
+    cache_path = ensure_columnar_cache(file_path, file_type)
+    if cache_path is None:
+        return None
+
+    import pyarrow.parquet as pq
+    metadata = pq.read_metadata(cache_path)
+    columns = pq.read_schema(cache_path).names
+    workers = workers or get_parallel_workers()
+    plan = compile_rule_plan(rules) if rules else None
+    # 工作进程没有应用上下文，检测器和近似统计配置需要显式传入
+    outlier_detector = get_setting('ASSESSMENT_OUTLIER_DETECTOR', 'zscore')
+    approximate = get_setting('ASSESSMENT_APPROXIMATE_STATS', False)
+
+    partitions = _split_columns(columns, workers * PARTITIONS_PER_WORKER)
+    pool = get_process_pool(workers)
+    futures = [
+        pool.submit(_evaluate_partition, cache_path, file_type, partition, plan, outlier_detector, approximate)
+        for partition in partitions
+    ]
+
+    profile_columns = []
+    outcomes = {}
+    try:
+        for future in futures:
+            partition_columns, partition_outcomes = future.result()
+            profile_columns.extend(partition_columns)
+            outcomes.update(partition_outcomes)
+    except BrokenProcessPool:
+        reset_process_pool()
+        raise
+
+    profile = {
+        'version': PROFILE_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'row_count': metadata.num_rows,
+        'column_count': len(columns),
+        'outlier_detector': outlier_detector,
+        'approximate': approximate,
+        'columns': profile_columns
+    }
+    save_dataset_profile(file_path, profile)
+
+    stages = evaluate_profile_stages(profile)
+    stages['rules'] = plan.assemble(outcomes) if plan else None
+    if rules:
+        stages['accuracy'] = None
+    stages['workers'] = workers
+    stages['partition_count'] = len(partitions)
+    return stages
+
+def _split_columns(columns, partition_count):
+    """把列切分为连续的分区"""
+    partition_count = max(1, min(partition_count, len(columns)))
+    size, remainder = divmod(len(columns), partition_count)
+    partitions = []
+    start = 0
+    for i in range(partition_count):
+        end = start + size + (1 if i < remainder else 0)
+        partitions.append(columns[start:end])
+        start = end
+    return partitions
+
+def _evaluate_partition(cache_path, file_type, columns, plan, outlier_detector, approximate):
+    """
+    在工作进程中评估一个列分区
+
+    Returns:
+        tuple: (列档案列表, {规则序号: 规则结果})
+    """
+    from utils.column_stats import ColumnStats
+
+    df = read_columnar_cache(cache_path, file_type, columns=columns)
+    stats = ColumnStats(df, outlier_detector, approximate)
+    profile = build_dataset_profile(df, stats=stats)
+    outcomes = plan.evaluate(df, stats) if plan else {}
+    return profile['columns'], outcomes
+
+def get_process_pool(workers):
+    """
+    获取评估共用的进程池，工作进程数量变化时重新创建
+
+    Args:
+        workers: 工作进程数量
+
+    Returns:
+        ProcessPoolExecutor: 进程池
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+def reset_process_pool():
+    """进程池中有进程异常退出后丢弃进程池"""
+    global _pool
+    with _pool_lock:
+        _pool = None
@@ -0,0 +1,224 @@
+"""
+按行分区的多进程评估
+
+单个很长的CSV文件按字节范围切分为若干分区，每个分区的边界都落在行首
+（引号内的换行不会被当作分区边界）。工作进程各自以流式方式读取自己的字节范围，
+把数据块累加到可合并的统计状态（DatasetAccumulator）中；主进程按分区顺序合并
+各分区的状态后，再并行地按合并后的均值和标准差统计异常值。
+
+合并使用的都是可交换、可结合的统计量（计数、矩统计、去重计数器、最新日期、
+规则的符合行数），完整性、唯一性、一致性和规则通过率与分区数量无关，
+与流式评估的结果相同。
+"""
+import io
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures.process import BrokenProcessPool
+from utils.accumulators import DatasetAccumulator, ColumnAccumulator, RuleAccumulator
+from utils.parallel_assessment import get_parallel_workers, get_process_pool, reset_process_pool
+
+# 每个工作进程平均分到的分区数，分区越多负载越均衡
+PARTITIONS_PER_WORKER = 2
+
+# 每个分区至少包含的字节数，小文件不值得切分
+MIN_PARTITION_BYTES = 8 * 1024 * 1024
+
+# 查找分区边界时每次读取的字节数
+_SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+_QUOTE = ord('"')
+_NEWLINE = ord('\n')
+
+def run_row_parallel_stages(file_path, file_type, rules=None, workers=None, chunk_size=100000, partition_count=None):
+    """
+    以按行分区的多进程方式计算各评估阶段的结果
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型，只支持csv
+        rules: 数据质量规则列表（可选）
+        workers: 工作进程数量（可选，默认使用配置）
+        chunk_size: 工作进程读取时每块的行数
+        partition_count: 分区数量（可选，默认按工作进程数量和文件大小确定）
+
+    Returns:
+        dict: 与内存评估相同结构的各阶段结果，另含 chunk_count、workers、partition_count；
+              文件类型不支持时返回None
+    """
+    if file_type != 'csv':
+        return None
+
+    workers = workers or get_parallel_workers()
+    if partition_count is None:
+        partition_count = max(1, min(
+            workers * PARTITIONS_PER_WORKER,
+            os.path.getsize(file_path) // MIN_PARTITION_BYTES
+        ))
+    header, ranges = split_csv_ranges(file_path, partition_count)
+    rule_states = [RuleAccumulator(rule).to_dict() for rule in rules] if rules else []
+
+    pool = get_process_pool(workers)
+    try:
+        # 第一遍：各分区累加统计量，按分区顺序合并
+        futures = [
+            pool.submit(_accumulate_range, file_path, header, start, end, rule_states, chunk_size)
+            for start, end in ranges
+        ]
+        accumulator = DatasetAccumulator([], file_type=file_type)
+        accumulator.rules = [RuleAccumulator.from_dict(state) for state in rule_states]
+        for future in futures:
+            accumulator.merge(future.result())
+
+        # 第二遍：按合并后的均值和标准差统计异常值
+        outlier_columns = accumulator.outlier_columns()
+        if outlier_columns:
+            moments = {col: accumulator.columns[col].numeric for col in outlier_columns}
+            futures = [
+                pool.submit(_count_range_outliers, file_path, header, start, end, moments, chunk_size)
+                for start, end in ranges
+            ]
+            for future in futures:
+                for col, count in future.result().items():
+                    accumulator.columns[col].outlier_count += count
+    except BrokenProcessPool:
+        reset_process_pool()
+        raise
+
+    stages = accumulator.finalize_stages()
+    stages['workers'] = workers
+    stages['partition_count'] = len(ranges)
+    return stages
+
+def split_csv_ranges(file_path, partition_count):
+    """
+    把CSV文件的数据部分按字节切分为若干分区
+
+    分区边界是引号外的换行符之后的位置：从目标位置向后找到第一个之前引号数量为偶数的换行符。
+    转义的引号（""）成对出现，不影响奇偶性。
+
+    Args:
+        file_path: 文件路径
+        partition_count: 期望的分区数量
+
+    Returns:
+        tuple: (表头的字节内容, [(起始位置, 结束位置), ...])；文件很小时分区可能少于期望数量
+    """
+    size = os.path.getsize(file_path)
+    # 第一个边界是表头行的结束位置，之后是各分区的目标位置
+    targets = [0] + [size * i // partition_count for i in range(1, partition_count)]
+    boundaries = _find_row_boundaries(file_path, targets)
+
+    with open(file_path, 'rb') as f:
+        header = f.read(boundaries[0])
+
+    positions = sorted(set(boundaries)) + [size]
+    ranges = [(start, end) for start, end in zip(positions[:-1], positions[1:]) if end > start]
+    return header, ranges or [(boundaries[0], size)]
+
+def _find_row_boundaries(file_path, targets):
+    """对每个目标位置，找到其后第一个位于引号外的换行符之后的位置（找不到时为文件末尾）"""
+    boundaries = []
+    pending = list(targets)
+    quotes_before = 0
+    offset = 0
+    carry = None
+    with open(file_path, 'rb') as f:
+        while pending:
+            block = f.read(_SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            block_end = offset + len(data)
+            while pending and (carry is not None or pending[0] < block_end):
+                start = 0 if carry is not None else max(0, pending[0] - offset)
+                parity = carry if carry is not None else (quotes_before + np.count_nonzero(data[:start] == _QUOTE)) % 2
+                tail = data[start:]
+                newlines = np.flatnonzero(tail == _NEWLINE)
+                if len(newlines):
+                    quote_counts = np.cumsum(tail == _QUOTE, dtype=np.int64)[newlines]
+                    outside = newlines[(parity + quote_counts) % 2 == 0]
+                else:
+                    outside = newlines
+                if len(outside):
+                    boundaries.append(offset + start + int(outside[0]) + 1)
+                    pending.pop(0)
+                    carry = None
+                else:
+                    # 本块中没有边界，带着引号奇偶性继续在下一块中查找
+                    carry = int((parity + np.count_nonzero(tail == _QUOTE)) % 2)
+                    break
+            quotes_before += np.count_nonzero(data == _QUOTE)
+            offset = block_end
+    size = os.path.getsize(file_path)
+    boundaries.extend(size for _ in pending)
+    return boundaries
+
+class _CsvRangeReader(io.RawIOBase):
+    """依次读出表头和文件中的一个字节范围，供 pd.read_csv 分块解析"""
+
+    def __init__(self, file_path, header, start, end):
+        self._file = open(file_path, 'rb')
+        self._file.seek(start)
+        self._prefix = header
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def _iter_range_chunks(file_path, header, start, end, chunk_size, usecols=None):
+    """分块读取CSV文件的一个字节范围"""
+    with io.BufferedReader(_CsvRangeReader(file_path, header, start, end)) as reader:
+        with pd.read_csv(reader, chunksize=chunk_size, usecols=usecols) as chunks:
+            for chunk in chunks:
+                yield chunk
+
+def _accumulate_range(file_path, header, start, end, rule_states, chunk_size):
+    """
+    在工作进程中累加一个分区的统计量
+
+    Returns:
+        DatasetAccumulator: 分区的统计状态
+    """
+    accumulator = DatasetAccumulator([], file_type='csv')
+    accumulator.rules = [RuleAccumulator.from_dict(state) for state in rule_states]
+    for chunk in _iter_range_chunks(file_path, header, start, end, chunk_size):
+        accumulator.update(chunk)
+    return accumulator
+
+def _count_range_outliers(file_path, header, start, end, moments, chunk_size):
+    """
+    在工作进程中统计一个分区的异常值数量
+
+    Args:
+        moments: {列名: 合并后的 Moments}
+
+    Returns:
+        dict: {列名: 异常值数量}
+    """
+    columns = {}
+    for col, column_moments in moments.items():
+        columns[col] = ColumnAccumulator(col)
+        columns[col].numeric = column_moments
+    for chunk in _iter_range_chunks(file_path, header, start, end, chunk_size, usecols=list(moments)):
+        for col, accumulator in columns.items():
+            accumulator.update_outliers(chunk[col])
+    return {col: accumulator.outlier_count for col, accumulator in columns.items()}
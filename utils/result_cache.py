@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+from utils.settings import get_setting, get_cache_folder
+from utils.disk_cache import atomic_write, list_entries, evict, remove_entries
+from utils.dataset_loader import get_file_hash
+from utils.rule_plan import rule_set_hash
+
+def get_result_cache_key(file_path, rules, engine_version, scoring):
+    """
+    计算评估结果的缓存键
+
+    由文件内容哈希、规则集合哈希、评估引擎版本和评分配置（权重、异常值检测器等）共同决定，
+    任一项变化都会得到不同的缓存键。文件哈希作为前缀，便于按数据集失效。
+
+    Args:
+        file_path: 数据文件路径
+        rules: 数据质量规则列表（可选）
+        engine_version: 评估引擎版本
+        scoring: 评分配置
+
+    Returns:
+        str: 缓存键
+    """
+    digest = hashlib.sha256(json.dumps({
+        'rules': rule_set_hash(rules or []),
+        'engine_version': engine_version,
+        'scoring': scoring
+    }, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{get_file_hash(file_path)}_{digest}"
+
+def load_cached_result(key):
+    """
+    读取缓存的评估结果，命中时更新其访问时间
+
+    Args:
+        key: 缓存键
+
+    Returns:
+        dict: 评估结果；未命中时返回None
+    """
+    path = _result_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return results
+
+def save_cached_result(key, results):
+    """
+    保存评估结果，超出容量上限时按最近访问时间淘汰
+
+    Args:
+        key: 缓存键
+        results: 评估结果
+    """
+    path = _result_path(key)
+    try:
+        atomic_write(path, lambda f: json.dump(results, f, ensure_ascii=False))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error saving assessment result {path}: {str(e)}")
+        return
+    evict(get_cache_folder('results'), '.json', get_setting('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+def invalidate_result_cache(file_path=None):
+    """
+    删除缓存的评估结果
+
+    Args:
+        file_path: 只删除该文件的结果（可选，默认全部删除）
+
+    Returns:
+        int: 删除的条目数量
+    """
+    prefix = get_file_hash(file_path) + '_' if file_path else ''
+    return remove_entries(get_cache_folder('results'), prefix + '*.json')
+
+def get_result_cache_stats():
+    """
+    获取评估结果缓存的使用情况
+
+    Returns:
+        dict: 包含 entries、size_bytes、max_bytes 的字典
+    """
+    entries = list_entries(get_cache_folder('results'), '.json')
+    return {
+        'entries': len(entries),
+        'size_bytes': sum(size for _, size, _ in entries),
+        'max_bytes': get_setting('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+    }
+
+def _result_path(key):
+    return os.path.join(get_cache_folder('results'), key + '.json')
@@ -0,0 +1,398 @@
+import re
+import json
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from utils.column_stats import ColumnStats
+
+# 缓存的规则执行计划数量上限
+RULE_PLAN_CACHE_SIZE = 64
+
+# 条件类型所属的类别，同一列上同一类别的规则一起执行
+CONDITION_FAMILIES = {
+    'not_null': 'counts',
+    'unique': 'counts',
+    'range': 'compare',
+    'equals': 'compare',
+    'not_equals': 'compare',
+    'greater_than': 'compare',
+    'less_than': 'compare',
+    'pattern': 'pattern',
+    'in_list': 'membership',
+    'not_in_list': 'membership'
+}
+
+# 与 apply_rule_condition 保持一致的错误信息
+_RANGE_ERROR = '范围格式无效，应为"最小值,最大值"'
+_PATTERN_ERROR = '正则表达式无效'
+_COMPARE_ERROR = '比较值格式无效'
+_LIST_ERROR = '列表格式无效'
+
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+def rule_set_hash(rules):
+    """
+    计算规则集合的哈希，用作执行计划的缓存键
+
+    Args:
+        rules: 数据质量规则列表
+
+    Returns:
+        str: 十六进制哈希字符串
+    """
+    digest = hashlib.sha256()
+    for rule in rules:
+        definition = getattr(rule, 'rule_definition', None)
+        if not isinstance(definition, str):
+            definition = json.dumps(rule.get_rule_definition(), sort_keys=True, ensure_ascii=False)
+        digest.update(json.dumps([rule.id, rule.name, rule.rule_type, definition], ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+def compile_rule_plan(rules):
+    """
+    获取规则集合的执行计划，相同的规则集合复用已编译的计划
+
+    Args:
+        rules: 数据质量规则列表
+
+    Returns:
+        RulePlan: 规则执行计划
+    """
+    key = rule_set_hash(rules)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = RulePlan(rules)
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > RULE_PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+class RulePlan:
+    """
+    编译后的规则执行计划
+
+    编译时只解析一次规则定义，预先转换阈值、范围边界、列表并编译正则表达式；
+    执行时按列和条件类别分组，同一列上的多条规则共享一次扫描：
+    数值比较和范围规则在排序后的数组上二分查找计数，
+    列表和正则规则在值计数（每个不同值只检查一次）上计算。
+    """
+
+    def __init__(self, rules):
+        self.entries = [_compile_rule(rule) for rule in rules]
+        self.groups = OrderedDict()
+        for index, entry in enumerate(self.entries):
+            self.groups.setdefault((entry['column'], entry['family']), []).append(index)
+
+    def execute(self, df, stats=None):
+        """
+        在数据上执行规则
+
+        Args:
+            df: pandas DataFrame
+            stats: 本次评估共享的列统计缓存（可选）
+
+        Returns:
+            dict: 与 apply_quality_rules 相同结构的结果
+        """
+        return self.assemble(self.evaluate(df, stats))
+
+    def evaluate(self, df, stats=None):
+        """
+        执行作用于df中已有列的规则
+
+        Args:
+            df: pandas DataFrame（可以只包含部分列）
+            stats: 本次评估共享的列统计缓存（可选）
+
+        Returns:
+            dict: {规则序号: 规则结果}，列不在df中的规则不包含在内
+        """
+        if stats is None:
+            stats = ColumnStats(df)
+
+        outcomes = {}
+        for (column, family), indexes in self.groups.items():
+            if column not in df.columns:
+                continue
+            entries = [self.entries[i] for i in indexes]
+            try:
+                group_outcomes = _FAMILY_EVALUATORS[family](df, column, entries, stats)
+            except Exception:
+                # 批量计算失败时逐条执行，保持与逐条评估相同的结果和错误信息
+                group_outcomes = [_evaluate_single(df, entry, stats) for entry in entries]
+            outcomes.update(zip(indexes, group_outcomes))
+        return outcomes
+
+    def assemble(self, outcomes):
+        """
+        把各条规则的结果汇总为 apply_quality_rules 的返回结构
+
+        Args:
+            outcomes: {规则序号: 规则结果}，缺少的规则视为列不存在而跳过
+
+        Returns:
+            dict: 包含规则应用结果的字典
+        """
+        rule_results = {
+            'rule_count': len(self.entries),
+            'passed_rules': 0,
+            'failed_rules': 0,
+            'pass_percentage': 0,
+            'details': []
+        }
+
+        for index, entry in enumerate(self.entries):
+            if index not in outcomes:
+                rule_results['details'].append({
+                    'rule_id': entry['rule_id'],
+                    'rule_name': entry['rule_name'],
+                    'status': 'skipped',
+                    'reason': f"列 '{entry['column']}' 不存在"
+                })
+                continue
+
+            result = outcomes[index]
+            if result['passed']:
+                rule_results['passed_rules'] += 1
+            else:
+                rule_results['failed_rules'] += 1
+            rule_results['details'].append({
+                'rule_id': entry['rule_id'],
+                'rule_name': entry['rule_name'],
+                'rule_type': entry['rule_type'],
+                'status': 'passed' if result['passed'] else 'failed',
+                'pass_rate': result['pass_rate'],
+                'details': result['details']
+            })
+
+        if rule_results['rule_count'] > 0:
+            rule_results['pass_percentage'] = round(
+                (rule_results['passed_rules'] / rule_results['rule_count']) * 100, 2
+            )
+
+        return rule_results
+
+def _compile_rule(rule):
+    """解析规则定义并预先转换条件参数"""
+    rule_def = rule.get_rule_definition()
+    condition = rule_def.get('condition')
+    value = rule_def.get('value')
+    entry = {
+        'rule_id': rule.id,
+        'rule_name': rule.name,
+        'rule_type': rule.rule_type,
+        'column': rule_def.get('column'),
+        'condition': condition,
+        'value': value,
+        'family': CONDITION_FAMILIES.get(condition, 'unsupported'),
+        'error': None
+    }
+
+    try:
+        if condition in ('not_null', 'unique'):
+            entry['threshold'] = float(value)
+        elif condition == 'range':
+            min_val, max_val = value.split(',')
+            entry['bounds'] = (float(min_val.strip()), float(max_val.strip()))
+        elif condition == 'pattern':
+            entry['regex'] = re.compile(value)
+        elif condition in ('equals', 'not_equals', 'greater_than', 'less_than'):
+            # 数值列使用的比较值；转换失败的错误在遇到数值列时报告
+            try:
+                entry['number'] = float(value)
+            except (TypeError, ValueError):
+                entry['number'] = None
+        elif condition in ('in_list', 'not_in_list'):
+            entry['value_list'] = [v.strip() for v in value.split(',')]
+    except Exception as e:
+        entry['error'] = {
+            'range': _RANGE_ERROR,
+            'pattern': _PATTERN_ERROR,
+            'in_list': _LIST_ERROR,
+            'not_in_list': _LIST_ERROR
+        }.get(condition, str(e))
+
+    return entry
+
+def _error_outcome(message):
+    return {'passed': False, 'pass_rate': 0, 'details': {'error': message}}
+
+def _rate_outcome(valid_count, total_count, threshold, details):
+    """根据符合条件的行数生成规则结果"""
+    pass_rate = (valid_count / total_count) * 100 if total_count > 0 else 0
+    return {
+        'passed': pass_rate >= threshold,
+        'pass_rate': round(pass_rate, 2),
+        'details': details
+    }
+
+def _evaluate_single(df, entry, stats):
+    """逐条执行规则"""
+    from utils.assessment_engine import apply_rule_condition
+    return apply_rule_condition(df, entry['column'], entry['condition'], entry['value'], stats)
+
+def _evaluate_counts(df, column, entries, stats):
+    """not_null 和 unique 规则：使用共享的空值掩码和唯一值计数"""
+    total_count = len(df)
+    outcomes = []
+    for entry in entries:
+        if entry['error'] is not None:
+            outcomes.append(_error_outcome(entry['error']))
+            continue
+        if entry['condition'] == 'not_null':
+            count_key, count = 'valid_count', (~stats.null_mask(column)).sum()
+        else:
+            count_key, count = 'unique_count', stats.nunique(column)
+        outcomes.append(_rate_outcome(count, total_count, entry['threshold'], {
+            count_key: int(count),
+            'total_count': total_count,
+            'threshold': entry['threshold']
+        }))
+    return outcomes
+
+def _count_sorted(sorted_values, total_count, condition, bounds):
+    """
+    在排序后的数组上二分查找，计算满足比较条件的行数（空值不满足任何比较）
+
+    返回numpy整数，使通过率的计算和舍入与逐条比较后求和完全一致。
+    """
+    if any(np.isnan(bound) for bound in bounds):
+        # 与NaN比较的结果都为False，只有不等于成立
+        return np.int64(total_count if condition == 'not_equals' else 0)
+    if condition == 'range':
+        low = np.searchsorted(sorted_values, bounds[0], side='left')
+        high = np.searchsorted(sorted_values, bounds[1], side='right')
+        return np.int64(max(high - low, 0))
+    value = bounds[0]
+    if condition == 'greater_than':
+        return np.int64(len(sorted_values) - np.searchsorted(sorted_values, value, side='right'))
+    if condition == 'less_than':
+        return np.int64(np.searchsorted(sorted_values, value, side='left'))
+    equal_count = np.int64(np.searchsorted(sorted_values, value, side='right') - np.searchsorted(sorted_values, value, side='left'))
+    return equal_count if condition == 'equals' else np.int64(total_count) - equal_count
+
+def _evaluate_compare(df, column, entries, stats):
+    """范围和比较规则：同一数值列上有多条规则时只排序一次"""
+    series = df[column]
+    total_count = len(df)
+    # 只对numpy数值类型排序；可空整数等扩展类型中的NA参与比较的结果不同，逐条计算
+    batched = isinstance(series.dtype, np.dtype) and series.dtype.kind in 'if' and len(entries) > 1
+    sorted_values = stats.sorted_values(column) if batched else None
+    outcomes = []
+    for entry in entries:
+        condition = entry['condition']
+        if condition == 'range':
+            if entry['error'] is not None:
+                outcomes.append(_error_outcome(entry['error']))
+                continue
+            min_val, max_val = entry['bounds']
+            try:
+                if sorted_values is not None:
+                    valid_count = _count_sorted(sorted_values, total_count, condition, entry['bounds'])
+                else:
+                    valid_count = ((series >= min_val) & (series <= max_val)).sum()
+            except Exception:
+                outcomes.append(_error_outcome(_RANGE_ERROR))
+                continue
+            outcomes.append(_rate_outcome(valid_count, total_count, 95, {
+                'valid_count': int(valid_count),
+                'total_count': total_count,
+                'min_value': min_val,
+                'max_value': max_val
+            }))
+            continue
+
+        if series.dtype.kind in 'ifc':
+            if entry['number'] is None:
+                outcomes.append(_error_outcome(_COMPARE_ERROR))
+                continue
+            compare_value = entry['number']
+        else:
+            compare_value = entry['value']
+        try:
+            if sorted_values is not None:
+                valid_count = _count_sorted(sorted_values, total_count, condition, (compare_value,))
+            elif condition == 'equals':
+                valid_count = (series == compare_value).sum()
+            elif condition == 'not_equals':
+                valid_count = (series != compare_value).sum()
+            elif condition == 'greater_than':
+                valid_count = (series > compare_value).sum()
+            else:
+                valid_count = (series < compare_value).sum()
+        except Exception:
+            outcomes.append(_error_outcome(_COMPARE_ERROR))
+            continue
+        outcomes.append(_rate_outcome(valid_count, total_count, 95, {
+            'valid_count': int(valid_count),
+            'total_count': total_count,
+            'compare_value': compare_value,
+            'condition': condition
+        }))
+    return outcomes
+
+def _evaluate_pattern(df, column, entries, stats):
+    """正则规则：多条规则时每个不同的字符串只匹配一次，再按出现次数累加"""
+    total_count = len(df)
+    counts = stats.string_value_counts(column) if len(entries) > 1 else None
+    outcomes = []
+    for entry in entries:
+        if entry['error'] is not None:
+            outcomes.append(_error_outcome(entry['error']))
+            continue
+        try:
+            if counts is not None:
+                matched = np.asarray(counts.index.str.match(entry['regex']), dtype=bool)
+                valid_count = counts.to_numpy()[matched].sum()
+            else:
+                valid_count = stats.strings(column).str.match(entry['regex']).sum()
+        except Exception:
+            outcomes.append(_error_outcome(_PATTERN_ERROR))
+            continue
+        outcomes.append(_rate_outcome(valid_count, total_count, 95, {
+            'valid_count': int(valid_count),
+            'total_count': total_count,
+            'pattern': entry['value']
+        }))
+    return outcomes
+
+def _evaluate_membership(df, column, entries, stats):
+    """列表规则：多条规则时在值计数上判断每个不同值是否在列表中"""
+    total_count = len(df)
+    counts = stats.value_counts(column) if len(entries) > 1 else None
+    outcomes = []
+    for entry in entries:
+        if entry['error'] is not None:
+            outcomes.append(_error_outcome(entry['error']))
+            continue
+        if counts is not None:
+            in_count = counts.to_numpy()[counts.index.isin(entry['value_list'])].sum()
+        else:
+            in_count = df[column].isin(entry['value_list']).sum()
+        valid_count = in_count if entry['condition'] == 'in_list' else total_count - in_count
+        outcomes.append(_rate_outcome(valid_count, total_count, 95, {
+            'valid_count': int(valid_count),
+            'total_count': total_count,
+            'value_list': entry['value_list'],
+            'condition': entry['condition']
+        }))
+    return outcomes
+
+def _evaluate_unsupported(df, column, entries, stats):
+    return [_error_outcome(f"不支持的条件类型: {entry['condition']}") for entry in entries]
+
+_FAMILY_EVALUATORS = {
+    'counts': _evaluate_counts,
+    'compare': _evaluate_compare,
+    'pattern': _evaluate_pattern,
+    'membership': _evaluate_membership,
+    'unsupported': _evaluate_unsupported
+}
@@ -0,0 +1,311 @@
+"""
+抽样评估
+
+单遍扫描数据文件，用蓄水池抽样得到固定大小的均匀样本（或按某列分层、按比例分配的样本），
+在样本上运行全部评估阶段和规则，适合对大文件做探索性的快速评估。
+CSV文件在安装了pyarrow时使用多线程的Arrow读取器，只有被抽中的行才会转换为pandas。
+
+置信区间使用随机分组法估计：把样本随机分成 SAMPLE_REPLICATE_GROUPS 组，分别计算各项得分，
+以组间方差除以组数估计整个样本得分的方差（乘以有限总体校正系数），再按t分布给出95%置信区间。
+
+误差说明：
+- 完整性、一致性、默认准确性和规则通过率等比例类得分是近似无偏的估计；
+- 唯一性和 unique 规则取决于整列的不同值数量，在样本上的结果偏高，置信区间不反映这一偏差；
+- 时效性使用样本中的最新日期，可能早于整列的最新日期。
+"""
+import numpy as np
+import pandas as pd
+from utils.dataset_loader import (
+    HAS_PYARROW, STREAMING_FILE_TYPES, load_dataset, iter_dataset_chunks,
+    iter_csv_batches, record_batch_to_frame
+)
+
+# 估计置信区间时的样本分组数
+SAMPLE_REPLICATE_GROUPS = 10
+
+# 自由度为 SAMPLE_REPLICATE_GROUPS - 1 的t分布97.5%分位数，对应95%置信区间
+SAMPLE_T_CRITICAL = 2.262
+SAMPLE_CONFIDENCE_LEVEL = 0.95
+
+# 分层抽样允许的最大层数（每层最多保留 sample_size 行候选）
+SAMPLE_MAX_STRATA = 100
+
+# 需要给出置信区间的得分
+SAMPLE_SCORE_FIELDS = [
+    'quality_score',
+    'completeness_score',
+    'consistency_score',
+    'accuracy_score',
+    'timeliness_score',
+    'business_value_score',
+    'overall_value_score'
+]
+
+class ReservoirSampler:
+    """
+    单遍扫描的蓄水池抽样
+
+    每行分配一个均匀分布的随机键，保留随机键最小的 sample_size 行，等价于不放回的简单随机抽样。
+    分层抽样时每层分别保留随机键最小的 sample_size 行，扫描结束后按各层行数的比例分配样本量；
+    未分层时所有行属于同一层。
+    各层候选行已满后只有随机键小于该层阈值的行才会被取出，其余行只需生成随机数。
+    """
+
+    def __init__(self, sample_size, stratify_column=None, seed=None):
+        self.sample_size = sample_size
+        self.stratify_column = stratify_column
+        self.row_count = 0
+        self._rng = np.random.default_rng(seed)
+        # 层的取值（转换为字符串）-> 层编号，以及各层的总行数和随机键阈值
+        self._strata_index = {}
+        self._strata_counts = np.zeros(0, dtype=np.int64)
+        self._thresholds = np.zeros(0)
+        self._frames = []
+        self._keys = []
+        self._positions = []
+        self._codes = []
+        self._candidate_count = 0
+        self._next_threshold_update = sample_size
+
+    @property
+    def strata_counts(self):
+        """各层的总行数：{层的取值: 行数}"""
+        return {stratum: int(self._strata_counts[code]) for stratum, code in self._strata_index.items()}
+
+    def add(self, chunk):
+        """
+        加入一个数据块
+
+        Args:
+            chunk: pandas.DataFrame 或 pyarrow.RecordBatch
+        """
+        is_frame = isinstance(chunk, pd.DataFrame)
+        row_count = len(chunk) if is_frame else chunk.num_rows
+        if row_count == 0:
+            return
+        keys = self._rng.random(row_count)
+        codes = self._stratum_codes(chunk, is_frame, row_count)
+        self._strata_counts += np.bincount(codes, minlength=len(self._strata_counts))
+
+        selected = np.flatnonzero(keys < self._thresholds[codes])
+        if len(selected):
+            if is_frame:
+                rows = chunk.iloc[selected]
+            else:
+                import pyarrow as pa
+                rows = record_batch_to_frame(chunk.take(pa.array(selected)))
+            self._frames.append(rows.reset_index(drop=True))
+            self._keys.append(keys[selected])
+            self._positions.append(self.row_count + selected)
+            self._codes.append(codes[selected])
+            self._candidate_count += len(selected)
+
+        self.row_count += row_count
+        if self._candidate_count > 2 * self.sample_size * len(self._strata_index):
+            self._prune()
+        elif self._candidate_count >= self._next_threshold_update:
+            self._update_thresholds()
+
+    def sample(self):
+        """
+        获取样本
+
+        Returns:
+            pandas.DataFrame: 按原始行顺序排列的样本
+        """
+        self._prune()
+        if not self._frames:
+            return pd.DataFrame()
+        frame, keys, positions, codes = self._frames[0], self._keys[0], self._positions[0], self._codes[0]
+
+        if self.stratify_column is not None:
+            # 候选行已按 (层, 随机键) 排序，每层取前 allocation 行
+            ranks = self._ranks(codes)
+            keep = ranks < self._allocate()[codes]
+            frame, positions = frame[keep], positions[keep]
+
+        order = np.argsort(positions, kind='stable')
+        return frame.iloc[order].reset_index(drop=True)
+
+    def _stratum_codes(self, chunk, is_frame, row_count):
+        """数据块中每行所属的层编号，出现新的层时扩展各层的计数和阈值"""
+        if self.stratify_column is None:
+            if not self._strata_index:
+                self._register_strata([None])
+            return np.zeros(row_count, dtype=np.int64)
+
+        if self.stratify_column not in (chunk.columns if is_frame else chunk.schema.names):
+            raise ValueError(f"分层列不存在: {self.stratify_column}")
+        if is_frame:
+            local_codes, labels = pd.factorize(chunk[self.stratify_column].astype(str))
+            labels = list(labels)
+        else:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            column = pc.fill_null(pc.cast(chunk.column(self.stratify_column), pa.string()), 'nan')
+            encoded = column.dictionary_encode()
+            local_codes = encoded.indices.to_numpy(zero_copy_only=False)
+            labels = encoded.dictionary.to_pylist()
+
+        self._register_strata(labels)
+        if len(self._strata_index) > SAMPLE_MAX_STRATA:
+            raise ValueError(f"分层列 {self.stratify_column} 的取值超过{SAMPLE_MAX_STRATA}个，无法分层抽样")
+        lookup = np.array([self._strata_index[label] for label in labels], dtype=np.int64)
+        return lookup[local_codes]
+
+    def _register_strata(self, labels):
+        for label in labels:
+            if label not in self._strata_index:
+                self._strata_index[label] = len(self._strata_index)
+        added = len(self._strata_index) - len(self._strata_counts)
+        if added:
+            self._strata_counts = np.concatenate([self._strata_counts, np.zeros(added, dtype=np.int64)])
+            self._thresholds = np.concatenate([self._thresholds, np.ones(added)])
+
+    def _sorted_candidates(self):
+        """合并候选行的随机键、位置和层编号，按 (层, 随机键) 排序"""
+        keys = np.concatenate(self._keys)
+        codes = np.concatenate(self._codes)
+        order = np.lexsort((keys, codes))
+        return order, keys[order], codes[order]
+
+    def _ranks(self, sorted_codes):
+        """已排序的候选行在所在层中的名次（从0开始）"""
+        starts = np.searchsorted(sorted_codes, sorted_codes, side='left')
+        return np.arange(len(sorted_codes)) - starts
+
+    def _set_thresholds(self, sorted_keys, sorted_codes, ranks):
+        """候选行已满的层以第 sample_size 小的随机键为阈值"""
+        full = ranks == self.sample_size - 1
+        self._thresholds[sorted_codes[full]] = sorted_keys[full]
+
+    def _update_thresholds(self):
+        """只根据随机键更新阈值（不合并数据块），尽早过滤之后的行"""
+        _, sorted_keys, sorted_codes = self._sorted_candidates()
+        self._set_thresholds(sorted_keys, sorted_codes, self._ranks(sorted_codes))
+        # 候选行数增长一半以上时再更新，避免每个数据块都排序
+        self._next_threshold_update = self._candidate_count * 3 // 2
+
+    def _prune(self):
+        """合并候选行，每层只保留随机键最小的 sample_size 行，并更新阈值"""
+        if not self._frames:
+            return
+        order, sorted_keys, sorted_codes = self._sorted_candidates()
+        ranks = self._ranks(sorted_codes)
+        self._set_thresholds(sorted_keys, sorted_codes, ranks)
+        keep = ranks < self.sample_size
+
+        frame = pd.concat(self._frames, ignore_index=True) if len(self._frames) > 1 else self._frames[0]
+        self._frames = [frame.iloc[order[keep]].reset_index(drop=True)]
+        self._keys = [sorted_keys[keep]]
+        self._positions = [np.concatenate(self._positions)[order[keep]]]
+        self._codes = [sorted_codes[keep]]
+        self._candidate_count = int(keep.sum())
+        self._next_threshold_update = self._candidate_count * 3 // 2
+
+    def _allocate(self):
+        """按各层行数的比例分配样本量（最大余数法），合计为 min(sample_size, 总行数)"""
+        total = min(self.sample_size, self.row_count)
+        quotas = total * self._strata_counts / self.row_count
+        allocation = np.floor(quotas).astype(np.int64)
+        remainder = total - int(allocation.sum())
+        allocation[np.argsort(allocation - quotas, kind='stable')[:remainder]] += 1
+        return allocation
+
+def draw_sample(file_path, file_type, sample_size, stratify_column=None, chunk_size=100000, seed=None):
+    """
+    单遍扫描文件并抽取样本
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型
+        sample_size: 样本行数
+        stratify_column: 分层抽样使用的列（可选，默认均匀抽样）
+        chunk_size: 非Arrow读取时每块的行数
+        seed: 随机种子（可选）
+
+    Returns:
+        tuple: (样本DataFrame, 文件总行数)
+    """
+    if file_type == 'csv' and HAS_PYARROW:
+        import pyarrow as pa
+        sampler = ReservoirSampler(sample_size, stratify_column, seed)
+        try:
+            for batch in iter_csv_batches(file_path):
+                sampler.add(batch)
+            return sampler.sample(), sampler.row_count
+        except pa.ArrowInvalid:
+            # 后续批次与推断的类型冲突，改用pandas重新扫描
+            pass
+
+    sampler = ReservoirSampler(sample_size, stratify_column, seed)
+    if file_type in STREAMING_FILE_TYPES:
+        for chunk in iter_dataset_chunks(file_path, file_type, chunk_size=chunk_size):
+            sampler.add(chunk)
+    else:
+        sampler.add(load_dataset(file_path, file_type))
+    return sampler.sample(), sampler.row_count
+
+def assign_replicate_groups(row_count, seed=None):
+    """
+    把样本行随机分配到各组，各组行数相差不超过1
+
+    Args:
+        row_count: 样本行数
+        seed: 随机种子（可选）
+
+    Returns:
+        numpy.ndarray: 每行所属的组号
+    """
+    return np.random.default_rng(seed).permutation(row_count) % SAMPLE_REPLICATE_GROUPS
+
+def confidence_interval(estimate, replicates, sample_fraction):
+    """
+    根据各组得分计算95%置信区间
+
+    Args:
+        estimate: 整个样本上的得分
+        replicates: 各组的得分列表
+        sample_fraction: 样本行数占总行数的比例
+
+    Returns:
+        list: [下限, 上限]，限制在0到100之间；得分或分组不足时返回None
+    """
+    values = [value for value in replicates if value is not None]
+    if estimate is None or len(values) < 2:
+        return None
+    variance = np.var(values, ddof=1) / len(values) * max(0.0, 1 - sample_fraction)
+    margin = SAMPLE_T_CRITICAL * float(np.sqrt(variance))
+    return [round(max(0.0, estimate - margin), 2), round(min(100.0, estimate + margin), 2)]
+
+def estimate_confidence_intervals(sample, rules, results, population_rows, seed=None):
+    """
+    用随机分组法估计各项得分的置信区间
+
+    Args:
+        sample: 样本DataFrame
+        rules: 数据质量规则列表（可选）
+        results: 整个样本上的评估结果
+        population_rows: 文件总行数
+        seed: 随机种子（可选）
+
+    Returns:
+        dict: {得分名称: [下限, 上限]}；样本行数不足时各项为None
+    """
+    from utils.assessment_engine import evaluate_dataframe_stages, assemble_results
+
+    replicates = {field: [] for field in SAMPLE_SCORE_FIELDS}
+    if len(sample) >= 2 * SAMPLE_REPLICATE_GROUPS:
+        groups = assign_replicate_groups(len(sample), seed)
+        for group in range(SAMPLE_REPLICATE_GROUPS):
+            part = sample[groups == group].reset_index(drop=True)
+            replica = {}
+            assemble_results(replica, evaluate_dataframe_stages(part, rules), rules)
+            for field in SAMPLE_SCORE_FIELDS:
+                replicates[field].append(replica.get(field))
+
+    sample_fraction = len(sample) / population_rows if population_rows else 1.0
+    return {
+        field: confidence_interval(results.get(field), replicates[field], sample_fraction)
+        for field in SAMPLE_SCORE_FIELDS
+    }
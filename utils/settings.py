@@ -0,0 +1,38 @@
+import os
+from config import Config
+
+def get_setting(name, default=None):
+    """
+    读取配置项
+
+    优先使用当前Flask应用的配置；在应用上下文之外（例如命令行脚本、
+    后台工作进程）则回退到 Config 类中的默认值。
+
+    Args:
+        name: 配置项名称
+        default: 配置项不存在时的默认值
+
+    Returns:
+        配置项的值
+    """
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context() and name in current_app.config:
+            return current_app.config[name]
+    except ImportError:
+        pass
+    return getattr(Config, name, default)
+
+def get_cache_folder(*parts):
+    """
+    获取缓存目录下的子目录，不存在时自动创建
+
+    Args:
+        *parts: 子目录名称
+
+    Returns:
+        str: 目录的绝对路径
+    """
+    folder = os.path.join(get_setting('CACHE_FOLDER'), *parts)
+    os.makedirs(folder, exist_ok=True)
+    return folder
@@ -0,0 +1,353 @@
+"""
+可合并的近似统计草图
+
+- HyperLogLog / DistinctCounter：不同值数量
+- TDigest：分位数（中位数等）
+- SpaceSaving：高频值（Top-K）
+
+每个草图的内存占用有上限，不随行数增长；同类草图可以合并，
+并可通过 to_dict / from_dict 转换为JSON兼容的字典，随数据集档案一起保存。
+"""
+import zlib
+import base64
+import numpy as np
+import pandas as pd
+
+_UINT64_MASK = (1 << 64) - 1
+
+# 近似统计模式下各草图的默认参数
+SKETCH_HLL_PRECISION = 14
+SKETCH_EXACT_LIMIT = 2048  # 精确哈希集合的上限，与HyperLogLog寄存器占用的内存相同
+TDIGEST_COMPRESSION = 200
+SPACE_SAVING_CAPACITY = 100
+
+def hash_values(series):
+    """
+    将Series中的非空值映射为64位哈希
+
+    数值统一转换为float64后再哈希，使不同数据块中 1 与 1.0 的哈希一致。
+
+    Args:
+        series: pandas Series
+
+    Returns:
+        numpy.ndarray: uint64哈希数组
+    """
+    values = series.dropna()
+    if values.dtype.kind in 'iuf':
+        values = values.astype('float64')
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+def _encode_array(values):
+    """把numpy数组压缩后编码为base64字符串"""
+    return base64.b64encode(zlib.compress(np.ascontiguousarray(values).tobytes())).decode('ascii')
+
+def _decode_array(text, dtype):
+    """_encode_array 的逆操作"""
+    return np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=dtype).copy()
+
+def _bit_length(values):
+    """向量化计算uint64数组中每个元素的二进制位数"""
+    x = values.copy()
+    length = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = (x >> np.uint64(shift)) > 0
+        length += high * shift
+        x = np.where(high, x >> np.uint64(shift), x)
+    return length + (x > 0)
+
+class HyperLogLog:
+    """
+    HyperLogLog基数估计
+
+    使用 2^precision 个寄存器，内存占用固定；相对标准误差约为 1.04 / sqrt(2^precision)。
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """加入一批64位哈希值"""
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        """合并另一个同精度的HyperLogLog"""
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog精度不一致，无法合并")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """估计基数"""
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # 小基数时使用线性计数修正
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        return {'precision': self.precision, 'registers': _encode_array(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        hll = cls(data['precision'])
+        hll.registers = _decode_array(data['registers'], np.uint8)
+        return hll
+
+class DistinctCounter:
+    """
+    可合并的去重计数器
+
+    不同值数量不超过 exact_limit 时保存哈希集合，结果精确；
+    超过后转为HyperLogLog估计，内存占用不再随数据增长。
+    """
+
+    def __init__(self, exact_limit=16384, precision=14):
+        self.exact_limit = exact_limit
+        self.precision = precision
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.hll = None
+
+    @property
+    def is_exact(self):
+        return self.hll is None
+
+    def add_series(self, series):
+        """加入一个Series中的非空值"""
+        self.add_hashes(hash_values(series))
+
+    def add_hashes(self, hashes):
+        """加入一批64位哈希值"""
+        if self.hll is not None:
+            self.hll.add_hashes(hashes)
+            return
+        self.hashes = np.unique(np.concatenate([self.hashes, hashes]))
+        if len(self.hashes) > self.exact_limit:
+            self.hll = HyperLogLog(self.precision)
+            self.hll.add_hashes(self.hashes)
+            self.hashes = np.empty(0, dtype=np.uint64)
+
+    def merge(self, other):
+        """合并另一个去重计数器"""
+        if other.hll is not None:
+            if self.hll is None:
+                self.hll = HyperLogLog(self.precision)
+                self.hll.add_hashes(self.hashes)
+                self.hashes = np.empty(0, dtype=np.uint64)
+            self.hll.merge(other.hll)
+        else:
+            self.add_hashes(other.hashes)
+        return self
+
+    def count(self):
+        """返回去重计数（精确值或估计值）"""
+        if self.hll is not None:
+            return self.hll.count()
+        return int(len(self.hashes))
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        data = {'exact_limit': self.exact_limit, 'precision': self.precision}
+        if self.hll is not None:
+            data['hll'] = self.hll.to_dict()
+        else:
+            data['hashes'] = _encode_array(self.hashes)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        counter = cls(data['exact_limit'], data['precision'])
+        if 'hll' in data:
+            counter.hll = HyperLogLog.from_dict(data['hll'])
+        else:
+            counter.hashes = _decode_array(data['hashes'], np.uint64)
+        return counter
+
+class TDigest:
+    """
+    t-digest分位数估计
+
+    把有序的数值压缩为至多约 compression / 2 个质心（均值, 权重），
+    靠近两端的质心较小，因此中位数以外的极端分位数也较准确。
+    数值少于质心上限时每个值单独成为质心，分位数与精确结果一致。
+    """
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total_weight(self):
+        return float(self.weights.sum())
+
+    def add_values(self, values):
+        """加入一批数值，忽略NaN和无穷值"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+
+    def merge(self, other):
+        """合并另一个t-digest"""
+        if len(other.means) == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+        return self
+
+    def _compress(self, means, weights):
+        """按 k1 尺度函数把排序后的质心分组合并"""
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        if len(means) > self.compression / 2:
+            # 每个质心左边界所在的 k 区间（宽度为1）相同的质心合并为一个
+            q = (cumulative - weights) / total
+            k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+            groups = np.floor(k).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+            group_weights = np.add.reduceat(weights, starts)
+            means = np.add.reduceat(means * weights, starts) / group_weights
+            weights = group_weights
+        self.means = means
+        self.weights = weights
+
+    def quantile(self, q):
+        """
+        估计分位数
+
+        Args:
+            q: 0到1之间的分位点
+
+        Returns:
+            float: 分位数；没有数据时返回None
+        """
+        if len(self.means) == 0:
+            return None
+        # 质心的中心位置按累计权重排列，两端以最小值和最大值为界线性插值
+        centers = np.cumsum(self.weights) - self.weights / 2
+        total = self.total_weight
+        positions = np.r_[0.0, centers, total]
+        values = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q * total, positions, values))
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min if len(self.means) else None,
+            'max': self.max if len(self.means) else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        digest = cls(data['compression'])
+        digest.means = np.asarray(data['means'], dtype=np.float64)
+        digest.weights = np.asarray(data['weights'], dtype=np.float64)
+        if len(digest.means):
+            digest.min = float(data['min'])
+            digest.max = float(data['max'])
+        return digest
+
+class SpaceSaving:
+    """
+    Space-Saving高频值统计
+
+    最多保留 capacity 个计数器；每个值的计数可能偏高，偏高的上限记录在 errors 中。
+    一批数据先精确计数，再与已有计数器合并：一方没有的值按该方最小的计数补足，
+    然后保留计数最大的 capacity 个值。
+    """
+
+    def __init__(self, capacity=SPACE_SAVING_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+
+    def _floor(self):
+        """计数器已满时未被记录的值的计数上限"""
+        return int(self.counts.iloc[-1]) if len(self.counts) >= self.capacity else 0
+
+    def add_series(self, series):
+        """加入一个Series中的非空值"""
+        counts = series.value_counts()
+        if counts.empty:
+            return
+        # 被截断的值的计数不超过第 capacity + 1 个计数
+        floor = int(counts.iloc[self.capacity]) if len(counts) > self.capacity else 0
+        counts = counts.iloc[:self.capacity].astype(np.int64)
+        self._combine(counts, pd.Series(0, index=counts.index, dtype=np.int64), floor)
+
+    def merge(self, other):
+        """合并另一个Space-Saving统计"""
+        self._combine(other.counts, other.errors, other._floor())
+        return self
+
+    def _combine(self, counts, errors, floor):
+        """与另一组计数器合并，floor 为对方未记录的值的计数上限"""
+        own_floor = self._floor()
+        index = self.counts.index.union(counts.index, sort=False)
+        merged = self.counts.reindex(index, fill_value=own_floor) + counts.reindex(index, fill_value=floor)
+        merged_errors = self.errors.reindex(index, fill_value=own_floor) + errors.reindex(index, fill_value=floor)
+        merged = merged.sort_values(ascending=False, kind='mergesort').iloc[:self.capacity]
+        self.counts = merged.astype(np.int64)
+        self.errors = merged_errors.reindex(merged.index).astype(np.int64)
+
+    def top(self, k):
+        """
+        计数最大的 k 个值
+
+        Returns:
+            list: [[值, 计数], ...]，按计数从大到小排列
+        """
+        return [[value, int(count)] for value, count in self.counts.iloc[:k].items()]
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        return {
+            'capacity': self.capacity,
+            'items': [
+                [value, int(count), int(self.errors[value])]
+                for value, count in self.counts.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        sketch = cls(data['capacity'])
+        items = data['items']
+        index = pd.Index([item[0] for item in items], dtype=object)
+        sketch.counts = pd.Series([item[1] for item in items], index=index, dtype=np.int64)
+        sketch.errors = pd.Series([item[2] for item in items], index=index, dtype=np.int64)
+        return sketch
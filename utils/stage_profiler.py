@@ -0,0 +1,142 @@
+"""
+评估阶段的轻量级性能分析
+
+记录每个阶段的墙钟时间、CPU时间、内存变化和处理的行列数。
+内存统计有两种来源：
+- rss：进程常驻内存（RSS）在阶段前后的变化及峰值的增长，开销可以忽略；
+- tracemalloc：阶段内Python与numpy分配内存的峰值，更准确但会明显拖慢评估。
+
+关闭时 stage() 返回一个共享的空上下文，几乎没有开销。阶段之间不嵌套。
+"""
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，只能读取当前RSS
+    resource = None
+
+# 支持的内存统计来源
+MEMORY_SOURCES = ('rss', 'tracemalloc')
+
+class _DisabledRecord(dict):
+    """关闭性能分析时的阶段记录，写入的字段直接丢弃"""
+
+    def __setitem__(self, key, value):
+        pass
+
+class _DisabledStage:
+    """关闭性能分析时的阶段上下文，不记录任何内容"""
+
+    def __enter__(self):
+        return _DISABLED_RECORD
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_DISABLED_RECORD = _DisabledRecord()
+_DISABLED_STAGE = _DisabledStage()
+
+class StageProfiler:
+    """
+    按阶段记录耗时和内存
+
+    用法:
+        profiler = StageProfiler()
+        with profiler.stage('quality', rows=len(df), columns=len(df.columns)) as record:
+            ...
+            record['rows'] = ...  # 行列数也可以在阶段结束前补充
+        results['profile'] = profiler.summary()
+    """
+
+    def __init__(self, enabled=True, memory='rss'):
+        if memory not in MEMORY_SOURCES:
+            raise ValueError(f"未知的内存统计来源: {memory}")
+        self.enabled = enabled
+        self.memory = memory
+        self.stages = []
+        self._started = time.perf_counter()
+
+    def stage(self, name, rows=None, columns=None):
+        """
+        记录一个阶段
+
+        Args:
+            name: 阶段名称
+            rows: 处理的行数（可选）
+            columns: 处理的列数（可选）
+
+        Returns:
+            上下文管理器，进入时返回该阶段的记录字典
+        """
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return self._stage(name, rows, columns)
+
+    @contextmanager
+    def _stage(self, name, rows, columns):
+        record = {'name': name, 'rows': rows, 'columns': columns}
+        tracing = False
+        if self.memory == 'tracemalloc':
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        else:
+            rss_before = _current_rss()
+            max_rss_before = _max_rss()
+        wall_before = time.perf_counter()
+        cpu_before = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = round(time.perf_counter() - wall_before, 6)
+            record['cpu_time'] = round(time.process_time() - cpu_before, 6)
+            if self.memory == 'tracemalloc':
+                traced_after, traced_peak = tracemalloc.get_traced_memory()
+                record['memory_peak_bytes'] = traced_peak - traced_before
+                record['memory_delta_bytes'] = traced_after - traced_before
+                if tracing:
+                    tracemalloc.stop()
+            else:
+                record['memory_peak_bytes'] = _difference(_max_rss(), max_rss_before)
+                record['memory_delta_bytes'] = _difference(_current_rss(), rss_before)
+            self.stages.append(dict(record))
+
+    def summary(self):
+        """
+        汇总各阶段的记录
+
+        Returns:
+            dict: 包含 enabled、memory_source、total_wall_time、stages 的字典
+        """
+        return {
+            'enabled': self.enabled,
+            'memory_source': self.memory,
+            'total_wall_time': round(time.perf_counter() - self._started, 6),
+            'stages': list(self.stages)
+        }
+
+def _current_rss():
+    """当前进程的常驻内存字节数；无法读取时返回None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def _max_rss():
+    """进程常驻内存的历史峰值字节数；无法读取时返回None"""
+    if resource is None:
+        return None
+    # Linux 上 ru_maxrss 以KB为单位
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _difference(after, before):
+    if after is None or before is None:
+        return None
+    return after - before
@@ -0,0 +1,65 @@
+"""
+分块流式评估
+
+逐块读取CSV/JSON文件，把每个数据块的统计量累加到可合并的状态
+（计数、求和、平方和、最小/最大值、缺失值计数、去重计数器）中，
+峰值内存只与块大小有关，与文件大小无关。
+
+与内存评估相比的误差说明：
+- 完整性、一致性、默认准确性、规则通过率（unique 除外）与内存评估结果一致；
+- 唯一性：每列不同值不超过16384个时精确，超过后使用HyperLogLog估计，
+  相对误差约为0.8%；
+- 数值列的均值、标准差使用分块合并公式计算，与pandas仅存在浮点舍入差异；
+- 同一列在不同数据块中被推断为不同类型时（例如前面的块全为数字、后面出现文本），
+  按字符串列处理，其长度统计只基于文本块，时效性的日期解析按块分别推断格式；
+- 异常值统计固定使用 zscore 检测器，mad、iqr 检测器需要中位数和分位数，无法分块合并。
+"""
+from utils.accumulators import DatasetAccumulator
+from utils.dataset_loader import iter_dataset_chunks
+
+def run_streaming_stages(file_path, file_type, rules=None, chunk_size=100000):
+    """
+    以流式方式计算各评估阶段的结果
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（csv 或 json）
+        rules: 数据质量规则列表（可选）
+        chunk_size: 每块的行数
+
+    Returns:
+        dict: 与内存评估相同结构的各阶段结果，另含 chunk_count
+    """
+    return accumulate_dataset(file_path, file_type, rules, chunk_size).finalize_stages()
+
+def accumulate_dataset(file_path, file_type, rules=None, chunk_size=100000, accumulator=None):
+    """
+    把文件中的全部数据块累加到可合并的统计状态中
+
+    第一遍扫描累加全部统计量；如果存在需要统计异常值的数值列，
+    再只读取这些列进行第二遍扫描。传入已有的统计状态时（例如追加数据），
+    第二遍扫描只统计本文件中的异常值，判定使用合并后的均值和标准差。
+
+    Args:
+        file_path: 文件路径
+        file_type: 文件类型（csv 或 json）
+        rules: 数据质量规则列表（可选，传入 accumulator 时忽略）
+        chunk_size: 每块的行数
+        accumulator: 已有的 DatasetAccumulator（可选）
+
+    Returns:
+        DatasetAccumulator: 统计状态
+    """
+    if accumulator is None:
+        accumulator = DatasetAccumulator(rules, file_type=file_type)
+    file_columns = set()
+    for chunk in iter_dataset_chunks(file_path, file_type, chunk_size=chunk_size):
+        accumulator.update(chunk)
+        file_columns.update(chunk.columns)
+
+    outlier_columns = [col for col in accumulator.outlier_columns() if col in file_columns]
+    if outlier_columns:
+        for chunk in iter_dataset_chunks(file_path, file_type, chunk_size=chunk_size, usecols=outlier_columns):
+            accumulator.update_outliers(chunk)
+
+    return accumulator
@@ -0,0 +1,151 @@
+"""
+数据集摘要图表数据的缓存
+
+数据集可视化页面和摘要API返回的图表数据只由数据文件的内容决定，按文件内容哈希缓存，
+文件变化后自然失效；追加数据和删除数据集时随其他缓存一起删除。
+上传和追加完成后在后台线程中预先生成，请求直接读取缓存的结果。
+"""
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.settings import get_setting, get_cache_folder
+from utils.disk_cache import atomic_write, evict, remove_entries
+from utils.dataset_loader import get_file_hash
+
+# 图表数据的结构变化时递增版本号，旧版本的缓存不再命中
+SUMMARY_VERSION = 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_summary_cache_key(file_path):
+    """
+    计算摘要图表数据的缓存键
+
+    由文件内容哈希、图表数据版本、图表点数预算和影响数据集档案内容的配置共同决定。
+    文件哈希作为前缀，便于按数据集失效。
+
+    Args:
+        file_path: 数据文件路径
+
+    Returns:
+        str: 缓存键
+    """
+    from utils.dataset_profile import PROFILE_VERSION
+    digest = hashlib.sha256(json.dumps({
+        'summary_version': SUMMARY_VERSION,
+        'profile_version': PROFILE_VERSION,
+        'approximate': get_setting('ASSESSMENT_APPROXIMATE_STATS', False),
+        'point_budget': get_setting('CHART_POINT_BUDGET', 2000)
+    }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return f"{get_file_hash(file_path)}_{digest}"
+
+def load_cached_summary(key):
+    """
+    读取缓存的摘要图表数据，命中时更新其访问时间
+
+    Args:
+        key: 缓存键
+
+    Returns:
+        dict: 图表数据；未命中时返回None
+    """
+    path = _summary_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return payload
+
+def save_cached_summary(key, payload):
+    """
+    保存摘要图表数据，超出容量上限时按最近访问时间淘汰
+
+    Args:
+        key: 缓存键
+        payload: 图表数据
+    """
+    path = _summary_path(key)
+    try:
+        atomic_write(path, lambda f: json.dump(payload, f, ensure_ascii=False))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error saving dataset summary {path}: {str(e)}")
+        return
+    evict(get_cache_folder('summaries'), '.json', get_setting('SUMMARY_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+def get_or_build_summary(file_path, file_type=None):
+    """
+    获取数据文件的摘要图表数据，缓存中没有时由数据集档案生成并保存
+
+    Args:
+        file_path: 数据文件路径
+        file_type: 文件类型（可选）
+
+    Returns:
+        dict: 包含 column_types、missing_data 和 charts 的字典
+
+    Raises:
+        Exception: 无法读取数据文件或生成数据集档案
+    """
+    from utils.visualization_helper import build_summary_payload
+
+    if not get_setting('SUMMARY_CACHE_ENABLED', True):
+        return build_summary_payload(file_path, file_type)
+
+    key = get_summary_cache_key(file_path)
+    payload = load_cached_summary(key)
+    if payload is None:
+        payload = build_summary_payload(file_path, file_type)
+        save_cached_summary(key, payload)
+    return payload
+
+def schedule_summary(app, file_path, file_type=None):
+    """
+    在后台线程中预先生成数据文件的摘要图表数据
+
+    SUMMARY_PRECOMPUTE 为False或缓存关闭时不做任何事，图表数据在第一次请求时生成。
+
+    Args:
+        app: Flask应用实例
+        file_path: 数据文件路径
+        file_type: 文件类型（可选）
+    """
+    if not app.config.get('SUMMARY_CACHE_ENABLED', True) or not app.config.get('SUMMARY_PRECOMPUTE', True):
+        return
+    _get_executor().submit(_precompute_summary, app, file_path, file_type)
+
+def invalidate_summary_cache(file_path=None):
+    """
+    删除缓存的摘要图表数据
+
+    Args:
+        file_path: 只删除该文件的数据（可选，默认全部删除）
+
+    Returns:
+        int: 删除的条目数量
+    """
+    prefix = get_file_hash(file_path) + '_' if file_path else ''
+    return remove_entries(get_cache_folder('summaries'), prefix + '*.json')
+
+def _precompute_summary(app, file_path, file_type):
+    """后台线程中生成摘要图表数据，错误只记录不抛出"""
+    with app.app_context():
+        try:
+            get_or_build_summary(file_path, file_type)
+        except Exception as e:
+            print(f"Error precomputing dataset summary for {file_path}: {str(e)}")
+
+def _get_executor():
+    """预先生成摘要使用的后台线程（只有一个，避免与请求争用CPU）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='summary-precompute')
+    return _executor
+
+def _summary_path(key):
+    return os.path.join(get_cache_folder('summaries'), key + '.json')
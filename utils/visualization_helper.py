@@ -1,15 +1,27 @@
 import json
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import base64
-from io import BytesIO
+from utils.dataset_profile import get_or_build_profile
+from utils.settings import get_setting
+from utils.summary_cache import get_or_build_summary
+
+# 评估图表数据的结构变化时递增版本号，客户端缓存的旧图表随之失效
+ASSESSMENT_CHARTS_VERSION = 1
+
+# 需要按点数预算降采样的图表类型及其方法
+DOWNSAMPLE_METHODS = {
+    'line': 'lttb',
+    'time_series': 'minmax',
+    'scatter': 'density'
+}
 
 def generate_dataset_summary(dataset):
     """
     生成数据集摘要和可视化数据
     
+    图表数据按文件内容缓存（见 utils.summary_cache），上传后在后台预先生成，
+    这里只读取缓存并补充数据集的基本信息。
+    
     Args:
         dataset: 数据集模型实例
         
@@ -28,97 +40,94 @@ def generate_dataset_summary(dataset):
     }
     
     try:
-        # 读取数据集文件
-        file_path = dataset.file_path
-        
-        if dataset.file_type == 'csv':
-            df = pd.read_csv(file_path)
-        elif dataset.file_type in ['xlsx', 'xls']:
-            df = pd.read_excel(file_path)
-        elif dataset.file_type == 'json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-                df = pd.DataFrame(data)
-            else:
-                raise ValueError("JSON文件格式不支持，需要包含对象列表")
-        else:
-            raise ValueError(f"不支持的文件类型: {dataset.file_type}")
+        summary.update(get_or_build_summary(dataset.file_path, file_type=dataset.file_type))
+    except Exception as e:
+        summary['error'] = str(e)
+    
+    return summary
+
+def build_summary_payload(file_path, file_type=None):
+    """
+    由数据集档案生成摘要图表数据
+    
+    Args:
+        file_path: 数据文件路径
+        file_type: 文件类型（可选）
         
-        # 生成列类型分布图
-        column_types = get_column_types(df)
-        summary['column_types'] = column_types
+    Returns:
+        dict: 包含 column_types、missing_data 和 charts 的字典
+    """
+    summary = {'charts': []}
+    
+    # 读取上传时生成的数据集档案，不需要重新载入数据
+    profile = get_or_build_profile(file_path, file_type=file_type)
+    columns = profile['columns']
+    
+    # 生成列类型分布图
+    column_types = get_column_types(column['type'] for column in columns)
+    summary['column_types'] = column_types
+    summary['charts'].append({
+        'type': 'pie',
+        'title': '列类型分布',
+        'data': [{'name': k, 'value': v} for k, v in column_types.items()]
+    })
+    
+    # 生成缺失值分布图
+    missing_data = get_profile_missing_data(profile)
+    summary['missing_data'] = missing_data
+    if missing_data['columns']:
         summary['charts'].append({
-            'type': 'pie',
-            'title': '列类型分布',
-            'data': [{'name': k, 'value': v} for k, v in column_types.items()]
+            'type': 'bar',
+            'title': '缺失值比例 (前10列)',
+            'categories': [col for col, _ in missing_data['columns'][:10]],
+            'series': [{
+                'name': '缺失值比例 (%)',
+                'data': [pct for _, pct in missing_data['columns'][:10]]
+            }]
         })
+    
+    # 生成数值列分布图 (最多5个)
+    numeric_columns = [column for column in columns if column['kind'] == 'numeric']
+    for column in numeric_columns[:5]:
+        if not column.get('histogram'):
+            continue
+        col = column['name']
         
-        # 生成缺失值分布图
-        missing_data = get_missing_data(df)
-        summary['missing_data'] = missing_data
-        if missing_data['columns']:
-            summary['charts'].append({
-                'type': 'bar',
-                'title': '缺失值比例 (前10列)',
-                'categories': [col for col, _ in missing_data['columns'][:10]],
-                'series': [{
-                    'name': '缺失值比例 (%)',
-                    'data': [pct for _, pct in missing_data['columns'][:10]]
-                }]
-            })
-        
-        # 生成数值列分布图 (最多5个)
-        numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
-        for i, col in enumerate(numeric_columns[:5]):
-            try:
-                # 计算基本统计信息
-                stats = {
-                    'min': float(df[col].min()),
-                    'max': float(df[col].max()),
-                    'mean': float(df[col].mean()),
-                    'median': float(df[col].median()),
-                    'std': float(df[col].std())
-                }
-                
-                # 生成直方图数据
-                hist_data = generate_histogram_data(df[col])
-                
-                summary['charts'].append({
-                    'type': 'histogram',
-                    'title': f'{col} 分布',
-                    'categories': hist_data['bins'],
-                    'series': [{
-                        'name': col,
-                        'data': hist_data['counts']
-                    }],
-                    'stats': stats
-                })
-            except:
-                pass
+        # 基本统计信息
+        stats = {
+            key: float('nan') if column.get(key) is None else float(column[key])
+            for key in ['min', 'max', 'mean', 'median', 'std']
+        }
         
-        # 生成分类列分布图 (最多5个)
-        categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
-        for i, col in enumerate(categorical_columns[:5]):
-            try:
-                # 获取前10个类别及其计数
-                value_counts = df[col].value_counts().head(10)
-                
-                summary['charts'].append({
-                    'type': 'bar',
-                    'title': f'{col} 分布 (前10类)',
-                    'categories': value_counts.index.tolist(),
-                    'series': [{
-                        'name': col,
-                        'data': value_counts.values.tolist()
-                    }]
-                })
-            except:
-                pass
+        # 直方图数据
+        hist_data = format_histogram(column['histogram']['edges'], column['histogram']['counts'])
         
-    except Exception as e:
-        summary['error'] = str(e)
+        summary['charts'].append({
+            'type': 'histogram',
+            'title': f'{col} 分布',
+            'categories': hist_data['bins'],
+            'series': [{
+                'name': col,
+                'data': hist_data['counts']
+            }],
+            'stats': stats
+        })
     
+    # 生成分类列分布图 (最多5个)
+    categorical_columns = [column for column in columns if column.get('top_values') is not None]
+    for column in categorical_columns[:5]:
+        col = column['name']
+        summary['charts'].append({
+            'type': 'bar',
+            'title': f'{col} 分布 (前10类)',
+            'categories': [value for value, _ in column['top_values']],
+            'series': [{
+                'name': col,
+                'data': [count for _, count in column['top_values']]
+            }]
+        })
+    
+    summary['charts'] = [apply_point_budget(chart) for chart in summary['charts']]
     return summary
 
 def generate_assessment_charts(assessment):
@@ -214,21 +223,280 @@ def generate_assessment_charts(assessment):
                     }]
                 })
     
+    charts['charts'] = [apply_point_budget(chart) for chart in charts['charts']]
     return charts
 
-def get_column_types(df):
+def get_point_budget():
+    """
+    获取单个图表最多输出的数据点数量
+    
+    Returns:
+        int: 点数预算
+    """
+    return max(int(get_setting('CHART_POINT_BUDGET', 2000)), 4)
+
+def apply_point_budget(chart, budget=None):
     """
-    获取DataFrame的列类型分布
+    按点数预算对图表降采样，在序列化之前调用
+    
+    折线图（line）使用LTTB，时间序列（time_series）按桶保留最小值和最大值，
+    点数超出预算的散点图（scatter）转换为二维密度热力图（heatmap）。
+    其他类型的图表原样返回。
+    
+    折线图和时间序列的数据可以是 categories 加数值列表，也可以是 [x, y] 点列表；
+    多个序列平分预算。数值列表形式的序列共用一组下标（按各序列标准化偏差的逐点最大值选取），
+    与 categories 保持对齐；点列表形式的序列各自选取下标。序列数量不超过预算时，输出的总点数不超过预算。
     
     Args:
-        df: pandas DataFrame
+        chart: 图表数据
+        budget: 点数预算（可选，默认使用配置）
+        
+    Returns:
+        dict: 降采样后的图表数据，包含 downsampled 字段说明方法和原始点数；未超出预算时返回原图表
+    """
+    method = DOWNSAMPLE_METHODS.get(chart.get('type'))
+    series_list = chart.get('series') or []
+    if method is None or not series_list:
+        return chart
+    
+    budget = budget or get_point_budget()
+    original_points = sum(len(series['data']) for series in series_list)
+    if original_points <= budget:
+        return chart
+    
+    if method == 'density':
+        return _density_chart(chart, budget, original_points)
+    
+    series_budget = max(budget // len(series_list), 1)
+    categories = chart.get('categories')
+    result = dict(chart)
+    first = series_list[0]['data']
+    if first and isinstance(first[0], (list, tuple)):
+        # 点列表形式的序列各自降采样
+        result['series'] = []
+        for series in series_list:
+            x, y = _series_xy(series['data'], None)
+            indices = np.sort(_select_indices(method, x, y, series_budget))
+            result['series'].append(dict(series, data=[series['data'][i] for i in indices]))
+    else:
+        x, y = _shared_xy(series_list, categories)
+        indices = np.sort(_select_indices(method, x, y, series_budget))
+        if categories is not None:
+            result['categories'] = [categories[i] for i in indices]
+        result['series'] = [
+            dict(series, data=[series['data'][i] for i in indices if i < len(series['data'])])
+            for series in series_list
+        ]
+    result['downsampled'] = {
+        'method': method,
+        'original_points': original_points,
+        'points': sum(len(series['data']) for series in result['series'])
+    }
+    return result
+
+def lttb_downsample(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样
+    
+    保留首尾两点，其余点按顺序均分为 threshold-2 个桶，每个桶保留与前一个保留点、
+    下一个桶的均值点构成的三角形面积最大的点，折线的形状（峰谷）得以保留。
+    
+    Args:
+        x: 横坐标（数值，按顺序排列）
+        y: 纵坐标
+        threshold: 保留的点数
+        
+    Returns:
+        numpy.ndarray: 保留的点的下标（升序）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = np.nanmean(x[next_start:next_end]) if next_end > next_start else x[n - 1]
+        avg_y = np.nanmean(y[next_start:next_end]) if next_end > next_start else y[n - 1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        # 缺失值的面积为NaN，排在最后
+        area = np.where(np.isnan(area), -1.0, area)
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+def minmax_downsample(x, y, threshold):
+    """
+    按桶保留最小值和最大值的降采样
+    
+    点按横坐标排序后均分为 threshold/2 个桶，每个桶保留纵坐标最小和最大的点，
+    时间序列中的尖峰和低谷都不会丢失。
+    
+    Args:
+        x: 横坐标（数值，例如时间戳）
+        y: 纵坐标
+        threshold: 保留的点数上限
+        
+    Returns:
+        numpy.ndarray: 保留的点的下标（按横坐标升序）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    
+    order = np.argsort(x, kind='stable')
+    sorted_y = y[order]
+    bucket_count = max(threshold // 2, 1)
+    edges = np.linspace(0, n, bucket_count + 1).astype(np.int64)
+    positions = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        values = sorted_y[start:end]
+        if end <= start or np.isnan(values).all():
+            continue
+        low = start + int(np.nanargmin(values))
+        high = start + int(np.nanargmax(values))
+        positions.extend(sorted({low, high}))
+    return order[np.asarray(positions, dtype=np.int64)]
+
+def density_grid(x, y, bins):
+    """
+    二维分箱计数，用于替代点数过多的散点图
+    
+    Args:
+        x: 横坐标
+        y: 纵坐标
+        bins: 每个坐标轴的分箱数量
+        
+    Returns:
+        dict: 包含 x_edges、y_edges 和 data（非零格子的 [x分箱, y分箱, 计数]）的字典
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite], bins=bins)
+    cells = np.argwhere(counts > 0)
+    return {
+        'x_edges': [round(float(edge), 6) for edge in x_edges],
+        'y_edges': [round(float(edge), 6) for edge in y_edges],
+        'data': [[int(i), int(j), int(counts[i, j])] for i, j in cells]
+    }
+
+def _density_chart(chart, budget, original_points):
+    """把散点图转换为二维密度热力图，格子数量不超过点数预算"""
+    bins = max(int(np.sqrt(budget)), 1)
+    x, y = [], []
+    for series in chart['series']:
+        series_x, series_y = _series_xy(series['data'], None)
+        x.append(series_x)
+        y.append(series_y)
+    grid = density_grid(np.concatenate(x), np.concatenate(y), bins)
+    return {
+        'type': 'heatmap',
+        'title': chart.get('title'),
+        'x_edges': grid['x_edges'],
+        'y_edges': grid['y_edges'],
+        'data': grid['data'],
+        'downsampled': {
+            'method': 'density',
+            'original_points': original_points,
+            'points': len(grid['data'])
+        }
+    }
+
+def _select_indices(method, x, y, threshold):
+    """按降采样方法选取不超过 threshold 个点的下标；预算不足3个点时均匀选取"""
+    if threshold >= len(y):
+        return np.arange(len(y))
+    if threshold < 3:
+        return np.unique(np.linspace(0, len(y) - 1, threshold).round().astype(np.int64))
+    if method == 'lttb':
+        return lttb_downsample(x, y, threshold)
+    return minmax_downsample(x, y, threshold)
+
+def _series_xy(data, categories):
+    """
+    取出序列的横纵坐标
+    
+    数据为 [x, y] 点列表时使用点的横坐标，否则使用 categories；
+    横坐标不是数值时尝试按ISO 8601日期转换为时间戳，仍然不行时使用位置序号。
+    """
+    if data and isinstance(data[0], (list, tuple)):
+        x = [point[0] for point in data]
+        y = [point[1] for point in data]
+    else:
+        x = categories if categories is not None else range(len(data))
+        y = data
+    y = _numeric_values(y)
+    return _numeric_x(x, len(y)), y
+
+def _shared_xy(series_list, categories):
+    """
+    数值列表形式的多个序列共用的横纵坐标
+    
+    只有一个序列时纵坐标就是该序列；多个序列时为各序列标准化偏差 |y - 均值| / 标准差 的逐点最大值，
+    任何一个序列的峰谷都会反映在其中。
+    """
+    length = len(categories) if categories is not None else max(len(series['data']) for series in series_list)
+    x = _numeric_x(categories if categories is not None else range(length), length)
+    y = np.full(length, np.nan)
+    if len(series_list) == 1:
+        values = _numeric_values(series_list[0]['data'][:length])
+        y[:len(values)] = values
+        return x, y
+    
+    for series in series_list:
+        values = _numeric_values(series['data'][:length])
+        finite = values[np.isfinite(values)]
+        if not len(finite):
+            continue
+        std = finite.std()
+        deviation = np.abs(values - finite.mean()) / std if std > 0 else np.where(np.isfinite(values), 0.0, np.nan)
+        # fmax 忽略NaN，一个序列的缺失值不会覆盖其他序列
+        y[:len(values)] = np.fmax(y[:len(values)], deviation)
+    return x, y
+
+def _numeric_values(values):
+    """纵坐标转换为float数组，无法转换的值为NaN"""
+    return pd.to_numeric(pd.Series(list(values)), errors='coerce').to_numpy(dtype=float)
+
+def _numeric_x(x, length):
+    """横坐标转换为float数组：数值、ISO 8601日期的时间戳或位置序号"""
+    x = list(x)[:length]
+    try:
+        x = np.asarray(x, dtype=float)
+    except (TypeError, ValueError):
+        try:
+            x = pd.to_datetime(pd.Series(x), format='ISO8601').astype('int64').to_numpy(dtype=float)
+        except (TypeError, ValueError, OverflowError):
+            x = np.arange(length, dtype=float)
+    if len(x) < length:
+        x = np.arange(length, dtype=float)
+    return x
+
+def get_column_types(dtypes):
+    """
+    获取列类型分布
+    
+    Args:
+        dtypes: 列类型序列（例如 df.dtypes 或档案中各列的 type）
         
     Returns:
         dict: 列类型及其计数
     """
     type_counts = {}
     
-    for dtype in df.dtypes:
+    for dtype in dtypes:
         dtype_name = str(dtype)
         
         if 'int' in dtype_name:
@@ -279,6 +547,36 @@ def get_missing_data(df):
     
     return missing_data
 
+def get_profile_missing_data(profile):
+    """
+    根据数据集档案获取缺失值信息，结构与 get_missing_data 相同
+    
+    Args:
+        profile: 数据集档案
+        
+    Returns:
+        dict: 缺失值信息
+    """
+    row_count = profile['row_count']
+    total_cells = row_count * profile['column_count']
+    missing_cells = sum(column['missing_count'] for column in profile['columns'])
+    missing_data = {
+        'total_cells': total_cells,
+        'missing_cells': missing_cells,
+        'missing_percentage': round((missing_cells / total_cells) * 100, 2) if total_cells else float('nan'),
+        'columns': []
+    }
+    
+    for column in profile['columns']:
+        if column['missing_count'] > 0:
+            missing_pct = round((column['missing_count'] / row_count) * 100, 2)
+            missing_data['columns'].append((column['name'], missing_pct))
+    
+    # 按缺失比例降序排序
+    missing_data['columns'].sort(key=lambda x: x[1], reverse=True)
+    
+    return missing_data
+
 def generate_histogram_data(series, bins=10):
     """
     生成直方图数据
@@ -291,7 +589,19 @@ def generate_histogram_data(series, bins=10):
         dict: 包含分箱和计数的字典
     """
     hist, bin_edges = np.histogram(series.dropna(), bins=bins)
+    return format_histogram(bin_edges, hist)
+
+def format_histogram(bin_edges, counts):
+    """
+    将直方图的分箱边界和计数转换为图表数据
     
+    Args:
+        bin_edges: 分箱边界
+        counts: 每个分箱的计数
+        
+    Returns:
+        dict: 包含分箱标签和计数的字典
+    """
     # 将分箱边界转换为标签
     bin_labels = []
     for i in range(len(bin_edges) - 1):
@@ -299,7 +609,7 @@ def generate_histogram_data(series, bins=10):
     
     return {
         'bins': bin_labels,
-        'counts': hist.tolist()
+        'counts': [int(count) for count in counts]
     }
 
 def format_file_size(size_bytes):
@@ -320,20 +630,3 @@ def format_file_size(size_bytes):
         return f"{size_bytes / (1024 * 1024):.2f} MB"
     else:
         return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
-
-def plot_to_base64(plt_figure):
-    """
-    将matplotlib图形转换为base64编码的字符串
-    
-    Args:
-        plt_figure: matplotlib图形
-        
-    Returns:
-        str: base64编码的图形
-    """
-    buf = BytesIO()
-    plt_figure.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    return img_str
\ No newline at end of file